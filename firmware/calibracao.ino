@@ -13,6 +13,26 @@
  * LOAD - Carrega mapeamento da EEPROM
  * STATUS - Mostra estado completo
  * CLEAR - Limpa mapeamento (reset completo)
+ * PROTO:KV - Status/eventos em quadros compactos com CRC (para a interface)
+ * PROTO:TXT - Volta ao texto legível (padrão, para o Serial Monitor)
+ * BAUD:N - Troca a serial para N baud (115200/250000/500000); sem PING
+ *          na nova velocidade em 1 s volta a 9600
+ * PING - Responde ">>> PONG"
+ * SETPOS:P,N - Restaura página P e N passos sem mover (após reconexão)
+ * SETMAP:P=N,P=N,... - Define as páginas P com N passos acumulados (N = '-'
+ *          desmarca) e grava na EEPROM só essas entradas; responde
+ *          ">>> SETMAP:<quantidade>" (a interface envia só o que mudou)
+ * ACEL:I,C,N - Rampa dos movimentos de página: parte de I us/passo e chega a
+ *              C us/passo em N passos (aceleração constante); ACEL:0,0,0 desliga
+ * STOP - Confirma com ">>> Parado" (use '!' para interromper um movimento)
+ * !    - Parada imediata (um byte, sem fim de linha): interrompe o movimento
+ *        em curso, descarta comandos recebidos e ainda não executados e
+ *        responde ">>> Parado" depois das linhas finais do movimento
+ *
+ * Quadro compacto: $<tipo>,<tamanho>,<payload>*<CRC16 hex>
+ *   $S - status:    p=<pág>;s=<passos>;t=<definidas>;v=<delayUs>;m=<pág>:<passos>,...
+ *   $P - progresso: s=<passos>;i=<passo>;n=<total>
+ *   $D - concluído: s=<passos>
  */
 
 #include <EEPROM.h>
@@ -45,10 +65,23 @@ bool motor_movendo = false;
 bool parar_motor = false;
 int passos_restantes = 0;
 bool direcao_atual = HIGH;
+bool modo_compacto = false;  // PROTO:KV ativa quadros compactos
+
+// Rampa de aceleração dos movimentos de página (ACEL); rampa_passos = 0 usa delayUs
+unsigned int rampa_inicial_us = 0;
+unsigned int rampa_cruzeiro_us = 0;
+int rampa_passos = 0;
+
+// Recepção: a serial é lida também durante os movimentos para ver o '!'
+const char PARADA_IMEDIATA = '!';
+const int RX_MAX = 64;
+char rx_buf[RX_MAX];
+int rx_tam = 0;
+bool parada_solicitada = false;  // '!' ou STOP: confirmar ao terminar o comando atual
 
 void setup() {
   Serial.begin(9600);
-  delay(2000);
+  delay(100);  // A interface detecta o fim do boot pelo ">>> Pronto!", sem espera fixa
   
   // Configurar pinos do motor
   pinMode(EnablePin, OUTPUT);
@@ -91,23 +124,39 @@ void setup() {
   Serial.println(F("  LOAD       - Carrega mapeamento da EEPROM"));
   Serial.println(F("  STATUS     - Mostra estado completo"));
   Serial.println(F("  CLEAR      - Limpa mapeamento"));
+  Serial.println(F("  PROTO:KV   - Status em quadros compactos (PROTO:TXT volta)"));
+  Serial.println(F("  BAUD:N     - Troca velocidade da serial (confirmar com PING)"));
+  Serial.println(F("  ACEL:I,C,N - Rampa dos movimentos de página (us inicial, us cruzeiro, passos)"));
+  Serial.println(F("  SETMAP:P=N,... - Define páginas e grava só essas entradas na EEPROM"));
+  Serial.println(F("  !          - Parada imediata (também durante movimentos)"));
   Serial.println(F(""));
   mostrar_status();
+  Serial.println(F(">>> Pronto!"));  // Banner usado pela interface para detectar o fim do boot
 }
 
 void loop() {
   // Verificar comandos serial
-  if (Serial.available()) {
-    String cmd = Serial.readStringUntil('\n');
+  receber_serial();
+  String cmd;
+  while (proxima_linha(cmd)) {
     cmd.trim();
     cmd.toUpperCase();
     
     processarComando(cmd);
+    receber_serial();
+  }
+  
+  // A confirmação sai por último: a interface não mistura as linhas finais do movimento
+  // interrompido com a resposta do próximo comando
+  if (parada_solicitada) {
+    parada_solicitada = false;
+    parar_motor = false;
+    Serial.println(F(">>> Parado"));
   }
   
   // Executar movimento se necessário (síncrono - bloqueia até completar)
   if (motor_movendo && !parar_motor && passos_restantes > 0) {
-    executarPasso();
+    executarPasso(delayUs);
     passos_restantes--;
     passos_atual += (direcao_atual == HIGH ? 1 : -1);
     
@@ -121,7 +170,47 @@ void loop() {
   delay(10);
 }
 
+// Move o que chegou na serial para rx_buf; '!' pede a parada e descarta o que estava pendente
+void receber_serial() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == PARADA_IMEDIATA) {
+      parar_motor = true;
+      parada_solicitada = true;
+      rx_tam = 0;
+    } else if (rx_tam < RX_MAX) {
+      rx_buf[rx_tam++] = c;
+    }
+  }
+}
+
+// Retira de rx_buf a próxima linha completa (sem o '\n')
+bool proxima_linha(String& linha) {
+  for (int i = 0; i < rx_tam; i++) {
+    if (rx_buf[i] == '\n') {
+      linha = "";
+      for (int j = 0; j < i; j++) {
+        linha += rx_buf[j];
+      }
+      memmove(rx_buf, rx_buf + i + 1, rx_tam - i - 1);
+      rx_tam -= i + 1;
+      return true;
+    }
+  }
+  if (rx_tam == RX_MAX) {
+    rx_tam = 0;  // Linha maior que o buffer: descartar
+  }
+  return false;
+}
+
 void processarComando(String cmd) {
+  // Comando STOP (fora de um movimento; durante um movimento só o '!' é lido a tempo)
+  if (cmd == "STOP") {
+    parar_motor = true;
+    parada_solicitada = true;
+    return;
+  }
+  
   // Comando RESET
   if (cmd == "RESET") {
     // Parar qualquer movimento
@@ -151,14 +240,14 @@ void processarComando(String cmd) {
   else if (cmd.startsWith("F:")) {
     int passos = cmd.substring(2).toInt();
     if (passos > 0) {
-      mover_passos(passos, true);
+      mover_passos(passos, true, false);
     }
   }
   // Comando B:N - Mover N passos trás
   else if (cmd.startsWith("B:")) {
     int passos = cmd.substring(2).toInt();
     if (passos > 0) {
-      mover_passos(passos, false);
+      mover_passos(passos, false, false);
     }
   }
   // Comando NEXT
@@ -195,12 +284,103 @@ void processarComando(String cmd) {
   else if (cmd == "CLEAR") {
     limpar_mapeamento();
   }
+  // Comando PROTO:KV / PROTO:TXT - formato do status
+  else if (cmd == "PROTO:KV") {
+    modo_compacto = true;
+    Serial.println(F(">>> PROTO:KV"));
+  }
+  else if (cmd == "PROTO:TXT") {
+    modo_compacto = false;
+    Serial.println(F(">>> PROTO:TXT"));
+  }
+  // Comando BAUD:N - Troca velocidade da serial
+  else if (cmd.startsWith("BAUD:")) {
+    trocar_baudrate(cmd.substring(5).toInt());
+  }
+  // Comando SETPOS:P,N - Restaura posição conhecida pela interface
+  else if (cmd.startsWith("SETPOS:")) {
+    int virgula = cmd.indexOf(',');
+    int pagina = virgula > 7 ? cmd.substring(7, virgula).toInt() : -1;
+    if (pagina >= 0 && pagina < MAX_PAGINAS) {
+      pagina_atual = pagina;
+      passos_atual = cmd.substring(virgula + 1).toInt();
+      Serial.println(F(">>> Posição restaurada"));
+      mostrar_status();
+    } else {
+      Serial.println(F(">>> Posição inválida"));
+    }
+  }
+  // Comando SETMAP:P=N,P=N,... - Mapa enviado pela interface (só as entradas alteradas)
+  else if (cmd.startsWith("SETMAP:")) {
+    aplicar_mapa(cmd.substring(7));
+  }
+  // Comando ACEL:I,C,N - Rampa de aceleração dos movimentos de página
+  else if (cmd.startsWith("ACEL:")) {
+    int v1 = cmd.indexOf(',');
+    int v2 = cmd.indexOf(',', v1 + 1);
+    long inicial = v1 > 5 ? cmd.substring(5, v1).toInt() : -1;
+    long cruzeiro = v2 > v1 ? cmd.substring(v1 + 1, v2).toInt() : -1;
+    long passos = v2 > v1 ? cmd.substring(v2 + 1).toInt() : -1;
+    if (passos == 0) {
+      rampa_passos = 0;
+      Serial.println(F(">>> ACEL:0,0,0"));
+    } else if (inicial >= 200 && inicial <= 16000 && cruzeiro >= 200 && cruzeiro <= inicial
+               && passos > 0 && passos <= 10000) {
+      rampa_inicial_us = inicial;
+      rampa_cruzeiro_us = cruzeiro;
+      rampa_passos = passos;
+      Serial.print(F(">>> ACEL:"));
+      Serial.print(rampa_inicial_us);
+      Serial.print(',');
+      Serial.print(rampa_cruzeiro_us);
+      Serial.print(',');
+      Serial.println(rampa_passos);
+    } else {
+      Serial.println(F(">>> Aceleração inválida"));
+    }
+  }
+  // Comando PING - Confirmação de link
+  else if (cmd == "PING") {
+    Serial.println(F(">>> PONG"));
+  }
   else if (cmd.length() > 0) {
     Serial.print(F(">>> Comando inválido: "));
     Serial.println(cmd);
   }
 }
 
+void trocar_baudrate(long novo) {
+  if (novo != 9600 && novo != 115200 && novo != 250000 && novo != 500000) {
+    Serial.println(F(">>> Baudrate inválido"));
+    return;
+  }
+  
+  Serial.print(F(">>> BAUD:"));
+  Serial.println(novo);
+  Serial.flush();  // Esperar a confirmação sair na velocidade antiga
+  Serial.end();
+  Serial.begin(novo);
+  
+  // Aguardar PING na nova velocidade
+  unsigned long inicio = millis();
+  while (millis() - inicio < 1000) {
+    if (Serial.available()) {
+      String cmd = Serial.readStringUntil('\n');
+      cmd.trim();
+      cmd.toUpperCase();
+      if (cmd == "PING") {
+        Serial.println(F(">>> PONG"));
+        return;
+      }
+    }
+  }
+  
+  // Host não confirmou: voltar à velocidade padrão
+  Serial.end();
+  Serial.begin(9600);
+  Serial.println(F(">>> BAUD:9600"));
+}
+
 void marcar_pagina() {
   // Verificar se passos_atual está negativo (problema)
   if (passos_atual < 0) {
@@ -248,7 +428,7 @@ void marcar_pagina() {
   mostrar_status();
 }
 
-void mover_passos(int passos, bool frente) {
+void mover_passos(int passos, bool frente, bool com_rampa) {
   if (passos <= 0) {
     Serial.println(F(">>> Número de passos inválido!"));
     return;
@@ -274,19 +454,35 @@ void mover_passos(int passos, bool frente) {
   passos_restantes = passos;
   parar_motor = false;
   
+  // Trapézio: v = sqrt(v0² + 2·a·d), d = passos desde o início ou até o fim
+  bool rampa = com_rampa && rampa_passos > 0;
+  float v0 = rampa ? 1000000.0 / rampa_inicial_us : 0;
+  float vmax = rampa ? 1000000.0 / rampa_cruzeiro_us : 0;
+  float dois_a = rampa ? (vmax * vmax - v0 * v0) / rampa_passos : 0;
+  
   // Executar todos os passos agora (síncrono) com feedback periódico
   for (int i = 0; i < passos; i++) {
-    executarPasso();
+    unsigned int atraso = delayUs;
+    if (rampa) {
+      int d = min(i, passos - 1 - i);
+      atraso = d < rampa_passos ? (unsigned int)(1000000.0 / sqrt(v0 * v0 + dois_a * d)) : rampa_cruzeiro_us;
+    }
+    executarPasso(atraso);
     passos_atual += (frente ? 1 : -1);
+    receber_serial();
     
     // Feedback a cada 10 passos ou no início/fim
     if (i == 0 || (i + 1) % 10 == 0 || i == passos - 1) {
-      Serial.print(F("  ["));
-      Serial.print(i + 1);
-      Serial.print(F("/"));
-      Serial.print(passos);
-      Serial.print(F("] Passos acumulados: "));
-      Serial.println(passos_atual);
+      if (modo_compacto) {
+        enviar_quadro('P', "s=" + String(passos_atual) + ";i=" + String(i + 1) + ";n=" + String(passos));
+      } else {
+        Serial.print(F("  ["));
+        Serial.print(i + 1);
+        Serial.print(F("/"));
+        Serial.print(passos);
+        Serial.print(F("] Passos acumulados: "));
+        Serial.println(passos_atual);
+      }
     }
     
     // Verificar se deve parar
@@ -299,6 +495,10 @@ void mover_passos(int passos, bool frente) {
   motor_movendo = false;
   passos_restantes = 0;
   
+  if (modo_compacto) {
+    enviar_quadro('D', "s=" + String(passos_atual));
+    return;
+  }
   Serial.print(F(">>> Concluído. Passos acumulados: "));
   Serial.println(passos_atual);
 }
@@ -329,7 +529,10 @@ void ir_para_pagina(int pagina_destino) {
       Serial.print(passos_para_mover);
       Serial.print(F(" passos "));
       Serial.println(passos_atual < 0 ? F("(frente)") : F("(trás)"));
-      mover_passos(passos_para_mover, passos_atual < 0);
+      mover_passos(passos_para_mover, passos_atual < 0, true);
+      if (parar_motor) {
+        return;  // Interrompido: passos_atual já reflete onde parou
+      }
     }
     pagina_atual = 0;
     passos_atual = 0;
@@ -360,12 +563,15 @@ void ir_para_pagina(int pagina_destino) {
   Serial.print(abs(passos_para_mover));
   Serial.println(F(" passos)"));
   
-  mover_passos(abs(passos_para_mover), passos_para_mover > 0);
+  mover_passos(abs(passos_para_mover), passos_para_mover > 0, true);
+  if (parar_motor) {
+    return;  // Interrompido: passos_atual já reflete onde parou
+  }
   pagina_atual = pagina_destino;
   passos_atual = passos_destino;  // Atualizar passos atual para a posição da página
 }
 
-void executarPasso() {
+void executarPasso(unsigned int atraso) {
   // Motor X
   digitalWrite(StepX, HIGH);
   delayMicroseconds(10);  // Pulso mínimo
@@ -377,10 +583,61 @@ void executarPasso() {
   digitalWrite(StepY, LOW);
   
   // Delay entre passos (velocidade)
-  delayMicroseconds(delayUs);
+  delayMicroseconds(atraso);
+}
+
+uint16_t crc16(const char* dados, int tamanho) {
+  // CRC-16/CCITT-FALSE (polinômio 0x1021, inicial 0xFFFF)
+  uint16_t crc = 0xFFFF;
+  for (int i = 0; i < tamanho; i++) {
+    crc ^= (uint16_t)(uint8_t)dados[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+void enviar_quadro(char tipo, const String& payload) {
+  const char hex[] = "0123456789ABCDEF";
+  uint16_t crc = crc16(payload.c_str(), payload.length());
+  
+  Serial.print('$');
+  Serial.print(tipo);
+  Serial.print(',');
+  Serial.print(payload.length());
+  Serial.print(',');
+  Serial.print(payload);
+  Serial.print('*');
+  for (int shift = 12; shift >= 0; shift -= 4) {
+    Serial.print(hex[(crc >> shift) & 0xF]);
+  }
+  Serial.println();
+}
+
+void mostrar_status_compacto() {
+  String payload;
+  payload.reserve(48 + MAX_PAGINAS * 8);
+  payload += "p=" + String(pagina_atual);
+  payload += ";s=" + String(passos_atual);
+  payload += ";t=" + String(total_paginas_definidas);
+  payload += ";v=" + String(delayUs);
+  payload += ";m=";
+  bool primeira = true;
+  for (int i = 0; i < MAX_PAGINAS; i++) {
+    if (!paginas[i].definida) continue;
+    if (!primeira) payload += ',';
+    payload += String(i) + ':' + String(paginas[i].passos_acumulados);
+    primeira = false;
+  }
+  enviar_quadro('S', payload);
 }
 
 void mostrar_status() {
+  if (modo_compacto) {
+    mostrar_status_compacto();
+    return;
+  }
   Serial.println(F("--- STATUS ---"));
   Serial.print(F("Página atual: "));
   Serial.println(pagina_atual);
@@ -423,6 +680,70 @@ void mostrar_status() {
   Serial.println(F("-------------"));
 }
 
+// Aplica as entradas "P=N" (N = '-' desmarca); valida todas antes de alterar
+// para que uma linha inválida não deixe o mapa pela metade
+void aplicar_mapa(String entradas) {
+  int aplicadas = 0;
+  for (int etapa = 0; etapa < 2; etapa++) {  // 0: valida, 1: aplica
+    int inicio = 0;
+    while (inicio < (int)entradas.length()) {
+      int fim = entradas.indexOf(',', inicio);
+      if (fim < 0) fim = entradas.length();
+      int igual = entradas.indexOf('=', inicio);
+      if (igual <= inicio || igual >= fim - 1) {
+        Serial.println(F(">>> Mapa inválido"));
+        return;
+      }
+      int pagina = entradas.substring(inicio, igual).toInt();
+      String valor = entradas.substring(igual + 1, fim);
+      bool definida = valor != "-";
+      if (pagina < 0 || pagina >= MAX_PAGINAS || (definida && valor.toInt() < 0)) {
+        Serial.println(F(">>> Mapa inválido"));
+        return;
+      }
+      if (etapa == 1) {
+        paginas[pagina].passos_acumulados = definida ? valor.toInt() : 0;
+        paginas[pagina].definida = definida;
+        aplicadas++;
+      }
+      inicio = fim + 1;
+    }
+  }
+  
+  // Como no MARK: total = última página definida + 1
+  total_paginas_definidas = 0;
+  for (int i = 0; i < MAX_PAGINAS; i++) {
+    if (paginas[i].definida) total_paginas_definidas = i + 1;
+  }
+  
+  int magic;
+  EEPROM.get(EEPROM_START, magic);
+  if (magic != EEPROM_MAGIC) {
+    saveToEEPROM();  // EEPROM ainda sem mapa: grava o bloco inteiro uma vez
+  } else {
+    // Só o total e as entradas recebidas (EEPROM.put também pula bytes iguais)
+    EEPROM.put(EEPROM_START + sizeof(int), total_paginas_definidas);
+    int inicio = 0;
+    while (inicio < (int)entradas.length()) {
+      int fim = entradas.indexOf(',', inicio);
+      if (fim < 0) fim = entradas.length();
+      int pagina = entradas.substring(inicio, entradas.indexOf('=', inicio)).toInt();
+      gravar_pagina_eeprom(pagina);
+      inicio = fim + 1;
+    }
+  }
+  
+  Serial.print(F(">>> SETMAP:"));
+  Serial.println(aplicadas);
+}
+
+// Mesmo layout do saveToEEPROM: cabeçalho de 4 ints e depois (passos, definida) por página
+void gravar_pagina_eeprom(int i) {
+  int addr = EEPROM_START + 4 * sizeof(int) + i * (sizeof(int) + sizeof(bool));
+  EEPROM.put(addr, paginas[i].passos_acumulados);
+  EEPROM.put(addr + sizeof(int), paginas[i].definida);
+}
+
 void limpar_mapeamento() {
   for (int i = 0; i < MAX_PAGINAS; i++) {
     paginas[i].passos_acumulados = 0;
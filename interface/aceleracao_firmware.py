@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Aceleração no Firmware - TV Alice
+Mantém o perfil de aceleração (perfil_aceleracao.py) configurado no
+firmware de calibração: envia o ACEL a cada conexão pronta, e de novo
+quando o perfil muda
+"""
+
+from conexao_serial import PRONTO
+from perfil_aceleracao import FIRMWARES_COM_ACEL
+
+
+class AceleracaoFirmware:
+    """Mantém o perfil configurado no firmware: envia ACEL uma vez por conexão"""
+
+    def __init__(self, conexao, perfil):
+        self.conexao = conexao
+        self.perfil = perfil
+        self._enviado_para = None  # aberto_em da conexão que já recebeu o perfil
+        conexao.adicionar_ouvinte_estado(self._conexao_mudou)
+
+    def _conexao_mudou(self, estado):
+        if estado == PRONTO:
+            self.garantir()
+
+    def garantir(self):
+        """Enfileira o ACEL se o firmware suporta e ainda não o recebeu nesta conexão"""
+        if self.conexao.firmware not in FIRMWARES_COM_ACEL:
+            return None
+        if self._enviado_para == self.conexao.aberto_em:
+            return None
+        self._enviado_para = self.conexao.aberto_em
+        return self.conexao.enfileirar(self.perfil.comando(), timeout=1.0)
+
+    def alterar(self, perfil):
+        self.perfil = perfil
+        self._enviado_para = None
+        return self.garantir()
+
+    def diagnostico(self):
+        return {
+            'comando': self.perfil.comando(),
+            'aceleracao': self.perfil.aceleracao,
+            'jerk': self.perfil.jerk,
+            'enviado': self._enviado_para is not None and self._enviado_para == self.conexao.aberto_em,
+        }
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Ajuste de Geometria - TV Alice
+Ajusta o diâmetro do núcleo e a espessura do papel do modelo espiral
+(GeometriaEspiral) às páginas já marcadas, por mínimos quadrados, e prevê
+os passos das páginas que faltam com intervalo de confiança. Com duas ou
+três páginas marcadas o operador vai direto à posição prevista e só faz o
+ajuste fino antes do MARK
+
+    Página k a k·Lp cm da página 0 (páginas de tamanho fixo Lp):
+        passos(k) = P·(√(D0² + 40·h·k·Lp/π) − D0) / (2·h)
+    Elevando ao quadrado, o modelo fica linear em (h, D0):
+        40·k·Lp/π = 4·h·v² + 4·D0·v,   v = passos(k)/P voltas
+    o que dá o ponto de partida em forma fechada; alguns passos de
+    Gauss-Newton minimizam então o erro em passos (o que o operador mede)
+
+D0 é o diâmetro efetivo do rolo X na página 0 (o núcleo, se o RESET foi
+feito com o rolo X vazio). Só aritmética 2×2: microssegundos por ajuste,
+refeito a cada MARK
+"""
+
+import argparse
+import json
+import math
+import time
+
+from geometria_espiral import GeometriaEspiral
+from simulador_tv import ESPESSURA_PAPEL_MM, PASSOS_POR_VOLTA
+
+# 40/π: comprimento em cm → mm (×10) e 4/π da espiral
+FATOR = 40.0 / math.pi
+
+# Quantil 97,5% da t de Student por graus de liberdade (IC de 95%)
+T_975 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+ESPESSURA_MINIMA_MM = 1e-4
+MAX_ITERACOES = 20
+TOLERANCIA = 1e-9
+
+
+def quantil_t(graus):
+    return T_975[graus - 1] if graus <= len(T_975) else 1.960
+
+
+def _resolver(a11, a12, a22, b1, b2):
+    """Sistema simétrico 2×2; None se singular"""
+    det = a11 * a22 - a12 * a12
+    if abs(det) <= 1e-12 * max(abs(a11 * a22), 1e-300):
+        return None
+    return (a22 * b1 - a12 * b2) / det, (a11 * b2 - a12 * b1) / det
+
+
+def _voltas(d0, h, comprimento_cm):
+    """Voltas e suas derivadas em relação a D0 e h"""
+    raiz = math.sqrt(d0 * d0 + FATOR * h * comprimento_cm)
+    voltas = (raiz - d0) / (2.0 * h)
+    d_d0 = (d0 / raiz - 1.0) / (2.0 * h)
+    d_h = (FATOR * comprimento_cm * h / raiz - 2.0 * (raiz - d0)) / (4.0 * h * h)
+    return voltas, d_d0, d_h
+
+
+def _ponto_inicial(pontos, comprimento_pagina_cm, passos_por_volta):
+    """Mínimos quadrados da forma linearizada (h, D0)"""
+    a11 = a12 = a22 = b1 = b2 = 0.0
+    for k, passos in pontos:
+        v = passos / passos_por_volta
+        x1, x2, y = 4.0 * v * v, 4.0 * v, FATOR * k * comprimento_pagina_cm
+        a11 += x1 * x1
+        a12 += x1 * x2
+        a22 += x2 * x2
+        b1 += x1 * y
+        b2 += x2 * y
+    solucao = _resolver(a11, a12, a22, b1, b2)
+    if solucao is None:
+        return None
+    h, d0 = solucao
+    if d0 <= 0:
+        return None
+    # Dados quase lineares (ou ruidosos) podem dar h ≤ 0: parte do papel nominal
+    return d0, h if h > ESPESSURA_MINIMA_MM else ESPESSURA_PAPEL_MM
+
+
+class AjusteGeometria:
+    """Resultado do ajuste: parâmetros, covariância e previsão por página"""
+
+    def __init__(self, diametro_nucleo_mm, espessura_mm, covariancia, erro_padrao_passos,
+                 graus_liberdade, origem_passos, comprimento_pagina_cm, passos_por_volta,
+                 paginas_usadas, iteracoes):
+        self.diametro_nucleo_mm = diametro_nucleo_mm
+        self.espessura_mm = espessura_mm
+        self.covariancia = covariancia  # ((var D0, cov), (cov, var h)), None sem graus de liberdade
+        self.erro_padrao_passos = erro_padrao_passos
+        self.graus_liberdade = graus_liberdade
+        self.origem_passos = origem_passos
+        self.comprimento_pagina_cm = comprimento_pagina_cm
+        self.passos_por_volta = passos_por_volta
+        self.paginas_usadas = paginas_usadas
+        self.iteracoes = iteracoes
+
+    def geometria(self, comprimento_total_cm=150):
+        return GeometriaEspiral(self.diametro_nucleo_mm, self.espessura_mm,
+                                comprimento_total_cm, self.passos_por_volta)
+
+    def prever(self, pagina):
+        """(passos previstos, meia largura do IC de 95% ou None) da página"""
+        if pagina == 0:  # Origem dos passos: exata
+            return self.origem_passos, None if self.covariancia is None else 0.0
+        voltas, d_d0, d_h = _voltas(self.diametro_nucleo_mm, self.espessura_mm,
+                                    pagina * self.comprimento_pagina_cm)
+        passos = self.origem_passos + voltas * self.passos_por_volta
+        if self.covariancia is None:
+            return passos, None
+        (v11, v12), (_, v22) = self.covariancia
+        g1, g2 = d_d0 * self.passos_por_volta, d_h * self.passos_por_volta
+        # Intervalo de previsão: incerteza do modelo + dispersão de um MARK
+        variancia = g1 * g1 * v11 + 2.0 * g1 * g2 * v12 + g2 * g2 * v22 + self.erro_padrao_passos ** 2
+        return passos, quantil_t(self.graus_liberdade) * math.sqrt(variancia)
+
+    def previsoes(self, mapeamento, total_paginas):
+        """Páginas 0..total_paginas-1 com passos previstos, IC e, se marcadas, o resíduo"""
+        marcadas = {p['numero']: p['passos'] for p in mapeamento if p.get('definida', True)}
+        resultado = []
+        for numero in range(total_paginas):
+            passos, margem = self.prever(numero)
+            linha = {
+                'numero': numero,
+                'passos_previstos': round(passos),
+                'intervalo': None if margem is None else [math.floor(passos - margem), math.ceil(passos + margem)],
+                'definida': numero in marcadas,
+            }
+            if numero in marcadas:
+                linha['residuo'] = round(marcadas[numero] - passos, 1)
+            resultado.append(linha)
+        return resultado
+
+    def como_dict(self):
+        desvios = None
+        if self.covariancia is not None:
+            desvios = [math.sqrt(max(self.covariancia[0][0], 0.0)), math.sqrt(max(self.covariancia[1][1], 0.0))]
+        return {
+            'diametro_nucleo_mm': round(self.diametro_nucleo_mm, 3),
+            'espessura_mm': round(self.espessura_mm, 5),
+            'desvio_diametro_mm': None if desvios is None else round(desvios[0], 3),
+            'desvio_espessura_mm': None if desvios is None else round(desvios[1], 5),
+            'erro_padrao_passos': None if self.erro_padrao_passos is None else round(self.erro_padrao_passos, 2),
+            'graus_liberdade': self.graus_liberdade,
+            'comprimento_pagina_cm': self.comprimento_pagina_cm,
+            'paginas_usadas': self.paginas_usadas,
+            'iteracoes': self.iteracoes,
+        }
+
+
+def ajustar(mapeamento, comprimento_pagina_cm, passos_por_volta=PASSOS_POR_VOLTA):
+    """Ajusta D0 e h às páginas definidas do mapeamento (formato do /status)
+
+    Os passos são contados a partir da página 0 (ou do RESET, se ela não
+    foi marcada). Retorna None com menos de duas páginas além da 0 ou se os
+    passos não crescem com a página; o IC exige uma terceira página.
+    """
+    marcadas = {p['numero']: p['passos'] for p in mapeamento if p.get('definida', True)}
+    origem = marcadas.pop(0, 0)
+    pontos = sorted((k, passos - origem) for k, passos in marcadas.items() if k > 0)
+    if len(pontos) < 2 or any(passos <= 0 for _, passos in pontos):
+        return None
+
+    inicio = _ponto_inicial(pontos, comprimento_pagina_cm, passos_por_volta)
+    if inicio is None:
+        return None
+    d0, h = inicio
+
+    def residuos(d0, h):
+        soma, jtj, jtr = 0.0, [0.0, 0.0, 0.0], [0.0, 0.0]
+        for k, passos in pontos:
+            voltas, d_d0, d_h = _voltas(d0, h, k * comprimento_pagina_cm)
+            r = passos - voltas * passos_por_volta
+            g1, g2 = d_d0 * passos_por_volta, d_h * passos_por_volta
+            soma += r * r
+            jtj[0] += g1 * g1
+            jtj[1] += g1 * g2
+            jtj[2] += g2 * g2
+            jtr[0] += g1 * r
+            jtr[1] += g2 * r
+        return soma, jtj, jtr
+
+    soma, jtj, jtr = residuos(d0, h)
+    iteracoes = 0
+    for iteracoes in range(1, MAX_ITERACOES + 1):
+        passo = _resolver(jtj[0], jtj[1], jtj[2], jtr[0], jtr[1])
+        if passo is None:
+            break
+        # Meia-passo até reduzir o erro sem sair de D0 > 0 e h > 0
+        fator = 1.0
+        while fator > 1e-4:
+            novo_d0, novo_h = d0 + fator * passo[0], max(h + fator * passo[1], ESPESSURA_MINIMA_MM)
+            if novo_d0 > 0:
+                nova_soma, novo_jtj, novo_jtr = residuos(novo_d0, novo_h)
+                if nova_soma <= soma:
+                    break
+            fator /= 2.0
+        else:
+            break
+        convergiu = abs(novo_d0 - d0) <= TOLERANCIA * d0 and abs(novo_h - h) <= TOLERANCIA * h
+        d0, h, soma, jtj, jtr = novo_d0, novo_h, nova_soma, novo_jtj, novo_jtr
+        if convergiu:
+            break
+
+    graus = len(pontos) - 2
+    covariancia = erro_padrao = None
+    if graus > 0:
+        erro_padrao = math.sqrt(soma / graus)
+        det = jtj[0] * jtj[2] - jtj[1] * jtj[1]
+        if det > 0:
+            s2 = erro_padrao * erro_padrao
+            covariancia = ((s2 * jtj[2] / det, -s2 * jtj[1] / det),
+                           (-s2 * jtj[1] / det, s2 * jtj[0] / det))
+    return AjusteGeometria(d0, h, covariancia, erro_padrao, graus, origem, comprimento_pagina_cm,
+                           passos_por_volta, len(pontos), iteracoes)
+
+
+def mapa_sintetico(geometria, comprimento_pagina_cm, paginas, ruido_passos=0.0, semente=0):
+    """Mapeamento como o do /status gerado pelo modelo (com ruído gaussiano de MARK)"""
+    import random
+    aleatorio = random.Random(semente)
+    return [{'numero': k,
+             'passos': max(0, round(geometria.passos_entre(0, k * comprimento_pagina_cm)[0]
+                                    + (aleatorio.gauss(0, ruido_passos) if k else 0))),
+             'definida': True}
+            for k in range(paginas)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ajusta núcleo e espessura às páginas marcadas e prevê as demais')
+    parser.add_argument('--mapa', help='JSON exportado pela calibração (/export); sem ele, usa um mapa sintético')
+    parser.add_argument('--pagina-cm', type=float, default=20, help='Comprimento nominal de cada página')
+    parser.add_argument('--paginas', type=int, default=7, help='Total de páginas a prever')
+    parser.add_argument('--marcadas', type=int, default=4, help='Páginas marcadas no mapa sintético (com a 0)')
+    parser.add_argument('--nucleo-mm', type=float, default=41, help='Núcleo do mapa sintético')
+    parser.add_argument('--espessura-mm', type=float, default=ESPESSURA_PAPEL_MM, help='Papel do mapa sintético')
+    parser.add_argument('--ruido', type=float, default=2.0, help='Desvio dos MARKs no mapa sintético (passos)')
+    args = parser.parse_args()
+
+    if args.mapa:
+        with open(args.mapa) as f:
+            dados = json.load(f)
+        mapeamento = dados.get('paginas', dados.get('mapping', []))
+        completo = None
+    else:
+        geo = GeometriaEspiral(args.nucleo_mm, args.espessura_mm)
+        completo = mapa_sintetico(geo, args.pagina_cm, args.paginas, args.ruido)
+        mapeamento = completo[:args.marcadas]
+        print(f"Mapa sintético: núcleo {args.nucleo_mm} mm, papel {args.espessura_mm} mm, "
+              f"ruído {args.ruido} passos, {args.marcadas} de {args.paginas} páginas marcadas")
+
+    inicio = time.perf_counter()
+    ajuste = ajustar(mapeamento, args.pagina_cm)
+    tempo = time.perf_counter() - inicio
+    if ajuste is None:
+        print("Páginas insuficientes: marque ao menos duas além da página 0")
+        return
+
+    d = ajuste.como_dict()
+    print(f"Núcleo {d['diametro_nucleo_mm']} mm (±{d['desvio_diametro_mm']}), "
+          f"papel {d['espessura_mm']} mm (±{d['desvio_espessura_mm']}), "
+          f"erro padrão {d['erro_padrao_passos']} passos, {d['iteracoes']} iterações, {tempo * 1e6:.0f} µs")
+    reais = {p['numero']: p['passos'] for p in completo} if completo else {}
+    for linha in ajuste.previsoes(mapeamento, args.paginas):
+        intervalo = '-' if linha['intervalo'] is None else f"[{linha['intervalo'][0]}, {linha['intervalo'][1]}]"
+        extra = f"  resíduo {linha['residuo']:+.1f}" if linha['definida'] else ''
+        if not linha['definida'] and linha['numero'] in reais:
+            extra = f"  real {reais[linha['numero']]}"
+        print(f"  pág {linha['numero']:2d}: {linha['passos_previstos']:6d} passos  IC95 {intervalo}{extra}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+API Compartilhada - TV Alice
+Uma única conexão serial (e seus serviços) atrás das rotas usadas pelas
+duas interfaces. Registrada como blueprint em interface_tv_alice.py,
+calibracao.py e no servidor único (servidor_tv_alice.py); o corpo de cada
+rota fica em funções que o servidor_asgi.py também usa
+"""
+
+from flask import Blueprint, request, jsonify, Response
+import os
+import time
+from datetime import datetime
+from conexao_serial import ConexaoSerial
+from difusor_estado import DifusorEstado
+from supervisor_serial import SupervisorSerial
+from perfil_aceleracao import PerfilAceleracao, comando_com_rampa
+from aceleracao_firmware import AceleracaoFirmware
+from trabalhos import GerenciadorTrabalhos
+from rastreador_posicao import RastreadorPosicao
+from registro_eventos import RegistroEventos
+from armazem_mapas import (ArmazemMapas, identificar_dispositivo, validar_mapa, mapa_do_status, diferencas,
+                           comandos_setmap, falha_setmap, FIRMWARES_COM_SETMAP, MAX_PAGINAS)
+from ajuste_geometria import ajustar
+
+api = Blueprint('api', __name__)
+
+# Variáveis globais
+port = '/dev/cu.usbmodem1301'
+baudrate = 9600  # Velocidade de boot do firmware
+baudrates_rapidos = (500000, 250000, 115200)  # Tentados em ordem ao conectar
+protocolo = 'texto'  # 'compacto' ativa os quadros PROTO:KV do calibracao.ino
+timeout_banner = 3.0  # Espera máxima pelo ">>> Pronto!" após abrir a porta (s)
+reconexao_automatica = True  # Procura a porta e reconecta sozinho após quedas
+# Rampa das trocas de página: parte a 5000us/passo e cruza a 1000us (2000 passos/s²)
+perfil = PerfilAceleracao(atraso_inicial_us=5000, atraso_cruzeiro_us=1000, aceleracao=2000.0)
+# Mapas de páginas por perfil de papel, guardados no host (TV_ALICE_MAPAS muda o arquivo)
+arquivo_mapas = os.environ.get('TV_ALICE_MAPAS') or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                 'mapas.sqlite3')
+# Ajuste de geometria (/fit): tamanho nominal da página e páginas previstas além das marcadas
+comprimento_pagina_cm = 20
+paginas_previstas = 3
+conexao = ConexaoSerial(baudrate=baudrate, protocolo=protocolo, baudrates_rapidos=baudrates_rapidos,
+                        timeout_banner=timeout_banner)
+difusor = DifusorEstado(conexao, intervalo_status=3.0)
+supervisor = SupervisorSerial(conexao, difusor)
+aceleracao = AceleracaoFirmware(conexao, perfil)
+registro = RegistroEventos(conexao, difusor, capacidade=500)
+trabalhos = GerenciadorTrabalhos(conexao, difusor, registro=registro)
+rastreador = RastreadorPosicao(conexao, difusor, aceleracao)
+armazem = ArmazemMapas(arquivo_mapas)
+
+def iniciar_reconexao():
+    """Chamado no __main__ de cada servidor antes do app.run"""
+    # Com debug=True o __main__ roda também no processo do reloader; só o filho abre a serial
+    if reconexao_automatica and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        supervisor.ativar(port)
+
+# Corpo das rotas, comum a este blueprint e ao servidor_asgi.py: cada rota
+# só lê a requisição, espera a serial do seu jeito (bloqueando a thread ou
+# com await) e devolve o que estas funções montam
+
+class ErroApi(Exception):
+    """Resposta de erro de uma rota ({'success': False, 'error': ...}); os servidores a convertem em JSON"""
+
+    def __init__(self, erro, codigo=200):
+        super().__init__(erro)
+        self.corpo = {'success': False, 'error': erro}
+        self.codigo = codigo
+
+NAO_CONECTADO = 'Arduino não conectado'
+SEM_STATUS = 'Tempo esgotado aguardando STATUS'
+
+@api.errorhandler(ErroApi)
+def erro_api(e):
+    return jsonify(e.corpo), e.codigo
+
+def exigir_conexao():
+    if not conexao.conectado:
+        raise ErroApi(NAO_CONECTADO)
+
+def garantir_rampa(commands):
+    """Trocas de página usam a rampa do firmware: garantir o ACEL antes (vai na frente na fila)"""
+    if any(comando_com_rampa(c) for c in commands):
+        aceleracao.garantir()
+
+def porta_da_requisicao(data):
+    """Início do /connect: (porta pedida, resposta pronta se ela já está aberta)
+
+    Porta já aberta (outra aba, outra interface): reabrir reiniciaria o
+    Arduino no meio do show; 'reset' força a reabertura.
+    """
+    global port
+    port = data.get('port', '/dev/cu.usbmodem1301')
+    if conexao.conectado and conexao.port == port and not data.get('reset'):
+        return port, conexao_aberta(reused=True)
+    return port, None
+
+def conexao_aberta(**extras):
+    """Fim do /connect, com a porta aberta (ou a caminho do banner)"""
+    if reconexao_automatica:
+        supervisor.ativar(port)
+    return dict({'success': True, 'state': conexao.estado}, **extras)
+
+def diagnostico_geral(argumentos, **extras):
+    """Corpo do /diagnostics; ?lines=n escolhe quantas linhas recentes da serial (0 omite)"""
+    quantidade = min(max(argumentos.get('lines', 20, type=int), 0), conexao.linhas.maxlen)
+    return dict(conexao.diagnostico(quantidade), supervisor=supervisor.diagnostico(),
+                aceleracao=aceleracao.diagnostico(), posicao=rastreador.diagnostico(), **extras)
+
+def comando_da_requisicao(data):
+    exigir_conexao()
+    command = data.get('command', '')
+    garantir_rampa([command])
+    return command
+
+def resposta_do_comando(cmd):
+    # id correlaciona a resposta com o comando na fila compartilhada entre requisições
+    if cmd.erro:
+        return {'success': False, 'id': cmd.id, 'error': cmd.erro, 'message': cmd.resposta}
+    return {'success': True, 'id': cmd.id, 'message': cmd.resposta}
+
+def resposta_da_parada(parada):
+    return dict(parada.como_dict(), success=parada.erro is None, error=parada.erro)
+
+def lote_da_requisicao(data):
+    exigir_conexao()
+    commands = [c for c in data.get('commands', []) if c.strip()]
+    if not commands:
+        raise ErroApi('Nenhum comando')
+    garantir_rampa(commands)
+    return commands
+
+def resposta_do_lote(cmds, inicio):
+    results = [{
+        'id': cmd.id,
+        'command': cmd.texto,
+        'success': cmd.erro is None,
+        'message': cmd.resposta,
+        'error': cmd.erro,
+        'sent_at': round(cmd.enviado_em - inicio, 4) if cmd.enviado_em else None,
+        'duration': round(cmd.concluido_em - (cmd.iniciado_em or cmd.enviado_em), 4)
+                    if cmd.concluido_em and cmd.enviado_em else None
+    } for cmd in cmds]
+    return {
+        'success': all(r['success'] for r in results),
+        'pipelined': any(cmd.encadeado for cmd in cmds),
+        'elapsed': round(time.time() - inicio, 4),
+        'results': results
+    }
+
+def submeter_trabalho(command):
+    """Movimento longo na fila de trabalhos: (corpo, 202) com o ID para acompanhar"""
+    garantir_rampa([command])
+    trabalho = trabalhos.submeter(command)
+    return {'success': True, 'job': trabalho.como_dict()}, 202
+
+def trabalho_da_requisicao(data):
+    exigir_conexao()
+    command = data.get('command', '').strip()
+    if not command:
+        raise ErroApi('Comando vazio')
+    return submeter_trabalho(command)
+
+def trabalhos_recentes():
+    return {'success': True, 'jobs': [t.como_dict() for t in trabalhos.recentes()]}
+
+def trabalho_por_id(job_id):
+    trabalho = trabalhos.obter(job_id)
+    if trabalho is None:
+        raise ErroApi('Trabalho não encontrado', 404)
+    return {'success': True, 'job': trabalho.como_dict()}
+
+def posicao_atual():
+    return {'success': True, 'position': rastreador.posicao()}
+
+def ir_para_pagina(data):
+    """Corpo do /goto: (corpo, código); página já atual não gera trabalho"""
+    exigir_conexao()
+    page = data.get('page')
+    if page == 'first':
+        page = rastreador.primeira_pagina
+    elif page == 'last':
+        page = rastreador.ultima_pagina
+    try:
+        page = int(page)
+    except (TypeError, ValueError):
+        raise ErroApi('Página inválida')
+
+    command = rastreador.traduzir_pagina(page)
+    if command is None:
+        return {'success': True, 'job': None, 'position': rastreador.posicao()}, 200
+    return submeter_trabalho(command)
+
+def etag_do_estado(estado):
+    return f"{estado['versao']}-{int(estado['valido'])}"
+
+def dados_do_status(estado):
+    return {
+        'success': True,
+        'current_page': estado['pagina_atual'],
+        'current_steps': estado['passos_atual'],
+        'total_defined': estado['total_definidas'],
+        'mapping': estado['mapeamento'],
+        'version': estado['versao'],
+        'updated_at': estado['atualizado_em'],
+        'valid': estado['valido']
+    }
+
+def dados_da_exportacao(estado):
+    return {
+        'total_paginas': estado['total_definidas'],
+        'paginas': estado['mapeamento'],
+        'ultima_atualizacao': datetime.fromtimestamp(estado['atualizado_em']).isoformat(),
+        'pagina_atual': estado['pagina_atual'],
+        'passos_atual': estado['passos_atual'],
+        'versao': estado['versao']
+    }
+
+def dispositivo_atual():
+    return identificar_dispositivo(conexao.port or port)
+
+def mapa_como_lista(mapa):
+    """Mesmo formato do 'mapping' do /status"""
+    return [{'numero': p, 'passos': mapa[p], 'definida': True} for p in sorted(mapa)]
+
+def mapas_do_dispositivo():
+    dispositivo = dispositivo_atual()
+    return {'success': True, 'device': dispositivo, 'maps': armazem.perfis(dispositivo)}
+
+def mapa_do_perfil(profile):
+    mapa = armazem.obter(dispositivo_atual(), profile)
+    if mapa is None:
+        raise ErroApi('Perfil não encontrado', 404)
+    return {'success': True, 'profile': profile, 'mapping': mapa_como_lista(mapa)}
+
+def salvar_perfil(profile, mapeamento):
+    """Guarda um 'mapping' no formato do /status (enviado pelo cliente ou o atual do Arduino)"""
+    try:
+        mapa = validar_mapa(mapa_do_status(mapeamento))
+    except (AttributeError, KeyError):
+        raise ErroApi('Mapeamento inválido')
+    except (TypeError, ValueError) as e:
+        raise ErroApi(str(e))
+    armazem.salvar(dispositivo_atual(), profile, mapa)
+    return {'success': True, 'profile': profile, 'pages': len(mapa)}
+
+def remover_perfil(profile):
+    if not armazem.remover(dispositivo_atual(), profile):
+        raise ErroApi('Perfil não encontrado', 404)
+    return {'success': True}
+
+def perfil_para_upload(profile):
+    """Mapa do perfil a levar ao Arduino, se a conexão e o firmware aceitam SETMAP"""
+    exigir_conexao()
+    if conexao.firmware not in FIRMWARES_COM_SETMAP:
+        raise ErroApi('Firmware sem SETMAP')
+    destino = armazem.obter(dispositivo_atual(), profile)
+    if destino is None:
+        raise ErroApi('Perfil não encontrado', 404)
+    return destino
+
+def diferencas_do_upload(destino):
+    """(páginas diferentes, comandos SETMAP) em relação ao mapa atual do Arduino"""
+    entradas = diferencas(destino, mapa_do_status(difusor.estado['mapeamento']))
+    return entradas, comandos_setmap(entradas)
+
+def resposta_do_upload(entradas, commands, cmds, inicio):
+    erro = next(filter(None, map(falha_setmap, cmds)), None)
+    return {
+        'success': erro is None,
+        'error': erro,
+        'changed': len(entradas),
+        'commands': commands,
+        'elapsed': round(time.time() - inicio, 4)
+    }
+
+def ajuste_do_estado(estado, argumentos):
+    """Corpo do /fit: ajuste sobre o mapeamento em memória e previsões até 'pages'"""
+    pagina_cm = argumentos.get('page_cm', comprimento_pagina_cm, type=float)
+    if not pagina_cm or pagina_cm <= 0:
+        return {'success': False, 'error': 'Comprimento de página inválido'}
+    inicio = time.perf_counter()
+    ajuste = ajustar(estado['mapeamento'], pagina_cm)
+    if ajuste is None:
+        return {'success': False, 'error': 'Marque ao menos duas páginas além da página 0',
+                'version': estado['versao']}
+    total = argumentos.get('pages', estado['total_definidas'] + paginas_previstas, type=int) or 1
+    paginas = ajuste.previsoes(estado['mapeamento'], min(max(total, 1), MAX_PAGINAS))
+    return {
+        'success': True,
+        'fit': ajuste.como_dict(),
+        'pages': paginas,
+        'version': estado['versao'],
+        'elapsed_ms': round((time.perf_counter() - inicio) * 1000, 3)
+    }
+
+def log_do_registro(argumentos):
+    """Corpo do /log: eventos depois do cursor 'after' (sem ele, os mais recentes)"""
+    cursor = argumentos.get('after', type=int)
+    limite = min(max(argumentos.get('limit', 100, type=int), 1), registro.capacidade)
+    eventos, perdidos = registro.depois(cursor, limite)
+    return {
+        'success': True,
+        'events': eventos,
+        'next': eventos[-1]['id'] if eventos else (cursor or 0),
+        'latest': registro.ultimo_id,
+        'missed': perdidos
+    }
+
+# Rotas Flask: a espera pela serial bloqueia a thread da requisição
+
+@api.route('/connect', methods=['POST'])
+def connect_arduino():
+    try:
+        porta, resposta = porta_da_requisicao(request.json)
+        if resposta is None:
+            # Retorna logo: banner, baudrate e protocolo são tratados em segundo plano
+            # e o estado da conexão chega pelo fluxo /eventos
+            conexao.conectar(porta)
+            resposta = conexao_aberta()
+        return jsonify(resposta)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@api.route('/disconnect', methods=['POST'])
+def disconnect_arduino():
+    supervisor.desativar()
+    conexao.desconectar()
+    return jsonify({'success': True})
+
+@api.route('/eventos')
+def stream_events():
+    return Response(difusor.fluxo_sse(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+@api.route('/diagnostics')
+def diagnostics():
+    return jsonify(diagnostico_geral(request.args))
+
+@api.route('/command', methods=['POST'])
+def send_command():
+    command = comando_da_requisicao(request.json)
+    # A thread serial envia o comando e devolve assim que a linha final chega
+    return jsonify(resposta_do_comando(conexao.enviar(command)))
+
+@api.route('/stop', methods=['POST'])
+def stop_motor():
+    """Parada de emergência: fura a fila, interrompe o movimento e cancela os trabalhos pendentes"""
+    recebida_em = time.perf_counter()  # Início da latência medida (requisição → porta → confirmação)
+    exigir_conexao()
+    return jsonify(resposta_da_parada(conexao.parar(recebida_em)))
+
+@api.route('/batch', methods=['POST'])
+def send_batch():
+    """Lista de comandos em uma requisição; resultados e tempos por comando"""
+    data = request.json
+    commands = lote_da_requisicao(data)
+    inicio = time.time()
+    cmds = conexao.enviar_lote(commands, timeout=data.get('timeout'))
+    return jsonify(resposta_do_lote(cmds, inicio))
+
+@api.route('/jobs', methods=['POST'])
+def submit_job():
+    """Movimento longo: retorna o ID na hora; andamento em /jobs/<id> e em /eventos"""
+    corpo, codigo = trabalho_da_requisicao(request.json)
+    return jsonify(corpo), codigo
+
+@api.route('/jobs')
+def list_jobs():
+    return jsonify(trabalhos_recentes())
+
+@api.route('/jobs/<int:job_id>')
+def get_job(job_id):
+    return jsonify(trabalho_por_id(job_id))
+
+@api.route('/position')
+def get_position():
+    """Posição autoritativa do servidor (extrapolada durante movimentos)"""
+    return jsonify(posicao_atual())
+
+@api.route('/goto', methods=['POST'])
+def goto_page():
+    """Página absoluta ('first', 'last' ou número) traduzida no servidor, sem STATUS extra"""
+    corpo, codigo = ir_para_pagina(request.json)
+    return jsonify(corpo), codigo
+
+def status_response(corpo, estado):
+    """Resposta JSON com ETag da versão do cache (304 se o cliente já a tem)"""
+    response = jsonify(corpo)
+    response.set_etag(etag_do_estado(estado))
+    return response.make_conditional(request)
+
+@api.route('/status')
+def get_status():
+    exigir_conexao()
+    # Responde da memória; só aguarda a serial antes do primeiro STATUS
+    if not difusor.aguardar_carregado(timeout=2.5):
+        raise ErroApi(SEM_STATUS)
+    estado = difusor.estado
+    return status_response(dados_do_status(estado), estado)
+
+@api.route('/export')
+def export_data():
+    if not conexao.conectado:
+        return jsonify({'error': NAO_CONECTADO})
+    if not difusor.aguardar_carregado(timeout=2.5):
+        return jsonify({'error': 'Não foi possível obter dados'})
+    estado = difusor.estado
+    return status_response(dados_da_exportacao(estado), estado)
+
+@api.route('/maps')
+def list_maps():
+    """Perfis de papel guardados para o dispositivo (sem serial)"""
+    return jsonify(mapas_do_dispositivo())
+
+@api.route('/maps/<profile>')
+def get_map(profile):
+    return jsonify(mapa_do_perfil(profile))
+
+@api.route('/maps/<profile>', methods=['POST'])
+def save_map(profile):
+    """Guarda o mapa enviado ('mapping') ou, sem ele, o mapa atual do Arduino"""
+    data = request.get_json(silent=True) or {}
+    if 'mapping' in data:
+        return jsonify(salvar_perfil(profile, data['mapping']))
+    exigir_conexao()
+    if not difusor.aguardar_valido(timeout=2.5):
+        raise ErroApi(SEM_STATUS)
+    return jsonify(salvar_perfil(profile, difusor.estado['mapeamento']))
+
+@api.route('/maps/<profile>', methods=['DELETE'])
+def delete_map(profile):
+    return jsonify(remover_perfil(profile))
+
+@api.route('/maps/<profile>/upload', methods=['POST'])
+def upload_map(profile):
+    """Leva o perfil ao Arduino enviando só as páginas diferentes (gravadas na EEPROM)"""
+    destino = perfil_para_upload(profile)
+    # O diff parte do mapa atual do Arduino: exige um STATUS depois do último MARK
+    if not difusor.aguardar_valido(timeout=2.5):
+        raise ErroApi(SEM_STATUS)
+    entradas, commands = diferencas_do_upload(destino)
+    inicio = time.time()
+    cmds = conexao.enviar_lote(commands) if commands else []
+    return jsonify(resposta_do_upload(entradas, commands, cmds, inicio))
+
+@api.route('/fit')
+def fit_geometry():
+    """Núcleo e espessura ajustados às páginas marcadas e passos previstos das demais (sem serial)"""
+    exigir_conexao()
+    if not difusor.aguardar_carregado(timeout=2.5):
+        raise ErroApi(SEM_STATUS)
+    return jsonify(ajuste_do_estado(difusor.estado, request.args))
+
+@api.route('/log')
+def get_log():
+    """Registro de eventos em memória constante, lido por cursor (?after=id&limit=n)"""
+    return jsonify(log_do_registro(request.args))
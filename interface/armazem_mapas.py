@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Armazém de Mapas - TV Alice
+Mapas de páginas (página → passos acumulados) guardados no host em
+SQLite, por dispositivo e perfil de papel. Consultas não tocam a serial;
+para trocar de rolo, só as entradas diferentes do mapa atual do Arduino
+vão pela porta (SETMAP:P=N,...), e o firmware grava só essas na EEPROM
+"""
+
+import sqlite3
+import threading
+import time
+
+from serial.tools import list_ports
+
+# Linha de comando cabe no buffer de recepção do calibracao.ino (64 bytes com o '\n')
+TAMANHO_MAXIMO_LINHA = 63
+
+# Entrada que desmarca a página no SETMAP
+DESMARCADA = '-'
+
+# Firmwares que entendem SETMAP e seus limites (páginas e int de 16 bits do AVR)
+FIRMWARES_COM_SETMAP = ('calibracao',)
+MAX_PAGINAS = 30
+MAX_PASSOS = 32767
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mapas (
+    dispositivo TEXT NOT NULL,
+    perfil TEXT NOT NULL,
+    atualizado_em REAL NOT NULL,
+    PRIMARY KEY (dispositivo, perfil)
+);
+CREATE TABLE IF NOT EXISTS paginas (
+    dispositivo TEXT NOT NULL,
+    perfil TEXT NOT NULL,
+    numero INTEGER NOT NULL,
+    passos INTEGER NOT NULL,
+    PRIMARY KEY (dispositivo, perfil, numero),
+    FOREIGN KEY (dispositivo, perfil) REFERENCES mapas ON DELETE CASCADE
+);
+"""
+
+
+def identificar_dispositivo(port):
+    """Número de série USB da placa (segue a placa entre portas); sem ele, o nome da porta"""
+    for info in list_ports.comports():
+        if info.device == port and info.serial_number:
+            return info.serial_number
+    return port
+
+
+def validar_mapa(mapa):
+    """{página: passos} com inteiros dentro dos limites do firmware (ValueError se não)"""
+    validado = {}
+    for pagina, passos in mapa.items():
+        pagina, passos = int(pagina), int(passos)
+        if not 0 <= pagina < MAX_PAGINAS or not 0 <= passos <= MAX_PASSOS:
+            raise ValueError(f'Página {pagina} com {passos} passos fora dos limites do firmware')
+        validado[pagina] = passos
+    return validado
+
+
+def mapa_do_status(mapeamento):
+    """{página: passos} das páginas definidas no mapeamento do STATUS"""
+    return {p['numero']: p['passos'] for p in mapeamento if p.get('definida', True)}
+
+
+def diferencas(destino, atual):
+    """Entradas a enviar para o Arduino sair de 'atual' e chegar em 'destino'
+
+    Retorna [(página, passos ou None)], em ordem de página; None desmarca
+    uma página definida no Arduino que não existe no destino.
+    """
+    paginas = sorted(set(destino) | set(atual))
+    return [(p, destino.get(p)) for p in paginas if destino.get(p) != atual.get(p)]
+
+
+def comandos_setmap(entradas, tamanho_maximo=TAMANHO_MAXIMO_LINHA):
+    """Agrupa as entradas no menor número de linhas SETMAP que cabem no buffer do firmware"""
+    comandos, atual = [], []
+    for pagina, passos in entradas:
+        item = f"{pagina}={DESMARCADA if passos is None else passos}"
+        if atual and len('SETMAP:' + ','.join(atual + [item])) > tamanho_maximo:
+            comandos.append('SETMAP:' + ','.join(atual))
+            atual = []
+        atual.append(item)
+    if atual:
+        comandos.append('SETMAP:' + ','.join(atual))
+    return comandos
+
+
+def falha_setmap(cmd):
+    """Erro de um comando SETMAP, ou None se o firmware confirmou
+
+    A confirmação nem sempre é a primeira linha: numa EEPROM ainda sem mapa
+    o firmware grava o bloco inteiro e avisa antes de responder.
+    """
+    if cmd.erro:
+        return cmd.erro
+    if any(linha.startswith('>>> SETMAP:') for linha in cmd.linhas):
+        return None
+    return cmd.resposta
+
+
+class ArmazemMapas:
+    """Mapas por (dispositivo, perfil de papel) num arquivo SQLite
+
+    O arquivo só é criado no primeiro uso: importar o servidor não escreve
+    nada no disco.
+    """
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self._lock = threading.Lock()  # Uma conexão compartilhada entre as threads do servidor
+        self._conexao = None
+
+    @property
+    def _db(self):
+        """Conexão aberta na primeira consulta (chamar com o lock)"""
+        if self._conexao is None:
+            self._conexao = sqlite3.connect(self.arquivo, check_same_thread=False)
+            self._conexao.execute('PRAGMA foreign_keys = ON')
+            self._conexao.executescript(ESQUEMA)
+        return self._conexao
+
+    def perfis(self, dispositivo):
+        """Perfis guardados para o dispositivo, com número de páginas e data"""
+        with self._lock:
+            linhas = self._db.execute(
+                'SELECT m.perfil, m.atualizado_em, COUNT(p.numero) FROM mapas m '
+                'LEFT JOIN paginas p ON p.dispositivo = m.dispositivo AND p.perfil = m.perfil '
+                'WHERE m.dispositivo = ? GROUP BY m.perfil ORDER BY m.perfil', (dispositivo,)).fetchall()
+        return [{'perfil': perfil, 'atualizado_em': atualizado_em, 'paginas': total}
+                for perfil, atualizado_em, total in linhas]
+
+    def obter(self, dispositivo, perfil):
+        """{página: passos} do perfil, ou None se não existe"""
+        with self._lock:
+            if self._db.execute('SELECT 1 FROM mapas WHERE dispositivo = ? AND perfil = ?',
+                                (dispositivo, perfil)).fetchone() is None:
+                return None
+            linhas = self._db.execute('SELECT numero, passos FROM paginas WHERE dispositivo = ? AND perfil = ?',
+                                      (dispositivo, perfil)).fetchall()
+        return dict(linhas)
+
+    def salvar(self, dispositivo, perfil, mapa):
+        """Substitui o mapa do perfil por {página: passos}"""
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO mapas VALUES (?, ?, ?)', (dispositivo, perfil, time.time()))
+            self._db.execute('DELETE FROM paginas WHERE dispositivo = ? AND perfil = ?', (dispositivo, perfil))
+            self._db.executemany('INSERT INTO paginas VALUES (?, ?, ?, ?)',
+                                 [(dispositivo, perfil, int(p), int(s)) for p, s in mapa.items()])
+
+    def remover(self, dispositivo, perfil):
+        with self._lock, self._db:
+            return self._db.execute('DELETE FROM mapas WHERE dispositivo = ? AND perfil = ?',
+                                    (dispositivo, perfil)).rowcount > 0
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Parser do Firmware - TV Alice
+Compara a raspagem antiga (cada cliente - difusor, rastreador - rodando
+todas as regex em cada linha, após dividir os bytes com partition) com o
+ParserFirmware incremental: um único parser alimentado em pedaços de
+bytes, como a thread serial os lê, e eventos aplicados por cliente. Roda
+sobre uma transcrição grande (gravada com --arquivo ou sintética)
+"""
+
+import argparse
+import random
+import time
+
+from parser_firmware import (ParserFirmware, estado_inicial, aplicar_evento, RE_PAGINA_ATUAL,
+                             RE_PASSOS, RE_TOTAL_DEFINIDAS, RE_LINHA_TABELA, RE_ROLO, RE_PAGINA_TOTAL,
+                             RE_VELOCIDADE, RE_MOTOR, RE_PROXIMA_PAGINA, RE_INDO_PARA_PAGINA, RE_HOME,
+                             RE_INICIO_STATUS, RE_RODAPE_STATUS)
+
+
+def transcricao_sintetica(movimentos=2000, semente=1):
+    """Saída típica dos firmwares: STATUS, movimentos com progresso, rolos e IR"""
+    aleatorio = random.Random(semente)
+    linhas = []
+    passos = 0
+    for i in range(movimentos):
+        n = aleatorio.randint(50, 800)
+        linhas.append(f">>> Indo para página {i % 30} ({n} passos)")
+        linhas.append(f">>> Movendo {n} passos (frente)")
+        for k in range(10, n + 1, 10):
+            linhas.append(f"  [{k}/{n}] Passos acumulados: {passos + k}")
+        passos += n
+        linhas.append(f">>> Concluído. Passos acumulados: {passos}")
+        if i % 5 == 0:
+            linhas += ["--- STATUS ---", f"Página atual: {i % 30}", f"Passos acumulados: {passos}",
+                       "Total de páginas definidas: 30", "", "Mapeamento:", "Pág | Passos | Delta | OK"]
+            linhas += [f"  {p}  | {p * 420}        | 420       |  ✓" for p in range(30)]
+            linhas.append("-------------")
+        if i % 7 == 0:
+            x = aleatorio.uniform(0, 150)
+            linhas.append(f"Rolo X: {x:.1f}cm | Diâmetro: {41 + x / 3:.1f}mm")
+            linhas.append(f"Rolo Y: {150 - x:.1f}cm | Diâmetro: {91 - x / 3:.1f}mm")
+            linhas.append(f"Página: {i % 7 + 1}/7")
+        if i % 11 == 0:
+            linhas.append("[IR] Comando: 0x43 (DIREITA)")
+    return ("\r\n".join(linhas) + "\r\n").encode()
+
+
+class RaspagemAntiga:
+    """Réplica do parser por linha anterior: copia o estado e testa todas as regex"""
+
+    def __init__(self):
+        self.estado = estado_inicial()
+        self._tabela = None
+
+    def raspar_linha(self, linha):
+        antes = dict(self.estado)
+        e = self.estado
+        if RE_INICIO_STATUS.match(linha):
+            self._tabela = []
+            return False
+        if RE_RODAPE_STATUS.match(linha):
+            if self._tabela is not None:
+                e['mapeamento'], self._tabela = self._tabela, None
+            return e != antes
+        m = RE_LINHA_TABELA.match(linha)
+        if m:
+            if self._tabela is not None and m.group(2) != '-':
+                self._tabela.append({'numero': int(m.group(1)), 'passos': int(m.group(2)),
+                                     'definida': m.group(4) == '✓'})
+            return False
+        m = RE_PAGINA_ATUAL.match(linha)
+        if m:
+            e['pagina_atual'] = int(m.group(1))
+        m = RE_PASSOS.search(linha)
+        if m:
+            e['passos_atual'] = int(m.group(1))
+        m = RE_TOTAL_DEFINIDAS.match(linha)
+        if m:
+            e['total_definidas'] = int(m.group(1))
+        m = RE_ROLO.search(linha)
+        if m:
+            e['rolo_' + m.group(1).lower()] = {'comprimento_cm': float(m.group(2)),
+                                               'diametro_mm': float(m.group(3))}
+        m = RE_PAGINA_TOTAL.search(linha)
+        if m:
+            e['pagina_atual'], e['total_paginas'] = int(m.group(1)), int(m.group(2))
+        m = RE_VELOCIDADE.match(linha)
+        if m:
+            e['velocidade_us'] = int(m.group(1))
+        m = RE_MOTOR.match(linha)
+        if m:
+            e['movendo'] = m.group(1) == 'MOVENDO'
+        m = RE_PROXIMA_PAGINA.match(linha) or RE_INDO_PARA_PAGINA.match(linha)
+        if m:
+            e['pagina_atual'] = int(m.group(1))
+        if RE_HOME.match(linha):
+            e['pagina_atual'] = 0
+        return e != antes
+
+
+def raspar(dados, pedaco, clientes):
+    """Abordagem antiga: partition linha a linha e uma raspagem completa por cliente"""
+    raspagens = [RaspagemAntiga() for _ in range(clientes)]
+    pendente = bytearray()
+    for inicio in range(0, len(dados), pedaco):
+        pendente.extend(dados[inicio:inicio + pedaco])
+        while b'\n' in pendente:
+            bruta, _, resto = pendente.partition(b'\n')
+            pendente = bytearray(resto)
+            linha = bruta.decode('utf-8', errors='ignore').strip()
+            if linha:
+                for raspagem in raspagens:
+                    raspagem.raspar_linha(linha)
+    return raspagens[0].estado
+
+
+def incremental(dados, pedaco, clientes):
+    """Um ParserFirmware alimentado com pedaços de 'pedaco' bytes; cada cliente aplica os eventos"""
+    parser = ParserFirmware()
+    estados = [estado_inicial() for _ in range(clientes)]
+    eventos = 0
+    for inicio in range(0, len(dados), pedaco):
+        for _, evs in parser.alimentar(dados[inicio:inicio + pedaco]):
+            eventos += len(evs)
+            for evento in evs:
+                for estado in estados:
+                    aplicar_evento(estado, evento)
+    return eventos, parser
+
+
+def cronometrar(funcao, repeticoes):
+    """Menor tempo (s) entre as repetições"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do parser incremental do firmware')
+    parser.add_argument('--arquivo', help='Transcrição gravada da serial (bytes crus)')
+    parser.add_argument('--movimentos', type=int, default=2000, help='Tamanho da transcrição sintética')
+    parser.add_argument('--pedaco', type=int, default=64, help='Bytes por leitura da serial')
+    parser.add_argument('--clientes', type=int, default=2, help='Consumidores do estado (difusor, rastreador)')
+    parser.add_argument('--salvar', help='Grava a transcrição sintética neste arquivo')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.arquivo:
+        with open(args.arquivo, 'rb') as f:
+            dados = f.read()
+    else:
+        dados = transcricao_sintetica(args.movimentos)
+        if args.salvar:
+            with open(args.salvar, 'wb') as f:
+                f.write(dados)
+
+    eventos, resultado = incremental(dados, args.pedaco, args.clientes)
+    linhas = resultado.linhas
+    # Mesmo estado final antes de medir
+    if raspar(dados, args.pedaco, 1) != resultado.estado:
+        raise SystemExit("Raspagem e parser incremental divergem nesta transcrição")
+    t_raspar = cronometrar(lambda: raspar(dados, args.pedaco, args.clientes), args.repeticoes)
+    t_incremental = cronometrar(lambda: incremental(dados, args.pedaco, args.clientes), args.repeticoes)
+
+    print("=" * 60)
+    print("BENCHMARK PARSER DO FIRMWARE - TV Alice")
+    print("=" * 60)
+    print(f"Transcrição: {len(dados) / 1024:,.0f} KiB, {linhas:,} linhas, {eventos:,} eventos")
+    print(f"Leituras de {args.pedaco} bytes, {args.clientes} cliente(s) do estado")
+    print(f"Raspagem por cliente: {t_raspar * 1000:8.1f} ms ({linhas / t_raspar:,.0f} linhas/s)")
+    print(f"Parser incremental:   {t_incremental * 1000:8.1f} ms ({linhas / t_incremental:,.0f} linhas/s)")
+    print(f"Ganho: {t_raspar / t_incremental:.1f}x")
+    print(f"Estado final: página {resultado.estado['pagina_atual']}, "
+          f"{resultado.estado['passos_atual']} passos, {len(resultado.estado['mapeamento'])} páginas mapeadas")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
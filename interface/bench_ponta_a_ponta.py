@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+Benchmark Ponta a Ponta - TV Alice
+Mede o caminho navegador → servidor → serial → firmware com as
+interfaces rodando de verdade (processos HTTP) contra o emulador de
+firmware numa pty: /connect (até o link ficar pronto), /command, cliques
+de página, /status, /export e N observadores do /eventos abertos ao mesmo
+tempo. Relata p50/p95/p99, vazão com N clientes simultâneos e bytes na
+serial por operação, e grava tudo em JSON para comparar revisões
+(--comparar). Confere também o envio de um perfil de papel a um Arduino
+com a EEPROM vazia
+"""
+
+import argparse
+import http.client
+import json
+import os
+import selectors
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+APPS = {
+    'calibracao': 5101,
+    'interface_tv_alice': 5100,
+    'servidor_tv_alice': 5102,
+    'servidor_asgi': 5103,
+}
+
+# Argumentos do app.run além de host e porta (Quart não tem threaded)
+ARGUMENTOS_RUN = {'servidor_asgi': 'use_reloader=False'}
+
+# Duas páginas marcadas para os cliques (calibracao.ino, 420 passos por página)
+PREPARO_PAGINAS = ('RESET', 'F:420', 'MARK', 'F:420', 'MARK', 'GOTO:0')
+
+# Perfil enviado a um emulador novo, sem mapa na EEPROM
+PERFIL_VERIFICACAO = 'bench-eeprom-vazia'
+MAPA_VERIFICACAO = [{'numero': p, 'passos': p * 420} for p in range(6)]
+
+
+def percentis(amostras):
+    """p50/p95/p99, média e extremos (ms) de uma lista de latências (s)"""
+    if not amostras:
+        return None
+    ms = sorted(a * 1000 for a in amostras)
+    cortes = statistics.quantiles(ms, n=100, method='inclusive') if len(ms) > 1 else [ms[0]] * 99
+    return {
+        'n': len(ms),
+        'p50_ms': round(cortes[49], 2),
+        'p95_ms': round(cortes[94], 2),
+        'p99_ms': round(cortes[98], 2),
+        'media_ms': round(statistics.fmean(ms), 2),
+        'min_ms': round(ms[0], 2),
+        'max_ms': round(ms[-1], 2),
+    }
+
+
+class ClienteHttp:
+    """Requisições JSON a uma interface em localhost (uma conexão por requisição)"""
+
+    def __init__(self, porta, timeout=60.0):
+        self.porta = porta
+        self.timeout = timeout
+
+    def requisitar(self, metodo, rota, corpo=None):
+        """(status, json ou None, segundos)"""
+        conexao = http.client.HTTPConnection('127.0.0.1', self.porta, timeout=self.timeout)
+        dados = json.dumps(corpo).encode() if corpo is not None else None
+        cabecalhos = {'Content-Type': 'application/json'} if dados else {}
+        inicio = time.perf_counter()
+        try:
+            conexao.request(metodo, rota, body=dados, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            conteudo = resposta.read()
+            duracao = time.perf_counter() - inicio
+        finally:
+            conexao.close()
+        try:
+            return resposta.status, json.loads(conteudo), duracao
+        except ValueError:
+            return resposta.status, None, duracao
+
+    def get(self, rota):
+        return self.requisitar('GET', rota)
+
+    def post(self, rota, corpo=None):
+        return self.requisitar('POST', rota, corpo if corpo is not None else {})
+
+    def diagnostico(self):
+        return self.get('/diagnostics')[1] or {}
+
+    def bytes_serial(self):
+        """(tx, rx) somados em todas as velocidades usadas nesta conexão"""
+        taxas = self.diagnostico().get('taxas', {}).values()
+        return sum(t['bytes_tx'] for t in taxas), sum(t['bytes_rx'] for t in taxas)
+
+
+class Processo:
+    """Subprocesso Python no diretório da interface, encerrado ao sair do with"""
+
+    def __init__(self, argumentos):
+        self.argumentos = argumentos
+        self._processo = None
+
+    def __enter__(self):
+        self._processo = subprocess.Popen([sys.executable] + self.argumentos, cwd=DIRETORIO,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return self
+
+    def __exit__(self, *excecao):
+        self._processo.terminate()
+        try:
+            self._processo.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._processo.kill()
+
+    def vivo(self):
+        return self._processo.poll() is None
+
+
+def aguardar(condicao, timeout, intervalo=0.05):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        if condicao():
+            return True
+        time.sleep(intervalo)
+    return False
+
+
+def app_respondendo(cliente):
+    try:
+        return cliente.get('/diagnostics')[0] == 200
+    except OSError:
+        return False
+
+
+def aguardar_pronto(cliente, timeout=15.0):
+    """Segundos até /diagnostics informar o link pronto (None se não ficou)"""
+    inicio = time.perf_counter()
+    if aguardar(lambda: cliente.diagnostico().get('estado') == 'pronto', timeout, intervalo=0.01):
+        return time.perf_counter() - inicio
+    return None
+
+
+def medir_conexao(cliente, porta_serial, repeticoes):
+    """/connect: resposta da rota e tempo até o link ficar pronto (boot + negociação)"""
+    respostas, prontos, falhas = [], [], 0
+    for _ in range(repeticoes):
+        cliente.post('/disconnect')
+        time.sleep(0.2)
+        _, corpo, duracao = cliente.post('/connect', {'port': porta_serial})
+        respostas.append(duracao)
+        ate_pronto = aguardar_pronto(cliente) if corpo and corpo.get('success') else None
+        if ate_pronto is None:
+            falhas += 1
+        else:
+            prontos.append(duracao + ate_pronto)
+    diag = cliente.diagnostico()
+    return {
+        'resposta': percentis(respostas),
+        'ate_pronto': percentis(prontos),
+        'falhas': falhas,
+        'firmware': diag.get('firmware'),
+        'baudrate': diag.get('baudrate_atual'),
+        'protocolo': diag.get('protocolo'),
+    }
+
+
+class Observadores:
+    """N conexões /eventos abertas, lidas por uma única thread (selectors)"""
+
+    def __init__(self, porta, quantidade):
+        self.porta = porta
+        self.quantidade = quantidade
+        self.recebidos = [0] * quantidade   # Mensagens 'data:' por conexão
+        self.ultima = [None] * quantidade   # perf_counter da última mensagem
+        self.encerradas = 0
+        self._seletor = selectors.DefaultSelector()
+        self._ativo = False
+        self._thread = None
+
+    def __enter__(self):
+        requisicao = f"GET /eventos HTTP/1.1\r\nHost: 127.0.0.1:{self.porta}\r\n\r\n".encode()
+        for i in range(self.quantidade):
+            sock = socket.create_connection(('127.0.0.1', self.porta), timeout=10)
+            sock.sendall(requisicao)
+            sock.setblocking(False)
+            self._seletor.register(sock, selectors.EVENT_READ, i)
+        self._ativo = True
+        self._thread = threading.Thread(target=self._ler, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *excecao):
+        self._ativo = False
+        self._thread.join()
+        for chave in list(self._seletor.get_map().values()):
+            chave.fileobj.close()
+        self._seletor.close()
+
+    def _ler(self):
+        while self._ativo:
+            for chave, _ in self._seletor.select(timeout=0.1):
+                try:
+                    dados = chave.fileobj.recv(65536)
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError:
+                    dados = b''
+                if not dados:
+                    self._seletor.unregister(chave.fileobj)
+                    chave.fileobj.close()
+                    self.encerradas += 1
+                elif b'data:' in dados:
+                    self.recebidos[chave.data] += dados.count(b'data:')
+                    self.ultima[chave.data] = time.perf_counter()
+
+    def abertas(self):
+        """Conexões que já receberam o estado inicial"""
+        return sum(1 for n in self.recebidos if n)
+
+    def entregas_desde(self, inicio):
+        """Atraso (s) até cada conexão receber algo depois de 'inicio'"""
+        return [u - inicio for u in self.ultima if u is not None and u >= inicio]
+
+
+def medir_observadores(cliente, quantidade, args):
+    """/eventos com N observadores: entrega de uma mudança de estado e /status sob essa carga"""
+    try:
+        with Observadores(cliente.porta, quantidade) as observadores:
+            aguardar(lambda: observadores.abertas() == quantidade, 15.0)
+            abertas = observadores.abertas()
+            # Um passo muda a posição: o difusor publica o novo estado a todos
+            inicio = time.perf_counter()
+            cliente.post('/command', {'command': 'F:1'})
+            aguardar(lambda: len(observadores.entregas_desde(inicio)) >= abertas, 10.0, intervalo=0.01)
+            entregas = observadores.entregas_desde(inicio)
+            clientes = max(args.clientes)
+            status = medir_rota(cliente, operacao_get('/status'), clientes, max(1, args.requisicoes // clientes))
+    except OSError as e:
+        return {'observadores': quantidade, 'erro': f'Conexões recusadas: {e}'}
+    return {
+        'observadores': quantidade,
+        'abertas': abertas,
+        'encerradas': observadores.encerradas,
+        'entrega': percentis(entregas),
+        'entregues': len(entregas),
+        'status': status,
+    }
+
+
+def medir_rota(cliente, operacao, clientes, por_cliente):
+    """Roda operacao(cliente, i) em 'clientes' threads; latências, vazão e bytes por operação"""
+    latencias, erros = [], []
+    lock = threading.Lock()
+
+    def trabalhar(indice):
+        for i in range(por_cliente):
+            try:
+                ok, duracao, erro = operacao(cliente, indice * por_cliente + i)
+            except OSError as e:
+                ok, duracao, erro = False, None, str(e)
+            with lock:
+                if ok:
+                    latencias.append(duracao)
+                else:
+                    erros.append(erro)
+
+    tx0, rx0 = cliente.bytes_serial()
+    threads = [threading.Thread(target=trabalhar, args=(i,)) for i in range(clientes)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - inicio
+    tx1, rx1 = cliente.bytes_serial()
+    feitas = len(latencias) + len(erros)
+    return {
+        'clientes': clientes,
+        'latencia': percentis(latencias),
+        'vazao_req_s': round(len(latencias) / total, 2) if total else None,
+        'erros': len(erros),
+        'primeiro_erro': erros[0] if erros else None,
+        'bytes_tx_por_op': round((tx1 - tx0) / feitas, 1) if feitas else None,
+        'bytes_rx_por_op': round((rx1 - rx0) / feitas, 1) if feitas else None,
+    }
+
+
+def operacao_comando(comando):
+    def operacao(cliente, _):
+        status, corpo, duracao = cliente.post('/command', {'command': comando})
+        ok = status == 200 and corpo is not None and corpo.get('success')
+        return ok, duracao, None if ok else (corpo or {}).get('error', f'HTTP {status}')
+    return operacao
+
+
+def operacao_pagina(cliente, i):
+    """Clique de página: alterna entre as páginas 1 e 0 marcadas no preparo"""
+    return operacao_comando(f'GOTO:{1 - i % 2}')(cliente, i)
+
+
+def operacao_get(rota):
+    def operacao(cliente, _):
+        status, corpo, duracao = cliente.get(rota)
+        ok = status in (200, 304) and corpo is not None and 'error' not in corpo
+        return ok, duracao, None if ok else (corpo or {}).get('error', f'HTTP {status}')
+    return operacao
+
+
+def rota_existe(cliente, rota):
+    return cliente.get(rota)[0] != 404
+
+
+def medir_app(modulo, porta_http, porta_serial, args, temporario):
+    """Sobe a interface num processo e mede todos os cenários contra o emulador"""
+    cliente = ClienteHttp(porta_http)
+    extra = ARGUMENTOS_RUN.get(modulo, 'threaded=True')
+    codigo = f"import {modulo}; {modulo}.app.run(host='127.0.0.1', port={porta_http}, {extra})"
+    with Processo(['-c', codigo]) as processo:
+        if not aguardar(lambda: app_respondendo(cliente), 15.0):
+            return {'erro': 'Interface não subiu' if processo.vivo() else 'Interface encerrou ao iniciar'}
+        resultado = {'connect': medir_conexao(cliente, porta_serial, args.conexoes)}
+        if cliente.diagnostico().get('estado') != 'pronto':
+            return dict(resultado, erro='Link não ficou pronto')
+
+        cenarios = {'command': operacao_comando(args.comando)}
+        if resultado['connect']['firmware'] == 'calibracao':
+            for comando in PREPARO_PAGINAS:
+                cliente.post('/command', {'command': comando})
+            cenarios['pagina'] = operacao_pagina
+        for rota in ('/status', '/export'):
+            if rota_existe(cliente, rota):
+                cenarios[rota.strip('/')] = operacao_get(rota)
+            else:
+                resultado[rota.strip('/')] = {'erro': 'Rota ausente nesta interface'}
+
+        for nome, operacao in cenarios.items():
+            por_cliente = args.cliques if nome == 'pagina' else args.requisicoes
+            resultado[nome] = [medir_rota(cliente, operacao, c, max(1, por_cliente // c))
+                               for c in args.clientes]
+        resultado['observadores'] = [medir_observadores(cliente, n, args) for n in args.observadores if n]
+        cliente.post('/disconnect')
+        if resultado['connect']['firmware'] == 'calibracao' and rota_existe(cliente, '/maps'):
+            resultado['mapas'] = verificar_upload_eeprom_vazia(cliente, modulo, temporario)
+    return resultado
+
+
+def verificar_upload_eeprom_vazia(cliente, modulo, temporario):
+    """Primeiro SETMAP numa EEPROM vazia: o firmware grava o bloco inteiro antes de confirmar"""
+    link = os.path.join(temporario, f'tty-eeprom-vazia-{modulo}')
+    arquivo = os.path.join(temporario, f'eeprom-vazia-{modulo}.json')
+    emulador = ['emulador_firmware.py', '--firmware', 'calibracao', '--link', link,
+                '--escala-tempo', '0', '--eeprom', arquivo]
+    with Processo(emulador):
+        if not aguardar(lambda: os.path.exists(link), 10.0):
+            return {'sucesso': False, 'erro': 'Emulador não criou a porta'}
+        _, corpo, _ = cliente.post('/connect', {'port': link})
+        if not corpo or not corpo.get('success') or aguardar_pronto(cliente) is None:
+            return {'sucesso': False, 'erro': 'Link não ficou pronto'}
+        cliente.post(f'/maps/{PERFIL_VERIFICACAO}', {'mapping': MAPA_VERIFICACAO})
+        _, corpo, duracao = cliente.post(f'/maps/{PERFIL_VERIFICACAO}/upload')
+        cliente.requisitar('DELETE', f'/maps/{PERFIL_VERIFICACAO}')
+        cliente.post('/disconnect')
+    corpo = corpo or {}
+    eeprom = {}
+    if os.path.exists(arquivo):
+        with open(arquivo) as f:
+            eeprom = json.load(f)
+    gravada = eeprom.get('total') == len(MAPA_VERIFICACAO)
+    erro = corpo.get('error') or (None if gravada else 'Mapa não gravado na EEPROM')
+    return {
+        'sucesso': bool(corpo.get('success')) and gravada,
+        'erro': erro,
+        'linhas': len(corpo.get('commands') or []),
+        'duracao_ms': round(duracao * 1000, 1),
+    }
+
+
+def revisao_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRETORIO, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def imprimir(resultados):
+    for modulo, resultado in resultados['apps'].items():
+        print(f"\n{modulo}")
+        print("-" * 60)
+        if 'erro' in resultado:
+            print(f"  ERRO: {resultado['erro']}")
+        conexao = resultado.get('connect')
+        if conexao:
+            pronto = conexao['ate_pronto'] or {}
+            print(f"  connect      resposta p50 {conexao['resposta']['p50_ms']:8.1f} ms | "
+                  f"até pronto p50 {pronto.get('p50_ms', float('nan')):8.1f} ms "
+                  f"({conexao['firmware']}, {conexao['baudrate']} baud, {conexao['protocolo']})")
+        for nome in ('command', 'pagina', 'status', 'export'):
+            medidas = resultado.get(nome)
+            if isinstance(medidas, dict):
+                print(f"  {nome:12} {medidas['erro']}")
+                continue
+            for m in medidas or []:
+                lat = m['latencia'] or {}
+                print(f"  {nome:12} {m['clientes']:3} cli | p50 {lat.get('p50_ms', float('nan')):8.1f} "
+                      f"p95 {lat.get('p95_ms', float('nan')):8.1f} p99 {lat.get('p99_ms', float('nan')):8.1f} ms | "
+                      f"{m['vazao_req_s']:7.1f} req/s | serial {m['bytes_tx_por_op']} B tx, "
+                      f"{m['bytes_rx_por_op']} B rx por op" + (f" | {m['erros']} erros" if m['erros'] else ""))
+        for m in resultado.get('observadores', []):
+            if 'erro' in m:
+                print(f"  observadores {m['observadores']:4} | {m['erro']}")
+                continue
+            entrega, lat = m['entrega'] or {}, m['status']['latencia'] or {}
+            print(f"  observadores {m['observadores']:4} | abertas {m['abertas']}, entregues {m['entregues']} | "
+                  f"entrega p50 {entrega.get('p50_ms', float('nan')):7.1f} p99 {entrega.get('p99_ms', float('nan')):7.1f} ms"
+                  f" | status {m['status']['clientes']} cli p50 {lat.get('p50_ms', float('nan')):6.1f} "
+                  f"p99 {lat.get('p99_ms', float('nan')):6.1f} ms")
+        mapas = resultado.get('mapas')
+        if mapas:
+            situacao = (f"ok ({mapas['linhas']} linha(s) SETMAP, {mapas['duracao_ms']:.1f} ms)"
+                        if mapas['sucesso'] else f"FALHOU: {mapas['erro']}")
+            print(f"  mapas        upload com EEPROM vazia {situacao}")
+
+
+def comparar(atual, anterior):
+    """Variação do p50/p95 e da vazão em relação a um resultado gravado"""
+    print(f"\nComparação com {anterior.get('revisao')} ({anterior.get('data')})")
+    print("-" * 60)
+    for modulo, resultado in atual['apps'].items():
+        base = anterior.get('apps', {}).get(modulo, {})
+        for nome, medidas in resultado.items():
+            if nome == 'observadores' or not isinstance(medidas, list) or not isinstance(base.get(nome), list):
+                continue
+            por_clientes = {m['clientes']: m for m in base[nome]}
+            for m in medidas:
+                b = por_clientes.get(m['clientes'])
+                if not b or not m['latencia'] or not b['latencia']:
+                    continue
+                delta = [(m['latencia'][k] - b['latencia'][k]) / b['latencia'][k] * 100 if b['latencia'][k] else 0.0
+                         for k in ('p50_ms', 'p95_ms')]
+                print(f"  {modulo:18} {nome:8} {m['clientes']:3} cli | p50 {delta[0]:+6.1f}% "
+                      f"p95 {delta[1]:+6.1f}% | vazão {b['vazao_req_s']:.1f} → {m['vazao_req_s']:.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ponta a ponta das interfaces contra o emulador')
+    parser.add_argument('--apps', default=','.join(APPS), help='Interfaces a medir (separadas por vírgula)')
+    parser.add_argument('--firmware', default='calibracao', help='Firmware emulado (emulador_firmware.py)')
+    parser.add_argument('--escala-tempo', type=float, default=1.0, help='Escala dos atrasos do firmware emulado')
+    parser.add_argument('--comando', default='STATUS', help='Comando do cenário /command')
+    parser.add_argument('--clientes', default='1,4,16', help='Clientes simultâneos (lista)')
+    parser.add_argument('--requisicoes', type=int, default=64, help='Requisições por cenário e nível de clientes')
+    parser.add_argument('--cliques', type=int, default=8, help='Cliques de página por nível de clientes')
+    parser.add_argument('--conexoes', type=int, default=3, help='Repetições de /connect')
+    parser.add_argument('--observadores', default='100,500', help='Fluxos /eventos abertos ao mesmo tempo (lista; 0 pula)')
+    parser.add_argument('--saida', help='Arquivo JSON com os resultados')
+    parser.add_argument('--comparar', help='Resultado JSON anterior para comparação')
+    args = parser.parse_args()
+    args.clientes = [int(c) for c in args.clientes.split(',')]
+    args.observadores = [int(n) for n in args.observadores.split(',')]
+
+    resultados = {
+        'revisao': revisao_git(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'parametros': {k: v for k, v in vars(args).items() if k not in ('saida', 'comparar')},
+        'apps': {},
+    }
+    print("=" * 60)
+    print("BENCHMARK PONTA A PONTA - TV Alice")
+    print("=" * 60)
+    print(f"Revisão {resultados['revisao']}, firmware {args.firmware} (escala de tempo {args.escala_tempo})")
+
+    with tempfile.TemporaryDirectory() as temporario:
+        link = os.path.join(temporario, 'tty-tv-alice')
+        # Perfis criados pelo benchmark não vão para o mapas.sqlite3 do usuário
+        os.environ['TV_ALICE_MAPAS'] = os.path.join(temporario, 'mapas.sqlite3')
+        emulador = ['emulador_firmware.py', '--firmware', args.firmware, '--link', link,
+                    '--escala-tempo', str(args.escala_tempo)]
+        with Processo(emulador):
+            if not aguardar(lambda: os.path.exists(link), 10.0):
+                raise SystemExit("Emulador não criou a porta")
+            for modulo in args.apps.split(','):
+                print(f"Medindo {modulo}...")
+                resultados['apps'][modulo] = medir_app(modulo, APPS[modulo], link, args, temporario)
+
+    imprimir(resultados)
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {args.saida}")
+    if args.comparar:
+        with open(args.comparar) as f:
+            comparar(resultados, json.load(f))
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
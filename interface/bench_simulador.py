@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Simulador TV Alice - escalar vs lote (NumPy)
+Varre o rolo inteiro em passos finos e compara o laço de chamadas
+escalares com uma única chamada das versões *_lote; depois varre núcleos
+e espessuras de papel contra todas as posições
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from simulador_tv import SimuladorTV
+
+# Ganho mínimo esperado do lote sobre o laço escalar
+GANHO_ALVO = 50
+
+
+def cronometrar(funcao, repeticoes):
+    """Menor tempo e mediana (s) entre as repetições"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark escalar vs lote do SimuladorTV')
+    parser.add_argument('--resolucao-mm', type=float, default=0.02, help='Passo da varredura do rolo')
+    parser.add_argument('--movimento-cm', type=float, default=20.0, help='Comprimento de cada movimento')
+    parser.add_argument('--repeticoes', type=int, default=15)
+    args = parser.parse_args()
+
+    sim = SimuladorTV(diametro_inicial_mm=41, comprimento_total_cm=150)
+    posicoes = np.arange(0, sim.comprimento_total_cm, args.resolucao_mm / 10)
+
+    def escalar():
+        resultado = []
+        for x in posicoes.tolist():
+            sim.comprimento_enrolado_X = x
+            sim.comprimento_enrolado_Y = sim.comprimento_total_cm - x
+            resultado.append(sim.calcular_relacao_velocidade(args.movimento_cm)['relacao'])
+        sim.comprimento_enrolado_X, sim.comprimento_enrolado_Y = 0, sim.comprimento_total_cm
+        return resultado
+
+    def lote():
+        return sim.calcular_relacao_velocidade_lote(args.movimento_cm, posicoes)['relacao']
+
+    # Mesmo resultado antes de medir
+    erro = np.max(np.abs(np.array(escalar()) - lote()))
+    t_escalar, m_escalar = cronometrar(escalar, args.repeticoes)
+    t_lote, m_lote = cronometrar(lote, args.repeticoes)
+    ganho = m_escalar / m_lote
+
+    print("=" * 60)
+    print("BENCHMARK SIMULADOR TV ALICE")
+    print("=" * 60)
+    print(f"Posições avaliadas: {len(posicoes)} (a cada {args.resolucao_mm} mm), {args.repeticoes} repetições")
+    print(f"Escalar: mediana {m_escalar * 1000:.2f} ms, melhor {t_escalar * 1000:.2f} ms "
+          f"({len(posicoes) / m_escalar:,.0f} posições/s)")
+    print(f"Lote:    mediana {m_lote * 1000:.2f} ms, melhor {t_lote * 1000:.2f} ms "
+          f"({len(posicoes) / m_lote:,.0f} posições/s)")
+    print(f"Ganho:   {ganho:.0f}x na mediana ({t_escalar / t_lote:.0f}x entre os melhores)")
+    if ganho < GANHO_ALVO:
+        print(f"AVISO: ganho abaixo do alvo de {GANHO_ALVO}x")
+    print(f"Diferença máxima: {erro:.2e}")
+
+    # Varredura de núcleos: diâmetros × posições em uma chamada (broadcasting)
+    nucleos = np.linspace(35, 50, 16)[:, None]
+    inicio = time.perf_counter()
+    relacoes = sim.calcular_relacao_velocidade_lote(args.movimento_cm, posicoes[None, :], nucleos)['relacao']
+    t_varredura = time.perf_counter() - inicio
+    print(f"\nVarredura {relacoes.shape[0]} núcleos × {relacoes.shape[1]} posições: {t_varredura * 1000:.2f} ms")
+
+    # Varredura de espessuras de papel: o mesmo broadcasting, agora no papel
+    espessuras = np.linspace(0.05, 0.20, 16)[:, None]
+    inicio = time.perf_counter()
+    relacoes = sim.calcular_relacao_velocidade_lote(args.movimento_cm, posicoes[None, :],
+                                                    espessura_mm=espessuras)['relacao']
+    t_varredura = time.perf_counter() - inicio
+    print(f"Varredura {relacoes.shape[0]} espessuras × {relacoes.shape[1]} posições: {t_varredura * 1000:.2f} ms "
+          f"(relação Y/X no início: {relacoes[0, 0]:.2f}x a {relacoes[-1, 0]:.2f}x)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,21 +4,11 @@ Interface Web para Calibração de Páginas - TV Alice
 Acesse http://localhost:5001 no navegador
 """
 
-from flask import Flask, render_template_string, request, jsonify
-import serial
-import time
-import json
-import re
-from datetime import datetime
+from flask import Flask, render_template_string
+from api_tv_alice import api, iniciar_reconexao
 
 app = Flask(__name__)
-
-# Variáveis globais
-ser = None
-connected = False
-port = '/dev/cu.usbmodem1301'
-baudrate = 9600
-log_messages = []
+app.register_blueprint(api)
 
 # HTML da interface
 HTML_TEMPLATE = """
@@ -160,6 +150,10 @@ HTML_TEMPLATE = """
             background: #ffc107;
             color: #333;
         }
+        .status-predicted {
+            background: #e7f3ff;
+            color: #1565c0;
+        }
         .log-container {
             background: #1e1e1e;
             color: #d4d4d4;
@@ -199,6 +193,7 @@ HTML_TEMPLATE = """
     <div class="container">
         <h1>📐 TV Alice - Calibração de Páginas</h1>
         <div class="subtitle">Sistema de Mapeamento e Medição de Passos</div>
+        {% if outra_pagina %}<div class="subtitle"><a href="{{ outra_pagina }}">← 📺 Controle de Rolos</a></div>{% endif %}
         
         <div id="status" class="status disconnected">
             Desconectado
@@ -266,10 +261,16 @@ HTML_TEMPLATE = """
                 <button class="btn btn-primary" onclick="nextPage()">Próxima ▶</button>
                 <button class="btn btn-primary" onclick="prevPage()">◀ Anterior</button>
             </div>
+            <div class="input-group">
+                <button class="btn btn-warning" onclick="goToPrediction()">🎯 IR PARA PREVISÃO</button>
+                <span id="fitInfo" style="font-size: 13px; color: #666;">Previsão após marcar duas páginas além da página 0</span>
+            </div>
             <div style="margin-top: 15px; padding: 15px; background: #e7f3ff; border-radius: 8px; border-left: 4px solid #2196F3;">
                 <strong>💡 Dica:</strong> Use os botões de movimento para posicionar o papel. 
                 Quando estiver na posição correta, clique em <strong>MARCAR PÁGINA</strong>.
                 Os passos acumulados são mostrados acima para referência.
+                Com duas páginas marcadas além da 0, <strong>IR PARA PREVISÃO</strong> leva o papel
+                à posição prevista da página atual; depois só falta o ajuste fino.
             </div>
         </div>
         
@@ -283,6 +284,25 @@ HTML_TEMPLATE = """
             </div>
         </div>
         
+        <div class="section">
+            <h2>🗂️ Perfis de Papel</h2>
+            <div class="input-group">
+                <input type="text" id="profileName" placeholder="Nome do perfil (ex.: rolo-a3)">
+                <select id="profileList" onchange="document.getElementById('profileName').value = this.value">
+                    <option value="">Perfis guardados...</option>
+                </select>
+            </div>
+            <div class="btn-group">
+                <button class="btn btn-success" onclick="saveProfile()">💾 GUARDAR NO COMPUTADOR</button>
+                <button class="btn btn-primary" onclick="uploadProfile()">📲 ENVIAR AO ARDUINO</button>
+                <button class="btn btn-danger" onclick="deleteProfile()">🗑️ REMOVER PERFIL</button>
+            </div>
+            <div style="font-size: 12px; color: #666;">
+                Um mapa por rolo de papel, guardado no computador. Ao trocar de rolo, só as páginas
+                diferentes vão para o Arduino (e para a EEPROM), sem remarcar.
+            </div>
+        </div>
+        
         <div class="section">
             <h2>📋 Mapeamento de Páginas</h2>
             <div id="mappingTable">
@@ -292,11 +312,12 @@ HTML_TEMPLATE = """
                             <th>Página</th>
                             <th>Passos Acumulados</th>
                             <th>Passos da Página</th>
+                            <th>Previsto (IC 95%)</th>
                             <th>Status</th>
                         </tr>
                     </thead>
                     <tbody id="mappingBody">
-                        <tr><td colspan="4" style="text-align: center;">Carregando...</td></tr>
+                        <tr><td colspan="5" style="text-align: center;">Carregando...</td></tr>
                     </tbody>
                 </table>
             </div>
@@ -317,15 +338,70 @@ HTML_TEMPLATE = """
         let totalDefined = 0;
         let mappingData = [];
         
-        function addLog(message) {
+        // Linhas mantidas na tela: memória constante em sessões longas
+        const MAX_LOG = 200;
+        
+        function addLog(message, em) {
             const logContainer = document.getElementById('logContainer');
-            const time = new Date().toLocaleTimeString();
+            const time = (em ? new Date(em * 1000) : new Date()).toLocaleTimeString();
             const entry = document.createElement('div');
             entry.className = 'log-entry';
-            entry.innerHTML = `<span class="log-time">[${time}]</span> ${message}`;
+            const hora = document.createElement('span');
+            hora.className = 'log-time';
+            hora.textContent = `[${time}]`;
+            entry.append(hora, ` ${message}`);
             logContainer.appendChild(entry);
+            while (logContainer.childElementCount > MAX_LOG) {
+                logContainer.firstElementChild.remove();
+            }
             logContainer.scrollTop = logContainer.scrollHeight;
         }
+
+        // Registro do servidor (/log): conexão, comandos, IR e trabalhos de todas as abas.
+        // O cursor evita repetir eventos; ao (re)abrir o fluxo, /log?after= traz o que faltou
+        let logCursor = null;
+        let logPendentes = null;  // Eventos SSE que chegam durante uma sincronização
+        
+        function addLogEvent(entrada) {
+            if (logCursor !== null && entrada.id <= logCursor) return;
+            logCursor = entrada.id;
+            addLog(entrada.mensagem, entrada.em);
+        }
+        
+        async function syncLog() {
+            logPendentes = logPendentes || [];
+            try {
+                const url = logCursor === null ? `/log?limit=${MAX_LOG}` : `/log?after=${logCursor}&limit=${MAX_LOG}`;
+                const data = await (await fetch(url)).json();
+                if (logCursor !== null && data.latest < logCursor) logCursor = 0;  // Servidor reiniciado
+                if (data.missed > 0) addLog(`⚠️ ${data.missed} evento(s) já saíram do registro do servidor`);
+                data.events.forEach(addLogEvent);
+            } catch (error) {
+                console.error('Erro ao ler o registro:', error);
+            } finally {
+                const pendentes = logPendentes;
+                logPendentes = null;
+                pendentes.forEach(addLogEvent);
+            }
+        }
+        
+        // Estados enviados pelo servidor: abrindo → aguardando_banner → negociando → pronto
+        let connectionState = 'desconectado';
+        
+        function updateConnectionState(state) {
+            if (!state || state === connectionState) return;
+            connectionState = state;
+            if (state === 'pronto') {
+                updateStatus(true);
+                getStatus();
+                loadProfiles();  // Perfis são por placa
+            } else if (state === 'desconectado') {
+                updateStatus(false);
+            } else {
+                updateStatus(false);
+                document.getElementById('status').textContent = `⏳ Conectando (${state.replace('_', ' ')})...`;
+            }
+        }
         
         function updateStatus(connected) {
             const status = document.getElementById('status');
@@ -339,11 +415,35 @@ HTML_TEMPLATE = """
             }
         }
         
+        // Movimentos longos viram trabalhos: o resultado chega pelo registro (/log)
+        const COMANDO_MOVIMENTO = /^(PAGE:|GOTO:|SYNC:|F:|B:|R:|NEXT$|PREV$|HOME$)/i;
+        
+        async function submitJob(cmd) {
+            try {
+                const response = await fetch('/jobs', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({command: cmd})
+                });
+                const data = await response.json();
+                if (!data.success) {
+                    addLog(`❌ Erro: ${data.error}`);
+                    return;
+                }
+            } catch (error) {
+                addLog(`❌ Erro ao enviar comando: ${error.message}`);
+            }
+        }
+        
         async function sendCommand(cmd) {
             if (!isConnected) {
                 addLog('⚠️ Arduino não conectado!');
                 return;
             }
+            if (COMANDO_MOVIMENTO.test(cmd)) {
+                submitJob(cmd);
+                return;
+            }
             try {
                 const response = await fetch('/command', {
                     method: 'POST',
@@ -351,15 +451,12 @@ HTML_TEMPLATE = """
                     body: JSON.stringify({command: cmd})
                 });
                 const data = await response.json();
-                addLog(`📤 ${cmd}`);
                 if (data.message) {
                     addLog(`📥 ${data.message}`);
                 }
                 if (data.error) {
                     addLog(`❌ Erro: ${data.error}`);
                 }
-                // Atualizar status após comando
-                setTimeout(getStatus, 500);
             } catch (error) {
                 addLog(`❌ Erro: ${error.message}`);
             }
@@ -368,18 +465,8 @@ HTML_TEMPLATE = """
         function moveSteps(steps) {
             const cmd = steps > 0 ? `F:${steps}` : `B:${Math.abs(steps)}`;
             addLog(`🔄 Movendo ${Math.abs(steps)} passos ${steps > 0 ? 'frente' : 'trás'}...`);
-            isMoving = true;  // Marcar como em movimento
+            // O progresso chega pelo fluxo /eventos a cada 10 passos
             sendCommand(cmd);
-            // Atualizar status imediatamente após comando
-            setTimeout(() => {
-                getStatus();
-                // Parar atualização rápida após movimento (estimativa baseada no número de passos)
-                const estimatedTime = Math.abs(steps) * 5; // ~5ms por passo
-                setTimeout(() => {
-                    isMoving = false;
-                    getStatus();  // Última atualização
-                }, estimatedTime + 500);
-            }, 100);
         }
         
         function moveCustomSteps() {
@@ -453,6 +540,61 @@ HTML_TEMPLATE = """
             }
         }
         
+        // Perfis de papel guardados no servidor (consultas sem serial)
+        async function loadProfiles() {
+            try {
+                const response = await fetch('/maps');
+                const data = await response.json();
+                const select = document.getElementById('profileList');
+                select.length = 1;
+                for (const mapa of data.maps) {
+                    select.add(new Option(`${mapa.perfil} (${mapa.paginas} páginas)`, mapa.perfil));
+                }
+            } catch (error) {
+                console.error('Erro ao listar perfis:', error);
+            }
+        }
+        
+        function profileName() {
+            const name = document.getElementById('profileName').value.trim();
+            if (!name) addLog('⚠️ Informe o nome do perfil');
+            return name;
+        }
+        
+        async function saveProfile() {
+            const name = profileName();
+            if (!name) return;
+            const response = await fetch(`/maps/${encodeURIComponent(name)}`, {method: 'POST'});
+            const data = await response.json();
+            if (data.success) {
+                addLog(`💾 Perfil ${name}: ${data.pages} páginas guardadas`);
+                loadProfiles();
+            } else {
+                addLog(`❌ Erro: ${data.error}`);
+            }
+        }
+        
+        async function uploadProfile() {
+            const name = profileName();
+            if (!name) return;
+            const response = await fetch(`/maps/${encodeURIComponent(name)}/upload`, {method: 'POST'});
+            const data = await response.json();
+            if (data.success) {
+                addLog(`📲 Perfil ${name}: ${data.changed} página(s) alterada(s) em ${data.commands.length} comando(s)`);
+            } else {
+                addLog(`❌ Erro: ${data.error}`);
+            }
+        }
+        
+        async function deleteProfile() {
+            const name = profileName();
+            if (!name || !confirm(`Remover o perfil ${name}?`)) return;
+            const response = await fetch(`/maps/${encodeURIComponent(name)}`, {method: 'DELETE'});
+            const data = await response.json();
+            addLog(data.success ? `🗑️ Perfil ${name} removido` : `❌ Erro: ${data.error}`);
+            loadProfiles();
+        }
+        
         async function connect() {
             const port = document.getElementById('port').value;
             const response = await fetch('/connect', {
@@ -462,9 +604,7 @@ HTML_TEMPLATE = """
             });
             const data = await response.json();
             if (data.success) {
-                updateStatus(true);
-                addLog('✅ Conectado ao Arduino');
-                getStatus();
+                updateConnectionState(data.state);
             } else {
                 addLog(`❌ Erro: ${data.error}`);
             }
@@ -474,7 +614,6 @@ HTML_TEMPLATE = """
             const response = await fetch('/disconnect', {method: 'POST'});
             const data = await response.json();
             updateStatus(false);
-            addLog('❌ Desconectado');
         }
         
         async function getStatus() {
@@ -483,35 +622,89 @@ HTML_TEMPLATE = """
                 const response = await fetch('/status');
                 const data = await response.json();
                 if (data.success) {
-                updateMappingDisplay(data.mapping);
-                const currentPage = data.current_page || 0;
-                const currentSteps = data.current_steps || 0;
-                
-                document.getElementById('currentPage').textContent = currentPage;
-                document.getElementById('currentSteps').textContent = currentSteps;
-                document.getElementById('stepsDisplay').textContent = currentSteps;
-                document.getElementById('totalDefined').textContent = data.total_defined || 0;
-                
-                // Destacar se passos são negativos (problema)
-                const stepsEl = document.getElementById('currentSteps');
-                const stepsDisplayEl = document.getElementById('stepsDisplay');
-                if (currentSteps < 0) {
-                    stepsEl.style.color = '#dc3545';
-                    stepsDisplayEl.style.color = '#dc3545';
-                } else {
-                    stepsEl.style.color = '#28a745';
-                    stepsDisplayEl.style.color = '#333';
-                }
+                    currentPage = data.current_page || 0;
+                    currentSteps = data.current_steps || 0;
+                    updateMappingDisplay(data.mapping);
+                    showPosition(data.current_page || 0, data.current_steps || 0, data.total_defined || 0);
                 }
             } catch (error) {
                 console.error('Erro ao obter status:', error);
             }
         }
         
+        function showPosition(currentPage, currentSteps, totalDefined) {
+            document.getElementById('currentPage').textContent = currentPage;
+            document.getElementById('currentSteps').textContent = currentSteps;
+            document.getElementById('stepsDisplay').textContent = currentSteps;
+            document.getElementById('totalDefined').textContent = totalDefined;
+            
+            // Destacar se passos são negativos (problema)
+            const stepsEl = document.getElementById('currentSteps');
+            const stepsDisplayEl = document.getElementById('stepsDisplay');
+            if (currentSteps < 0) {
+                stepsEl.style.color = '#dc3545';
+                stepsDisplayEl.style.color = '#dc3545';
+            } else {
+                stepsEl.style.color = '#28a745';
+                stepsDisplayEl.style.color = '#333';
+            }
+        }
+        
+        // Ajuste de geometria: refeito no servidor só quando o mapeamento muda (a cada MARK)
+        let fitPages = {};
+        let fitKey = null;
+        
+        async function refreshFit() {
+            const key = JSON.stringify(mappingData);
+            if (key === fitKey) return;
+            fitKey = key;
+            try {
+                const response = await fetch('/fit');
+                const data = await response.json();
+                fitPages = {};
+                const info = document.getElementById('fitInfo');
+                if (data.success) {
+                    data.pages.forEach(p => fitPages[p.numero] = p);
+                    const fit = data.fit;
+                    info.textContent = `Núcleo ${fit.diametro_nucleo_mm} mm, papel ${fit.espessura_mm} mm` +
+                        (fit.erro_padrao_passos !== null ? `, erro ±${fit.erro_padrao_passos} passos` : '') +
+                        ` (${fit.paginas_usadas} páginas, ${data.elapsed_ms} ms)`;
+                } else {
+                    info.textContent = data.error;
+                }
+            } catch (error) {
+                console.error('Erro ao ajustar geometria:', error);
+            }
+            updateMappingDisplay(mappingData);
+        }
+        
+        function formatPrediction(previsao) {
+            if (!previsao) return '-';
+            if (!previsao.intervalo) return `≈ ${previsao.passos_previstos}`;
+            return `≈ ${previsao.passos_previstos} [${previsao.intervalo[0]}, ${previsao.intervalo[1]}]`;
+        }
+        
+        function goToPrediction() {
+            const previsao = fitPages[currentPage];
+            if (!previsao) {
+                addLog('⚠️ Sem previsão para a página atual: marque ao menos duas páginas além da 0');
+                return;
+            }
+            const delta = previsao.passos_previstos - currentSteps;
+            if (delta === 0) {
+                addLog(`🎯 Já na posição prevista da página ${currentPage}`);
+                return;
+            }
+            addLog(`🎯 Página ${currentPage}: previsão ${formatPrediction(previsao)} passos`);
+            moveSteps(delta);
+        }
+        
         function updateMappingDisplay(mapping) {
             const tbody = document.getElementById('mappingBody');
-            if (!mapping || mapping.length === 0) {
-                tbody.innerHTML = '<tr><td colspan="4" style="text-align: center;">Nenhuma página mapeada ainda</td></tr>';
+            mappingData = mapping || [];
+            refreshFit();
+            if (mappingData.length === 0) {
+                tbody.innerHTML = '<tr><td colspan="5" style="text-align: center;">Nenhuma página mapeada ainda</td></tr>';
                 return;
             }
             
@@ -526,6 +719,7 @@ HTML_TEMPLATE = """
                         <td>${p.numero}</td>
                         <td>${p.definida ? p.passos : '-'}</td>
                         <td>${passosPagina}</td>
+                        <td>${formatPrediction(fitPages[p.numero])}</td>
                         <td>
                             <span class="status-badge ${p.definida ? 'status-defined' : 'status-pending'}">
                                 ${p.definida ? '✓ Definida' : '⏳ Pendente'}
@@ -534,57 +728,48 @@ HTML_TEMPLATE = """
                     </tr>
                 `;
             }
+            // Páginas ainda não alcançadas: só a previsão
+            const numeros = new Set(mapping.map(p => p.numero));
+            Object.values(fitPages).filter(p => !numeros.has(p.numero)).forEach(p => {
+                html += `
+                    <tr>
+                        <td>${p.numero}</td>
+                        <td>-</td>
+                        <td>-</td>
+                        <td>${formatPrediction(p)}</td>
+                        <td><span class="status-badge status-predicted">🔮 Prevista</span></td>
+                    </tr>
+                `;
+            });
             tbody.innerHTML = html;
         }
         
-        // Atualizar status periodicamente (mais frequente durante movimento)
-        let statusInterval = setInterval(() => {
-            if (isConnected) {
-                getStatus();
-            }
-        }, 1000);  // Atualizar a cada 1 segundo para feedback mais rápido
-        
-        // Variável para rastrear se está em movimento
-        let isMoving = false;
-        
-        // Função para atualizar passos em tempo real durante movimento
-        async function updateStepsDuringMove() {
-            if (!isConnected || !isMoving) return;
-            try {
-                const response = await fetch('/status');
-                const data = await response.json();
-                if (data.success && data.current_steps !== undefined) {
-                    const currentSteps = data.current_steps;
-                    document.getElementById('currentSteps').textContent = currentSteps;
-                    const stepsDisplayEl = document.getElementById('stepsDisplay');
-                    if (stepsDisplayEl) {
-                        stepsDisplayEl.textContent = currentSteps;
-                    }
-                    
-                    // Destacar se passos são negativos
-                    const stepsEl = document.getElementById('currentSteps');
-                    if (currentSteps < 0) {
-                        stepsEl.style.color = '#dc3545';
-                        if (stepsDisplayEl) stepsDisplayEl.style.color = '#dc3545';
-                    } else {
-                        stepsEl.style.color = '#28a745';
-                        if (stepsDisplayEl) stepsDisplayEl.style.color = '#333';
-                    }
-                }
-            } catch (error) {
-                // Silenciar erros durante movimento
-            }
-        }
-        
-        // Atualizar passos mais frequentemente durante movimento
-        setInterval(() => {
-            if (isConnected && isMoving) {
-                updateStepsDuringMove();
+        // Estado enviado pelo servidor: passos ao vivo durante o movimento,
+        // tabela após MARK/STATUS (um único leitor serial para todas as abas)
+        const eventos = new EventSource('/eventos');
+        eventos.onmessage = (e) => {
+            const estado = JSON.parse(e.data);
+            updateConnectionState(estado.estado_conexao);
+            if (!isConnected) return;
+            currentPage = estado.pagina_atual;
+            currentSteps = estado.passos_atual;
+            updateMappingDisplay(estado.mapeamento);
+            showPosition(estado.pagina_atual, estado.passos_atual, estado.total_definidas);
+        };
+        // Conexão, comandos e trabalhos (de todas as abas) chegam pelo registro
+        eventos.onopen = syncLog;
+        eventos.addEventListener('log', (e) => {
+            const entrada = JSON.parse(e.data);
+            if (logPendentes) {
+                logPendentes.push(entrada);
+            } else {
+                addLogEvent(entrada);
             }
-        }, 500);  // Atualizar a cada 500ms durante movimento
+        });
         
         // Inicializar
         addLog('Interface de calibração carregada');
+        loadProfiles();
     </script>
 </body>
 </html>
@@ -592,176 +777,7 @@ HTML_TEMPLATE = """
 
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
-
-@app.route('/connect', methods=['POST'])
-def connect_arduino():
-    global ser, connected, port
-    try:
-        data = request.json
-        port = data.get('port', '/dev/cu.usbmodem1301')
-        
-        if ser:
-            ser.close()
-        
-        ser = serial.Serial(port, baudrate, timeout=1)
-        time.sleep(2)
-        connected = True
-        return jsonify({'success': True})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
-
-@app.route('/disconnect', methods=['POST'])
-def disconnect_arduino():
-    global ser, connected
-    if ser:
-        ser.close()
-        ser = None
-    connected = False
-    return jsonify({'success': True})
-
-@app.route('/command', methods=['POST'])
-def send_command():
-    global ser, connected
-    if not connected or not ser:
-        return jsonify({'success': False, 'error': 'Arduino não conectado'})
-    
-    try:
-        data = request.json
-        command = data.get('command', '')
-        
-        ser.reset_input_buffer()
-        ser.reset_output_buffer()
-        
-        ser.write(f"{command}\n".encode())
-        ser.flush()
-        
-        time.sleep(0.3)
-        message = ""
-        start_time = time.time()
-        max_wait = 1.0
-        
-        while (time.time() - start_time) < max_wait:
-            if ser.in_waiting:
-                line = ser.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    message += line + "\n"
-                    if ser.in_waiting == 0:
-                        time.sleep(0.1)
-                        if ser.in_waiting == 0:
-                            break
-            else:
-                time.sleep(0.05)
-        
-        return jsonify({'success': True, 'message': message.strip()})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
-
-@app.route('/status')
-def get_status():
-    global ser, connected
-    if not connected or not ser:
-        return jsonify({'success': False, 'error': 'Arduino não conectado'})
-    
-    try:
-        ser.reset_input_buffer()
-        ser.write(b"STATUS\n")
-        ser.flush()
-        
-        time.sleep(0.5)
-        response = ""
-        start_time = time.time()
-        
-        while (time.time() - start_time) < 2.0:
-            if ser.in_waiting:
-                line = ser.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    response += line + "\n"
-                    if "-------------" in line:
-                        break
-            else:
-                time.sleep(0.1)
-        
-        # Parse do status
-        mapping = []
-        current_page = 0
-        current_steps = 0
-        total_defined = 0
-        
-        lines = response.split('\n')
-        for line in lines:
-            # Página atual
-            if 'Página atual:' in line:
-                match = re.search(r'(\d+)', line)
-                if match:
-                    current_page = int(match.group(1))
-            # Passos acumulados (pode ser negativo)
-            elif 'Passos acumulados:' in line:
-                match = re.search(r'(-?\d+)', line)
-                if match:
-                    current_steps = int(match.group(1))
-            # Total definidas
-            elif 'Total de páginas definidas:' in line:
-                match = re.search(r'(\d+)', line)
-                if match:
-                    total_defined = int(match.group(1))
-            # Mapeamento (linhas da tabela)
-            elif re.match(r'\s+\d+\s+\|', line):
-                parts = [p.strip() for p in line.split('|')]
-                if len(parts) >= 3:
-                    try:
-                        pagina_num = int(parts[0].strip())
-                        passos_str = parts[1].strip()
-                        definida = '✓' in parts[3] if len(parts) > 3 else False
-                        
-                        if passos_str != '-' and passos_str:
-                            try:
-                                passos = int(passos_str)
-                            except ValueError:
-                                passos = 0
-                            mapping.append({
-                                'numero': pagina_num,
-                                'passos': passos,
-                                'definida': definida
-                            })
-                    except:
-                        pass
-        
-        return jsonify({
-            'success': True,
-            'current_page': current_page,
-            'current_steps': current_steps,
-            'total_defined': total_defined,
-            'mapping': mapping
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
-
-@app.route('/export')
-def export_data():
-    global ser, connected
-    if not connected or not ser:
-        return jsonify({'error': 'Arduino não conectado'})
-    
-    try:
-        # Obter status atual
-        status_response = get_status()
-        status_data = status_response.get_json()
-        
-        if not status_data.get('success'):
-            return jsonify({'error': 'Não foi possível obter dados'})
-        
-        export_data = {
-            'total_paginas': status_data.get('total_defined', 0),
-            'paginas': status_data.get('mapping', []),
-            'ultima_atualizacao': datetime.now().isoformat(),
-            'pagina_atual': status_data.get('current_page', 0),
-            'passos_atual': status_data.get('current_steps', 0)
-        }
-        
-        return jsonify(export_data)
-    except Exception as e:
-        return jsonify({'error': str(e)})
+    return render_template_string(HTML_TEMPLATE, outra_pagina=None)
 
 if __name__ == '__main__':
     print("=" * 50)
@@ -769,5 +785,5 @@ if __name__ == '__main__':
     print("=" * 50)
     print(f"Acesse: http://localhost:5001")
     print("=" * 50)
+    iniciar_reconexao()
     app.run(debug=True, host='0.0.0.0', port=5001)
-
@@ -0,0 +1,733 @@
+#!/usr/bin/env python3
+"""
+Conexão Serial - TV Alice
+Thread única dona da porta serial: passa os bytes lidos ao parser
+incremental, guarda as linhas em um buffer circular, distribui os eventos
+e casa as respostas com os comandos enfileirados
+"""
+
+import serial
+import time
+import threading
+import queue
+import itertools
+import re
+import statistics
+from collections import deque
+
+from protocolo_compacto import COMANDO_ATIVAR, CONFIRMACAO_ATIVAR
+from parser_firmware import ParserFirmware, RE_PARADO
+
+# Linha final da tabela de STATUS ("-------------") ou quadro compacto $S
+RODAPE_STATUS = re.compile(r'^(-{13}$|\$S,)')
+
+# Linhas que encerram um movimento ou um comando rejeitado
+FIM_MOVIMENTO = re.compile(r'^(>>> (Conclu|Movimento completo|Comando inválido)|\$D,)')
+
+# Confirmações curtas dos comandos de configuração do link
+CONFIRMACAO = re.compile(r'^>>> (BAUD:\d+|PONG|PROTO:\w+|ACEL:[\d,]+|SETMAP:\d+|Baudrate inválido|Aceleração inválida|Mapa inválido)$')
+
+# Delimitador dos comandos encadeados em lote (cada um é seguido de PING)
+RE_PONG = re.compile(r'^>>> PONG$')
+
+# Firmwares que respondem PING (permitem encadear comandos em lote)
+FIRMWARES_COM_PING = ('calibracao',)
+
+# Firmwares que param no meio de um movimento ao receber o byte '!' (sem fim de linha);
+# os demais recebem "STOP" como um comando comum
+FIRMWARES_COM_PARADA_IMEDIATA = ('calibracao',)
+
+# Erro dos comandos descartados por uma parada de emergência
+CANCELADO_POR_STOP = 'Cancelado por STOP'
+
+# Latência máxima desejada entre a requisição de parada e o byte na porta (ms)
+ALVO_PARADA_MS = 20.0
+
+# Comandos cuja resposta termina com a tabela de STATUS
+COMANDOS_COM_STATUS = ('STATUS', 'RESET', 'MARK', 'CLEAR', 'LOAD', 'HOME', 'GOTO:0')
+
+# Última linha do boot dos firmwares (motor_com_ir/calibracao: "Pronto!",
+# motor_simples/calibracao_simples: "Aguardando comandos...")
+RE_BANNER = re.compile(r'^>>> (Pronto!|Aguardando comandos)')
+
+# Título impresso no boot de cada firmware (impressão digital)
+RE_TITULO = re.compile(r'^=== (.+) ===$')
+FIRMWARES = {
+    'SISTEMA DE CALIBRAÇÃO - TV ALICE': 'calibracao',
+    'TV ALICE - CALIBRAÇÃO': 'calibracao_simples',
+    'MOTOR COM CONTROLE IR': 'motor_com_ir',
+    'MOTOR SIMPLES - PRONTO': 'motor_simples',
+}
+
+# Estados da conexão
+DESCONECTADO = 'desconectado'
+ABRINDO = 'abrindo'
+AGUARDANDO_BANNER = 'aguardando_banner'
+NEGOCIANDO = 'negociando'
+PRONTO = 'pronto'
+
+# Velocidades tentadas (em ordem) depois de conectar a 9600 baud
+BAUDRATES_RAPIDOS = (500000, 250000, 115200)
+
+
+def terminador_para(comando):
+    """Retorna a regex da linha que encerra a resposta do comando"""
+    cmd = comando.strip().upper()
+    if cmd in COMANDOS_COM_STATUS or cmd.startswith(('MARK:', 'SETPOS:')):
+        return RODAPE_STATUS
+    if cmd == 'PING' or cmd.startswith(('BAUD:', 'PROTO:', 'ACEL:', 'SETMAP:')):
+        return CONFIRMACAO
+    return FIM_MOVIMENTO
+
+
+class Comando:
+    """Comando enfileirado aguardando resposta do Arduino"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, texto, timeout, acao=None, ao_receber=None, ao_concluir=None):
+        self.id = next(self._ids)
+        self.texto = texto
+        self.acao = acao  # Função executada na thread serial no lugar de um comando
+        self.ao_receber = ao_receber    # funcao(linha, eventos) a cada linha da resposta (thread serial)
+        self.ao_concluir = ao_concluir  # funcao(cmd) ao terminar, com ou sem erro
+        self.terminador = terminador_para(texto)
+        self.timeout = timeout
+        self.linhas = []
+        self.erro = None
+        self.encadeado = False  # Pode ser escrito sem esperar a resposta do anterior (lote)
+        self.sentinela = False  # Seguido de PING: a resposta termina no ">>> PONG"
+        self.enviado_em = None
+        self.iniciado_em = None  # Quando passou a receber as linhas (início da execução)
+        self.prazo = None
+        self.concluido_em = None
+        self.concluido = threading.Event()
+
+    def bytes(self):
+        """O que vai para a porta serial"""
+        return f"{self.texto}\nPING\n".encode() if self.sentinela else f"{self.texto}\n".encode()
+
+    def iniciar(self, agora):
+        """Primeiro da fila no Arduino: o prazo conta a partir daqui"""
+        self.iniciado_em = agora
+        self.prazo = agora + self.timeout
+
+    @property
+    def resposta(self):
+        return "\n".join(self.linhas)
+
+    @property
+    def duracao(self):
+        """Tempo entre envio e conclusão (s)"""
+        if self.enviado_em is None or self.concluido_em is None:
+            return None
+        return self.concluido_em - self.enviado_em
+
+    def aguardar(self, timeout=None):
+        """Bloqueia até a resposta completa (ou falha) chegar"""
+        return self.concluido.wait(timeout)
+
+
+class Parada:
+    """STOP de emergência: instantes (perf_counter) da requisição, da escrita e da confirmação"""
+
+    def __init__(self, recebida_em):
+        self.recebida_em = recebida_em
+        self.escrita_em = None      # Bytes entregues à porta (após flush)
+        self.confirmada_em = None   # Linha de confirmação do firmware
+        self.cancelados = 0         # Comandos do host descartados
+        self.linhas = []
+        self.erro = None
+        self.concluida = threading.Event()
+
+    def _ms(self, instante):
+        return None if instante is None else (instante - self.recebida_em) * 1000
+
+    @property
+    def escrita_ms(self):
+        return self._ms(self.escrita_em)
+
+    @property
+    def confirmacao_ms(self):
+        return self._ms(self.confirmada_em)
+
+    def como_dict(self):
+        return {
+            'escrita_ms': self.escrita_ms,
+            'confirmacao_ms': self.confirmacao_ms,
+            'cancelados': self.cancelados,
+            'resposta': "\n".join(self.linhas),
+            'erro': self.erro,
+        }
+
+
+class ConexaoSerial:
+    """Dona exclusiva da porta serial, executada em uma thread própria"""
+
+    def __init__(self, baudrate=9600, capacidade_buffer=500,
+                 silencio=0.2, espera_inicial=1.0, timeout_padrao=30.0, protocolo='texto',
+                 baudrates_rapidos=BAUDRATES_RAPIDOS, timeout_banner=3.0,
+                 janela_lote=8, buffer_rx_firmware=64, timeout_parada=1.0):
+        self.baudrate = baudrate                  # Velocidade de boot do firmware
+        self.baudrate_atual = baudrate            # Velocidade efetivamente negociada
+        self.baudrates_rapidos = baudrates_rapidos
+        self.taxas = {}                           # Estatísticas por baudrate
+        self.timeout_banner = timeout_banner      # Sem banner até aqui: placa não reiniciou
+        self.estado = DESCONECTADO
+        self.banner = None
+        self.firmware = None  # Identificado pelo título do boot
+        self.exigir_firmware = False  # Sondagem: só negocia com firmware reconhecido
+        self.recusa = None            # Motivo da última porta fechada na sondagem
+        self.aberto_em = None
+        self.pronto_em = None
+        self._pronto = threading.Event()
+        self._ouvintes_estado = []
+        self.protocolo_preferido = protocolo  # 'texto' ou 'compacto' (PROTO:KV)
+        self.protocolo = 'texto'              # Protocolo efetivamente negociado
+        self.silencio = silencio              # Pausa que encerra uma resposta sem terminador
+        self.espera_inicial = espera_inicial  # Prazo para a primeira linha da resposta
+        self.timeout_padrao = timeout_padrao  # Prazo máximo de um comando
+        self.janela_lote = janela_lote        # Comandos em voo ao mesmo tempo num lote
+        self.buffer_rx_firmware = buffer_rx_firmware  # Buffer serial do Arduino Uno (bytes)
+        self.timeout_parada = timeout_parada  # Espera pela confirmação do STOP antes de liberar a fila
+        self.paradas = deque(maxlen=50)       # Latências das últimas paradas
+        self.linhas = deque(maxlen=capacidade_buffer)
+        self.parser = ParserFirmware()  # Único intérprete da saída do firmware
+        self.port = None
+        self._ser = None
+        self._fila = queue.Queue()
+        self._ouvintes = []
+        self._ouvintes_comando = []
+        self._ouvintes_evento = []
+        self._thread = None
+        self._ativo = False
+        self._sessao = 0       # Incrementa a cada conectar (descarta negociações antigas)
+        self._lock = threading.RLock()  # Serializa conectar/desconectar e registro de ouvintes
+        self._lock_escrita = threading.Lock()  # Único ponto em que outra thread escreve: parar()
+        self._parada = None    # Parada aguardando confirmação (a fila fica suspensa)
+
+    @property
+    def conectado(self):
+        return self._ser is not None and self._ativo
+
+    @property
+    def pronto(self):
+        return self.estado == PRONTO
+
+    def conectar(self, port, exigir_firmware=False):
+        """Abre a porta e retorna logo; a prontidão é detectada pela thread serial
+
+        exigir_firmware=True (sondagem de portas desconhecidas): nada é
+        escrito até chegar o banner de um firmware com título conhecido;
+        sem ele a porta é fechada.
+        """
+        with self._lock:
+            self.desconectar()
+            self._mudar_estado(ABRINDO)
+            try:
+                # exclusive: um segundo processo (ex.: outro worker WSGI) falha ao abrir
+                # em vez de intercalar bytes com este
+                self._ser = serial.Serial(port, self.baudrate, timeout=0.05, exclusive=True)
+            except Exception:
+                self._mudar_estado(DESCONECTADO)
+                raise
+            self._sessao += 1
+            self.port = port
+            self.protocolo = 'texto'
+            self.baudrate_atual = self.baudrate
+            self.banner = None
+            self.firmware = None
+            self.aberto_em = time.time()
+            self.pronto_em = None
+            self.exigir_firmware = exigir_firmware
+            self.recusa = None
+            self.parser = ParserFirmware()
+            self._registrar_taxa()
+            self._ativo = True
+            self._mudar_estado(AGUARDANDO_BANNER)
+            self._thread = threading.Thread(target=self._executar, name='serial-tv-alice', daemon=True)
+            self._thread.start()
+
+    def aguardar_pronto(self, timeout=None):
+        return self._pronto.wait(timeout)
+
+    def desconectar(self):
+        """Encerra a thread e fecha a porta"""
+        with self._lock:
+            self._ativo = False
+            if self._thread and self._thread is not threading.current_thread():
+                self._thread.join(timeout=1.0)
+            self._thread = None
+            if self._ser:
+                try:
+                    self._ser.close()
+                except Exception:
+                    pass
+                self._ser = None
+            self._falhar_pendentes('Desconectado')
+            if self.estado != DESCONECTADO:
+                self._mudar_estado(DESCONECTADO)
+
+    def enfileirar(self, texto, timeout=None, ao_receber=None, ao_concluir=None):
+        """Enfileira um comando e retorna imediatamente"""
+        cmd = Comando(texto, timeout or self.timeout_padrao, ao_receber=ao_receber, ao_concluir=ao_concluir)
+        self._colocar_na_fila(cmd)
+        return cmd
+
+    def _colocar_na_fila(self, cmd):
+        if not self.conectado:
+            self._concluir(cmd, 'Arduino não conectado')
+            return
+        self._fila.put(cmd)
+        self._acordar()
+        if not self.conectado:
+            # desconectar() de outra thread entre a checagem e o put
+            self._falhar_pendentes('Desconectado')
+
+    def _acordar(self):
+        """Interrompe o read() ocioso da thread serial para o comando novo sair já, sem esperar o timeout"""
+        ser = self._ser
+        if ser is not None:
+            try:
+                ser.cancel_read()
+            except Exception:
+                pass  # Porta fechando: a thread já está saindo
+
+    def enviar(self, texto, timeout=None):
+        """Enfileira um comando e aguarda a resposta"""
+        cmd = self.enfileirar(texto, timeout)
+        if not cmd.aguardar(cmd.timeout + self.espera_inicial):
+            cmd.erro = 'Tempo esgotado aguardando resposta'
+        return cmd
+
+    def enviar_lote(self, textos, timeout=None):
+        """Envia os comandos em ordem e aguarda todos; retorna a lista de Comandos"""
+        cmds = self.enfileirar_lote(textos, timeout)
+        for cmd in cmds:
+            # O prazo de cada um só começa quando o anterior termina
+            if not cmd.aguardar(cmd.timeout + self.espera_inicial):
+                cmd.erro = 'Tempo esgotado aguardando resposta'
+        return cmds
+
+    def enfileirar_lote(self, textos, timeout=None, ao_concluir=None):
+        """Enfileira os comandos em ordem e retorna logo a lista de Comandos
+
+        Em firmwares com PING os comandos são encadeados: cada um segue com
+        um PING e o ">>> PONG" delimita sua resposta, então o próximo já é
+        escrito sem esperar (limitado por janela_lote e buffer_rx_firmware).
+        Nos demais vão um a um, como em enviar().
+        """
+        encadear = self.firmware in FIRMWARES_COM_PING
+        cmds = []
+        for texto in textos:
+            cmd = Comando(texto, timeout or self.timeout_padrao, ao_concluir=ao_concluir)
+            # BAUD troca a velocidade no meio do caminho: só sozinho
+            if encadear and not texto.strip().upper().startswith('BAUD:'):
+                cmd.encadeado = True
+                if cmd.terminador is not CONFIRMACAO:  # PING/PROTO/ACEL já têm confirmação própria
+                    cmd.sentinela = True
+                    cmd.terminador = RE_PONG
+            cmds.append(cmd)
+        for cmd in cmds:
+            self._colocar_na_fila(cmd)
+        return cmds
+
+    def parar(self, recebida_em=None):
+        """Parada de emergência: escreve direto na porta e aguarda a confirmação"""
+        parada = self.iniciar_parada(recebida_em)
+        if parada.erro is None:
+            parada.concluida.wait(self.timeout_parada + self.espera_inicial)
+        return parada
+
+    def iniciar_parada(self, recebida_em=None):
+        """Escreve a parada na frente da fila e retorna sem aguardar a confirmação
+
+        Não espera a thread serial (que pode estar no meio de um movimento):
+        escreve '!' (ou "STOP") sob o lock de escrita, descarta a fila e os
+        comandos em voo e só libera novos comandos depois da confirmação do
+        firmware, para que as linhas finais do movimento interrompido não
+        sejam atribuídas ao próximo comando.
+        recebida_em: perf_counter da chegada da requisição (início da latência).
+        """
+        parada = Parada(recebida_em or time.perf_counter())
+        if not self.conectado:
+            parada.erro = 'Arduino não conectado'
+            return parada
+        dados = b'!' if self.firmware in FIRMWARES_COM_PARADA_IMEDIATA else b'STOP\n'
+        try:
+            with self._lock_escrita:
+                self._parada = parada
+                self._ser.write(dados)
+            self._ser.flush()
+        except Exception as e:
+            parada.erro = str(e)
+            self._parada = None
+            return parada
+        parada.escrita_em = time.perf_counter()
+        self.taxas[self.baudrate_atual]['bytes_tx'] += len(dados)
+        # Em voo e "proximo" ficam com a thread serial; aqui só o que ainda está na fila
+        while True:
+            try:
+                cmd = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            self._concluir(cmd, CANCELADO_POR_STOP)
+            parada.cancelados += 1
+        self.paradas.append(parada)
+        return parada
+
+    def diagnostico_parada(self):
+        """Latências das paradas recentes (ms) contra o alvo de ALVO_PARADA_MS"""
+        paradas = [p for p in list(self.paradas) if p.escrita_ms is not None]
+        escritas = [p.escrita_ms for p in paradas]
+        confirmacoes = [p.confirmacao_ms for p in paradas if p.confirmacao_ms is not None]
+        return {
+            'alvo_ms': ALVO_PARADA_MS,
+            'total': len(paradas),
+            'ultima': paradas[-1].como_dict() if paradas else None,
+            'escrita_mediana_ms': statistics.median(escritas) if escritas else None,
+            'escrita_max_ms': max(escritas) if escritas else None,
+            'confirmacao_mediana_ms': statistics.median(confirmacoes) if confirmacoes else None,
+            'confirmacao_max_ms': max(confirmacoes) if confirmacoes else None,
+            'dentro_do_alvo': all(ms <= ALVO_PARADA_MS for ms in escritas) if escritas else None,
+        }
+
+    def executar_na_thread(self, acao, timeout=1.0):
+        """Executa acao(ser) na thread serial, entre dois comandos"""
+        cmd = Comando('', timeout, acao=acao)
+        if not self.conectado:
+            cmd.erro = 'Arduino não conectado'
+            return cmd
+        self._fila.put(cmd)
+        self._acordar()
+        cmd.aguardar(timeout)
+        return cmd
+
+    def _trocar_baudrate(self, baudrate):
+        def acao(ser):
+            ser.baudrate = baudrate
+        self.executar_na_thread(acao)
+        self.baudrate_atual = baudrate
+        self._registrar_taxa()
+
+    def negociar_baudrate(self):
+        """Sobe a velocidade com BAUD:N + PING; volta a 9600 se não houver PONG"""
+        for taxa in self.baudrates_rapidos:
+            if taxa <= self.baudrate_atual:
+                continue
+            cmd = self.enviar(f'BAUD:{taxa}', timeout=0.5)
+            if f'>>> BAUD:{taxa}' not in cmd.linhas:
+                break  # Firmware sem suporte a BAUD: permanece na velocidade atual
+            self._trocar_baudrate(taxa)
+            if '>>> PONG' in self.enviar('PING', timeout=0.3).linhas:
+                self.medir_vazao()
+                return taxa
+            # Sem PING o firmware volta sozinho a 9600 após 1 s
+            self.taxas[taxa]['falhas'] += 1
+            self._trocar_baudrate(self.baudrate)
+            time.sleep(1.0)
+        self.medir_vazao()
+        return self.baudrate_atual
+
+    def medir_vazao(self):
+        """Mede bytes/s recebidos em um STATUS completo na velocidade atual"""
+        cmd = self.enviar('STATUS', timeout=3.0)
+        if cmd.erro or not cmd.duracao:
+            return None
+        total = sum(len(l.encode()) + 2 for l in cmd.linhas)
+        vazao = total / cmd.duracao
+        self.taxas[self.baudrate_atual]['status_bytes'] = total
+        self.taxas[self.baudrate_atual]['status_s'] = cmd.duracao
+        self.taxas[self.baudrate_atual]['vazao_medida_bytes_s'] = vazao
+        return vazao
+
+    def diagnostico(self, quantidade_linhas=20):
+        """Resumo do link para o endpoint de diagnóstico, com as últimas linhas recebidas"""
+        return {
+            'port': self.port,
+            'conectado': self.conectado,
+            'estado': self.estado,
+            'banner': self.banner,
+            'firmware': self.firmware,
+            'tempo_ate_pronto_s': (self.pronto_em - self.aberto_em) if self.pronto_em else None,
+            'baudrate_inicial': self.baudrate,
+            'baudrate_atual': self.baudrate_atual,
+            'protocolo': self.protocolo,
+            'taxas': {str(taxa): dict(dados) for taxa, dados in list(self.taxas.items())},
+            'parada': self.diagnostico_parada(),
+            'recusa': self.recusa,
+            'parser': self.parser.diagnostico(),
+            'linhas_recentes': self.linhas_recentes(quantidade_linhas)
+        }
+
+    def _registrar_taxa(self):
+        self.taxas.setdefault(self.baudrate_atual, {
+            'vazao_teorica_bytes_s': self.baudrate_atual / 10,  # 8N1 = 10 bits por byte
+            'vazao_medida_bytes_s': None,
+            'status_bytes': None,
+            'status_s': None,
+            'bytes_rx': 0,
+            'bytes_tx': 0,
+            'falhas': 0,
+        })
+
+    def negociar_protocolo(self):
+        """Ativa os quadros compactos se preferido e suportado pelo firmware"""
+        if self.protocolo_preferido != 'compacto':
+            return self.protocolo
+        cmd = self.enviar(COMANDO_ATIVAR, timeout=1.0)
+        # Firmware sem suporte não confirma: permanece em texto
+        self.protocolo = 'compacto' if CONFIRMACAO_ATIVAR in cmd.linhas else 'texto'
+        return self.protocolo
+
+    def adicionar_ouvinte_estado(self, funcao):
+        """Registra funcao(estado), chamada a cada transição da conexão"""
+        with self._lock:
+            # Cópia nova da lista: a thread serial itera sem precisar de lock
+            self._ouvintes_estado = self._ouvintes_estado + [funcao]
+
+    def _mudar_estado(self, estado):
+        self.estado = estado
+        if estado == PRONTO:
+            self.pronto_em = time.time()
+            self._pronto.set()
+        else:
+            self._pronto.clear()
+        for ouvinte in self._ouvintes_estado:
+            try:
+                ouvinte(estado)
+            except Exception:
+                pass
+
+    def _banner_recebido(self, linha):
+        """Arduino terminou o boot (ou não reiniciou): negociar o link e liberar a fila"""
+        self.banner = linha
+        self._mudar_estado(NEGOCIANDO)
+        threading.Thread(target=self._preparar, args=(self._sessao,),
+                         name='serial-negociacao', daemon=True).start()
+
+    def _recusar(self, motivo, sessao):
+        """Sondagem sem firmware reconhecido: fecha a porta sem ter escrito nada"""
+        with self._lock:
+            # Um conectar() concorrente já trocou a porta: não derrubar a nova sessão
+            if sessao != self._sessao:
+                return
+            self.recusa = motivo
+            self.desconectar()
+
+    def _preparar(self, sessao):
+        self.negociar_baudrate()
+        self.negociar_protocolo()
+        # Uma reconexão no meio da negociação não pode ser marcada pronta por esta
+        if self._ativo and sessao == self._sessao:
+            self._mudar_estado(PRONTO)
+
+    def adicionar_ouvinte(self, funcao):
+        """Registra funcao(linha), chamada pela thread serial a cada linha recebida"""
+        with self._lock:
+            self._ouvintes = self._ouvintes + [funcao]
+
+    def adicionar_ouvinte_evento(self, funcao):
+        """Registra funcao(evento), chamada pela thread serial a cada evento do parser"""
+        with self._lock:
+            self._ouvintes_evento = self._ouvintes_evento + [funcao]
+
+    def adicionar_ouvinte_comando(self, funcao):
+        """Registra funcao(texto), chamada pela thread serial após escrever cada comando"""
+        with self._lock:
+            self._ouvintes_comando = self._ouvintes_comando + [funcao]
+
+    def linhas_recentes(self, quantidade=50):
+        """Últimas linhas recebidas (inclusive as não solicitadas)"""
+        return list(self.linhas)[-quantidade:] if quantidade > 0 else []
+
+    def _falhar_pendentes(self, erro):
+        while True:
+            try:
+                cmd = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            self._concluir(cmd, erro)
+
+    def _concluir(self, cmd, erro=None):
+        cmd.erro = erro
+        cmd.concluido_em = time.time()
+        cmd.concluido.set()
+        if cmd.ao_concluir is not None:
+            try:
+                cmd.ao_concluir(cmd)
+            except Exception:
+                pass
+
+    def _executar(self):
+        """Laço da thread: escreve os próximos comandos e distribui as linhas lidas"""
+        sessao = self._sessao
+        em_voo = deque()   # Comandos escritos aguardando resposta (o primeiro recebe as linhas)
+        proximo = None     # Retirado da fila, aguardando espaço para ser escrito
+        ultima_linha = 0.0
+
+        while self._ativo:
+            if self.estado == AGUARDANDO_BANNER and time.time() - self.aberto_em >= self.timeout_banner:
+                if self.exigir_firmware:
+                    self._recusar('Sem banner do firmware', sessao)
+                    return
+                self._banner_recebido(None)
+            parada = self._parada
+            if parada is not None and (em_voo or proximo is not None):
+                # O movimento em curso foi interrompido e o que já foi escrito depois dele é descartado
+                for cmd in list(em_voo) + ([proximo] if proximo is not None else []):
+                    self._concluir(cmd, CANCELADO_POR_STOP)
+                    parada.cancelados += 1
+                em_voo.clear()
+                proximo = None
+            try:
+                while self.estado in (NEGOCIANDO, PRONTO) and self._parada is None:
+                    if proximo is None:
+                        try:
+                            proximo = self._fila.get_nowait()
+                        except queue.Empty:
+                            break
+                    if not self._cabe_no_voo(proximo, em_voo):
+                        break
+                    cmd, proximo = proximo, None
+                    if cmd.acao is not None:
+                        cmd.enviado_em = time.time()
+                        try:
+                            cmd.acao(self._ser)
+                            self._concluir(cmd)
+                        except Exception as e:
+                            self._concluir(cmd, str(e))
+                        continue
+                    dados = cmd.bytes()
+                    with self._lock_escrita:
+                        if self._parada is not None:
+                            # parar() chegou entre a retirada da fila e a escrita
+                            proximo = cmd
+                            break
+                        self._ser.write(dados)
+                    self.taxas[self.baudrate_atual]['bytes_tx'] += len(dados)
+                    self._ser.flush()
+                    cmd.enviado_em = time.time()
+                    if not em_voo:
+                        cmd.iniciar(cmd.enviado_em)
+                        ultima_linha = cmd.enviado_em
+                    em_voo.append(cmd)
+                    for ouvinte in self._ouvintes_comando:
+                        try:
+                            ouvinte(cmd.texto)
+                        except Exception:
+                            pass
+
+                dados = self._ser.read(self._ser.in_waiting or 1)
+            except Exception as e:
+                for cmd in em_voo:
+                    self._concluir(cmd, str(e))
+                if proximo is not None:
+                    self._concluir(proximo, str(e))
+                self._ativo = False
+                self._falhar_pendentes(str(e))
+                self._mudar_estado(DESCONECTADO)
+                break
+
+            agora = time.time()
+            if dados:
+                self.taxas[self.baudrate_atual]['bytes_rx'] += len(dados)
+                try:
+                    linhas = self.parser.alimentar(dados)
+                except Exception as e:
+                    # Descarta o pedaço e o que estava pendente; a próxima linha recomeça limpa
+                    self.parser.descartar(bytes(dados), e, pendente=True)
+                    linhas = []
+                for linha, eventos in linhas:
+                    self.linhas.append(linha)
+                    if self.estado == AGUARDANDO_BANNER:
+                        m = RE_TITULO.match(linha)
+                        if m:
+                            self.firmware = FIRMWARES.get(m.group(1), m.group(1))
+                        if RE_BANNER.match(linha):
+                            if self.exigir_firmware and self.firmware not in FIRMWARES.values():
+                                self._recusar(f'Firmware desconhecido: {self.firmware}', sessao)
+                                return
+                            self._banner_recebido(linha)
+                    for ouvinte in self._ouvintes:
+                        try:
+                            ouvinte(linha)
+                        except Exception:
+                            pass
+                    for evento in eventos:
+                        for ouvinte in self._ouvintes_evento:
+                            try:
+                                ouvinte(evento)
+                            except Exception:
+                                pass
+                    if parada is not None:
+                        # Fim do movimento interrompido até a confirmação
+                        parada.linhas.append(linha)
+                        if RE_PARADO.match(linha):
+                            parada.confirmada_em = time.perf_counter()
+                            self._liberar_parada(parada)
+                            parada = None
+                    elif em_voo:
+                        atual = em_voo[0]
+                        ultima_linha = agora
+                        fim = atual.terminador.match(linha)
+                        if not (fim and atual.sentinela):
+                            atual.linhas.append(linha)  # O PONG delimitador não faz parte da resposta
+                            if atual.ao_receber is not None:
+                                try:
+                                    atual.ao_receber(linha, eventos)
+                                except Exception:
+                                    pass
+                        if fim:
+                            self._concluir(em_voo.popleft())
+                            if em_voo:
+                                em_voo[0].iniciar(agora)
+
+            if (parada is not None and parada.escrita_em is not None
+                    and time.perf_counter() - parada.escrita_em >= self.timeout_parada):
+                # Firmware sem confirmação (ou sem STOP): libera a fila mesmo assim
+                parada.erro = 'Sem confirmação do firmware'
+                self._liberar_parada(parada)
+
+            if em_voo:
+                atual = em_voo[0]
+                erro = 'Tempo esgotado aguardando resposta' if agora >= atual.prazo else None
+                # Sem terminador: encerrar após silêncio (se já respondeu) ou sem resposta.
+                # Comandos encadeados só terminam pelo delimitador ou pelo prazo.
+                if not atual.encadeado:
+                    if atual.linhas and agora - ultima_linha >= self.silencio:
+                        erro = ''
+                    elif not atual.linhas and agora - atual.enviado_em >= self.espera_inicial:
+                        erro = ''
+                if erro is not None:
+                    self._concluir(em_voo.popleft(), erro or None)
+                    if erro and atual.encadeado:
+                        # Sem o delimitador não dá para saber onde começa a resposta seguinte
+                        while em_voo:
+                            self._concluir(em_voo.popleft(), 'Sequência interrompida por tempo esgotado')
+                    if em_voo:
+                        em_voo[0].iniciar(agora)
+                        ultima_linha = agora
+
+        if self._parada is not None:
+            self._parada.erro = self._parada.erro or 'Desconectado'
+            self._liberar_parada(self._parada)
+        # desconectar(): quem já foi escrito não terá resposta
+        for cmd in list(em_voo) + ([proximo] if proximo is not None else []):
+            if not cmd.concluido.is_set():
+                self._concluir(cmd, 'Desconectado')
+
+    def _liberar_parada(self, parada):
+        if self._parada is parada:
+            self._parada = None
+        parada.concluida.set()
+
+    def _cabe_no_voo(self, cmd, em_voo):
+        """Controle de fluxo: só encadeia se todos são encadeáveis e cabem no buffer do Arduino"""
+        if not em_voo:
+            return True
+        if cmd.acao is not None or not cmd.encadeado or not all(c.encadeado for c in em_voo):
+            return False
+        if len(em_voo) >= self.janela_lote:
+            return False
+        return sum(len(c.bytes()) for c in em_voo) + len(cmd.bytes()) <= self.buffer_rx_firmware
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Difusor de Estado - TV Alice
+Aplica os eventos do parser da conexão ao último estado em cache
+(versionado) e o envia a todos os navegadores conectados (Server-Sent
+Events), junto com os eventos que não são estado (IR, progresso, fim de
+movimento)
+"""
+
+import json
+import queue
+import threading
+import time
+
+from parser_firmware import (estado_inicial, aplicar_evento, FIM_STATUS, PROGRESSO,
+                             MOVIMENTO_CONCLUIDO, PARADO, COMANDO_INVALIDO, COMANDO_IR)
+from conexao_serial import ABRINDO, PRONTO
+
+# Comandos que alteram posição ou mapeamento e invalidam o cache
+COMANDOS_MOVIMENTO = ('CIMA', 'BAIXO', 'GOTO', 'MARK', 'RESET', 'CLEAR',
+                      'F:', 'B:', 'R:', 'NEXT', 'PREV', 'HOME', 'LOAD', 'PAGE:', 'SYNC:',
+                      'SETPOS:', 'SETMAP:')
+
+# Eventos repassados aos navegadores como SSE 'firmware' (os demais já chegam no estado)
+EVENTOS_PUBLICADOS = (PROGRESSO, MOVIMENTO_CONCLUIDO, PARADO, COMANDO_INVALIDO, COMANDO_IR)
+
+
+def comando_de_movimento(texto):
+    return texto.strip().upper().startswith(COMANDOS_MOVIMENTO)
+
+
+class DifusorEstado:
+    """Publica mudanças de estado para N clientes com um único leitor serial"""
+
+    def __init__(self, conexao, intervalo_status=3.0, capacidade_fila=100, intervalo_keepalive=15.0):
+        self.conexao = conexao
+        self.intervalo_status = intervalo_status  # STATUS periódico compartilhado (s)
+        self.capacidade_fila = capacidade_fila
+        self.intervalo_keepalive = intervalo_keepalive
+        self.estado_firmware = estado_inicial()
+        self.versao = 0           # Incrementa a cada mudança de estado
+        self.atualizado_em = None
+        self._carregado = threading.Event()  # Algum STATUS completo desde a conexão
+        self._valido = threading.Event()     # Nenhum movimento desde o último STATUS
+        self._atualizacao = None
+        self._assinantes = []
+        self._lock = threading.Lock()
+        conexao.adicionar_ouvinte_evento(self._receber_evento)
+        conexao.adicionar_ouvinte_comando(self._comando_enviado)
+        conexao.adicionar_ouvinte_estado(self._conexao_mudou)
+        threading.Thread(target=self._consultar_periodicamente, name='status-tv-alice', daemon=True).start()
+
+    @property
+    def estado(self):
+        with self._lock:
+            return self._instantaneo()
+
+    @property
+    def valido(self):
+        return self._valido.is_set()
+
+    def _instantaneo(self):
+        return dict(self.estado_firmware, versao=self.versao, atualizado_em=self.atualizado_em,
+                    valido=self._valido.is_set(), estado_conexao=self.conexao.estado)
+
+    @property
+    def carregado(self):
+        return self._carregado.is_set()
+
+    def reiniciar(self):
+        """Descarta o estado anterior (nova conexão)"""
+        with self._lock:
+            self.estado_firmware = estado_inicial()
+            self._carregado.clear()
+            self._valido.clear()
+
+    def invalidar(self):
+        """Marca o cache como desatualizado e agenda um STATUS em segundo plano"""
+        self._valido.clear()
+        self.atualizar()
+
+    def atualizar(self):
+        """Enfileira um STATUS, a menos que já exista um pendente"""
+        if not self.conexao.conectado:
+            return
+        with self._lock:
+            if self._atualizacao is not None and not self._atualizacao.concluido.is_set():
+                return
+            self._atualizacao = self.conexao.enfileirar('STATUS', timeout=2.5)
+
+    def aguardar_carregado(self, timeout=2.5):
+        """Garante que o cache tem ao menos um STATUS completo"""
+        if not self.carregado:
+            self.atualizar()
+        return self._carregado.wait(timeout)
+
+    def aguardar_valido(self, timeout=2.5):
+        """Garante um STATUS completo posterior ao último movimento"""
+        if not self.valido:
+            self.atualizar()
+        return self._valido.wait(timeout)
+
+    @property
+    def total_assinantes(self):
+        with self._lock:
+            return len(self._assinantes)
+
+    def assinar(self, fila=None):
+        """Registra um cliente e retorna sua fila de eventos
+
+        fila: qualquer objeto com put_nowait/get_nowait (ex.: a ponte do
+        servidor asyncio); por padrão uma queue.Queue nova.
+        """
+        if fila is None:
+            fila = queue.Queue(maxsize=self.capacidade_fila)
+        with self._lock:
+            self._assinantes.append(fila)
+        return fila
+
+    def cancelar(self, fila):
+        with self._lock:
+            if fila in self._assinantes:
+                self._assinantes.remove(fila)
+
+    def publicar(self, dados, evento=None):
+        """Entrega a todos os clientes (descarta o mais antigo se a fila encher)
+
+        Sem evento é o estado (onmessage no navegador); com evento, um SSE
+        nomeado (addEventListener(evento, ...)), ex.: 'trabalho'.
+        """
+        item = (evento, dados)
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for fila in assinantes:
+            try:
+                fila.put_nowait(item)
+            except queue.Full:
+                try:
+                    fila.get_nowait()
+                except queue.Empty:
+                    pass
+                fila.put_nowait(item)
+
+    def fluxo_sse(self):
+        """Gerador de texto 'text/event-stream' para uma rota Flask"""
+        fila = self.assinar()
+        try:
+            yield f"data: {json.dumps(self.estado)}\n\n"
+            while True:
+                try:
+                    evento, dados = fila.get(timeout=self.intervalo_keepalive)
+                    if evento:
+                        yield f"event: {evento}\ndata: {json.dumps(dados)}\n\n"
+                    else:
+                        yield f"data: {json.dumps(dados)}\n\n"
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            self.cancelar(fila)
+
+    def _receber_evento(self, evento):
+        """Chamado pela thread serial para cada evento do parser"""
+        with self._lock:
+            mudou = aplicar_evento(self.estado_firmware, evento)
+            estado = None
+            if mudou:
+                self.versao += 1
+                self.atualizado_em = time.time()
+                estado = self._instantaneo()
+        if evento.tipo == FIM_STATUS:
+            self._carregado.set()
+            self._valido.set()
+        if estado is not None:
+            self.publicar(estado)
+        if evento.tipo in EVENTOS_PUBLICADOS:
+            self.publicar(dict(evento.dados, tipo=evento.tipo), evento='firmware')
+
+    def _conexao_mudou(self, estado_conexao):
+        """Nova conexão zera o cache; ao ficar pronta busca um STATUS"""
+        if estado_conexao == ABRINDO:
+            self.reiniciar()
+        with self._lock:
+            self.versao += 1
+            self.atualizado_em = time.time()
+            estado = self._instantaneo()
+        self.publicar(estado)
+        if estado_conexao == PRONTO:
+            self.atualizar()
+
+    def _comando_enviado(self, texto):
+        """Chamado pela thread serial: movimentos invalidam o cache"""
+        if comando_de_movimento(texto):
+            self.invalidar()
+
+    def _consultar_periodicamente(self):
+        """Um único STATUS por intervalo, independente do número de clientes"""
+        while True:
+            time.sleep(self.intervalo_status)
+            if self.total_assinantes > 0:
+                self.atualizar()
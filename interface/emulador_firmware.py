@@ -0,0 +1,1200 @@
+#!/usr/bin/env python3
+"""
+Emulador de Firmware - TV Alice
+Imita calibracao.ino, calibracao_simples.ino e motor_com_ir.ino num
+pseudo-terminal: as interfaces abrem a porta impressa (ex.: /dev/pts/5)
+como se fosse o Arduino, sem mudar nada nelas. A serial anda no ritmo do
+baudrate (10 bits por byte, buffers de 64 bytes do Uno), cada passo dura
+delayUs (ou a rampa do ACEL) mais o pulso, e abrir a porta reinicia o
+firmware como o DTR reinicia o Uno, então latência e vazão medidas aqui
+seguem as do hardware
+"""
+
+import argparse
+import errno
+import json
+import math
+import os
+import re
+import select
+import termios
+import threading
+import time
+import tty
+
+from protocolo_compacto import codificar_quadro
+from geometria_espiral import GeometriaEspiral
+
+BUFFER_SERIAL = 64  # Buffers de recepção e transmissão do Arduino Uno (bytes)
+BITS_POR_BYTE = 10  # 8N1: início + 8 dados + parada
+
+# Depois do reset pelo DTR o optiboot espera ~1 s por um upload antes do sketch
+ATRASO_BOOTLOADER_MS = 1000
+
+# Velocidades que o termios informa; as demais (BOTHER) não são verificadas
+VELOCIDADES_TERMIOS = {getattr(termios, f'B{v}'): v
+                       for v in (9600, 19200, 38400, 57600, 115200, 230400, 460800, 500000, 921600)
+                       if hasattr(termios, f'B{v}')}
+
+RE_INTEIRO = re.compile(r'^\s*([-+]?\d+)')
+
+
+def to_int(texto):
+    """String.toInt() do Arduino: inteiro do início do texto, 0 se não houver"""
+    m = RE_INTEIRO.match(texto)
+    return int(m.group(1)) if m else 0
+
+
+def to_float(texto):
+    """String.toFloat() do Arduino"""
+    m = re.match(r'^\s*([-+]?\d*\.?\d+)', texto)
+    return float(m.group(1)) if m else 0.0
+
+
+class _Reinicio(Exception):
+    """O host reabriu a porta: o firmware volta ao setup()"""
+
+
+class PortaPty:
+    """Lado "Arduino" de um pseudo-terminal, com o tempo de fio da serial
+
+    Recepção e transmissão passam por buffers de 64 bytes: o que chega com o
+    buffer de recepção cheio é perdido (como no Uno) e println bloqueia com
+    o de transmissão cheio. Se o host estiver noutra velocidade conhecida,
+    os bytes viram ruído e são descartados nos dois sentidos.
+    """
+
+    def __init__(self, baudrate=9600, link=None):
+        self.baudrate = baudrate
+        self.link = link         # Caminho fixo (symlink) para a porta, opcional
+        self.nome = None
+        self.sessao = 0          # Incrementada a cada abertura pelo host
+        self.host_conectado = False
+        self.bytes_rx = 0
+        self.bytes_tx = 0
+        self.descartados_rx = 0  # Perdidos com o buffer de recepção cheio
+        self.ruido = 0           # Bytes trocados com o host em outra velocidade
+        self._mestre = None
+        self._rx = bytearray()
+        self._tx = bytearray()
+        self._tx_em_curso = False
+        self._ativa = False
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def abrir(self):
+        self._mestre, escravo = os.openpty()
+        tty.setraw(escravo)
+        self.nome = os.ttyname(escravo)
+        os.close(escravo)  # Sem escravo aberto a leitura dá EIO até o host abrir
+        if self.link:
+            if os.path.islink(self.link):
+                os.remove(self.link)
+            os.symlink(self.nome, self.link)
+        self._ativa = True
+        for alvo, nome in ((self._receber, 'pty-rx'), (self._transmitir, 'pty-tx')):
+            thread = threading.Thread(target=alvo, name=nome, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self.nome
+
+    def fechar(self):
+        with self._cond:
+            self._ativa = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        if self.link and os.path.islink(self.link):
+            os.remove(self.link)
+        if self._mestre is not None:
+            os.close(self._mestre)
+            self._mestre = None
+
+    # --- Lado do firmware ---
+
+    def aguardar_host(self, timeout=None):
+        """Bloqueia até o host abrir a porta; retorna a sessão"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.host_conectado or not self._ativa, timeout)
+            return self.sessao
+
+    def disponivel(self):
+        with self._cond:
+            return len(self._rx)
+
+    def ler(self, n=None):
+        """Serial.read(): retira até n bytes do buffer de recepção"""
+        with self._cond:
+            n = len(self._rx) if n is None else min(n, len(self._rx))
+            dados = bytes(self._rx[:n])
+            del self._rx[:n]
+            return dados
+
+    def aguardar_dados(self, timeout):
+        with self._cond:
+            self._cond.wait_for(lambda: self._rx or not self._ativa, timeout)
+
+    def escrever(self, dados):
+        """Serial.write(): bloqueia enquanto o buffer de transmissão estiver cheio"""
+        with self._cond:
+            while dados and self._ativa:
+                self._cond.wait_for(lambda: len(self._tx) < BUFFER_SERIAL or not self._ativa)
+                livre = BUFFER_SERIAL - len(self._tx)
+                self._tx += dados[:livre]
+                dados = dados[livre:]
+                self._cond.notify_all()
+
+    def esvaziar(self):
+        """Serial.flush(): espera o último byte sair pelo fio"""
+        with self._cond:
+            self._cond.wait_for(lambda: (not self._tx and not self._tx_em_curso) or not self._ativa)
+
+    # --- Fio ---
+
+    def _pedaco(self):
+        """Bytes por fatia de tempo: ~1 ms de fio, no mínimo 8"""
+        return max(8, self.baudrate // (BITS_POR_BYTE * 1000))
+
+    def _tempo_de_fio(self, n):
+        return n * BITS_POR_BYTE / self.baudrate
+
+    def _velocidade_divergente(self):
+        try:
+            velocidade = termios.tcgetattr(self._mestre)[5]
+        except termios.error:
+            return False
+        host = VELOCIDADES_TERMIOS.get(velocidade)
+        return host is not None and host != self.baudrate
+
+    def _host_abriu(self):
+        with self._cond:
+            self.host_conectado = True
+            self.sessao += 1
+            self._rx.clear()
+            self._tx.clear()
+            self._cond.notify_all()
+
+    def _host_fechou(self):
+        with self._cond:
+            self.host_conectado = False
+            self._cond.notify_all()
+
+    def _receber(self):
+        """Thread: host → buffer de recepção, no ritmo do baudrate"""
+        while self._ativa:
+            try:
+                prontos, _, _ = select.select([self._mestre], [], [], 0.05)
+            except (OSError, ValueError):
+                break
+            if not prontos:
+                if not self.host_conectado:
+                    self._host_abriu()  # Aberta sem dados: o select não acusa mais o EIO
+                continue
+            try:
+                dados = os.read(self._mestre, self._pedaco())
+            except OSError as e:
+                if e.errno != errno.EIO:
+                    raise
+                if self.host_conectado:
+                    self._host_fechou()
+                time.sleep(0.05)
+                continue
+            if not self.host_conectado:
+                self._host_abriu()
+            time.sleep(self._tempo_de_fio(len(dados)))
+            self.bytes_rx += len(dados)
+            if self._velocidade_divergente():
+                self.ruido += len(dados)
+                continue
+            with self._cond:
+                livre = BUFFER_SERIAL - len(self._rx)
+                self._rx += dados[:livre]
+                self.descartados_rx += max(0, len(dados) - livre)
+                self._cond.notify_all()
+
+    def _transmitir(self):
+        """Thread: buffer de transmissão → host, no ritmo do baudrate"""
+        prazo = time.perf_counter()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._tx or not self._ativa)
+                if not self._ativa:
+                    return
+                pedaco = bytes(self._tx[:self._pedaco()])
+                del self._tx[:len(pedaco)]
+                self._tx_em_curso = True
+                self._cond.notify_all()
+            # O byte chega ao host quando termina de passar pelo fio
+            prazo = max(prazo, time.perf_counter()) + self._tempo_de_fio(len(pedaco))
+            espera = prazo - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            if not self.host_conectado:
+                pass  # Ninguém do outro lado: os bytes se perdem
+            elif self._velocidade_divergente():
+                self.ruido += len(pedaco)
+            else:
+                try:
+                    os.write(self._mestre, pedaco)
+                    self.bytes_tx += len(pedaco)
+                except OSError:
+                    pass
+            with self._cond:
+                self._tx_em_curso = False
+                self._cond.notify_all()
+
+    def estatisticas(self):
+        return {
+            'porta': self.nome,
+            'baudrate': self.baudrate,
+            'host_conectado': self.host_conectado,
+            'sessoes': self.sessao,
+            'bytes_rx': self.bytes_rx,
+            'bytes_tx': self.bytes_tx,
+            'descartados_rx': self.descartados_rx,
+            'ruido': self.ruido,
+        }
+
+
+class FirmwareEmulado:
+    """Base dos firmwares: setup()/loop() do Arduino sobre uma PortaPty
+
+    escala_tempo multiplica os atrasos do firmware (passos, delay());
+    0 executa os movimentos sem esperar. O tempo de fio da serial não
+    escala. A EEPROM sobrevive aos reinícios e, com arquivo_eeprom, ao
+    processo.
+    """
+
+    TITULO = None
+    BAUDRATE_BOOT = 9600
+
+    def __init__(self, porta, escala_tempo=1.0, arquivo_eeprom=None):
+        self.porta = porta
+        self.escala_tempo = escala_tempo
+        self.arquivo_eeprom = arquivo_eeprom
+        self.eeprom = {}
+        if arquivo_eeprom and os.path.exists(arquivo_eeprom):
+            with open(arquivo_eeprom) as f:
+                self.eeprom = json.load(f)
+        self.reinicios = 0
+        self._sessao = None
+        self._prazo = 0.0
+        self._ativo = False
+
+    def executar(self):
+        """Laço principal (bloqueia): um boot a cada abertura da porta pelo host"""
+        self._ativo = True
+        while self._ativo:
+            sessao = self.porta.aguardar_host(timeout=0.5)
+            if not self.porta.host_conectado or sessao == self._sessao:
+                continue
+            self._sessao = sessao
+            self.reinicios += 1
+            self.porta.baudrate = self.BAUDRATE_BOOT
+            try:
+                self.delay_ms(ATRASO_BOOTLOADER_MS)
+                self.iniciar()
+                self.setup()
+                while self._ativo:
+                    self.loop()
+                    if self.escala_tempo <= 0:
+                        self.porta.aguardar_dados(0.01)  # Sem atrasos o loop() giraria em vão
+            except _Reinicio:
+                continue
+
+    def parar(self):
+        self._ativo = False
+
+    # --- "Arduino" ---
+
+    def println(self, texto=''):
+        self.porta.escrever(texto.encode() + b'\r\n')
+
+    def millis(self):
+        return time.monotonic() * 1000.0
+
+    def delay_us(self, us):
+        """delayMicroseconds(): dorme em fatias de 1 ms e compensa o atraso acumulado"""
+        if self.porta.sessao != self._sessao or not self._ativo:
+            raise _Reinicio()
+        if self.escala_tempo <= 0:
+            return
+        agora = time.perf_counter()
+        if self._prazo < agora - 0.002:
+            self._prazo = agora  # O tempo gasto em outro lugar (ex.: serial cheia) já passou
+        self._prazo += us * self.escala_tempo / 1e6
+        espera = self._prazo - agora
+        if espera > 0.001:
+            time.sleep(espera)
+
+    def delay_ms(self, ms):
+        self.delay_us(ms * 1000)
+
+    def ler_ate(self, terminador=b'\n', timeout_ms=1000):
+        """Serial.readStringUntil(): lê até o terminador ou o timeout entre bytes"""
+        dados = bytearray()
+        limite = self.millis() + timeout_ms
+        while self.millis() < limite:
+            if self.porta.sessao != self._sessao or not self._ativo:
+                raise _Reinicio()
+            byte = self.porta.ler(1)
+            if not byte:
+                self.porta.aguardar_dados(0.001)
+                continue
+            if byte == terminador:
+                break
+            dados += byte
+            limite = self.millis() + timeout_ms
+        return dados.decode('utf-8', errors='replace')
+
+    def gravar_eeprom(self, dados):
+        self.eeprom = dados
+        if self.arquivo_eeprom:
+            with open(self.arquivo_eeprom, 'w') as f:
+                json.dump(dados, f)
+
+    # --- Implementado por cada firmware ---
+
+    def iniciar(self):
+        """Variáveis globais no reset"""
+
+    def setup(self):
+        raise NotImplementedError
+
+    def loop(self):
+        raise NotImplementedError
+
+
+class _MapaPaginas(FirmwareEmulado):
+    """Estado comum aos dois firmwares de calibração"""
+
+    MAX_PAGINAS = 30
+    MAGIC = None
+
+    def iniciar(self):
+        self.paginas = [[0, False] for _ in range(self.MAX_PAGINAS)]  # [passos_acumulados, definida]
+        self.pagina_atual = 0
+        self.passos_atual = 0
+        self.total_paginas_definidas = 0
+        self.delay_us_passo = 5000
+        self.parar_motor = False
+
+    def salvar_eeprom(self):
+        self.gravar_eeprom({
+            'magic': self.MAGIC,
+            'total': self.total_paginas_definidas,
+            'pagina': self.pagina_atual,
+            'passos': self.passos_atual,
+            'paginas': self.paginas,
+        })
+
+    def carregar_eeprom(self):
+        if self.eeprom.get('magic') != self.MAGIC:
+            return False
+        self.total_paginas_definidas = self.eeprom['total']
+        self.pagina_atual = self.eeprom['pagina']
+        self.passos_atual = self.eeprom['passos']
+        self.paginas = [list(p) for p in self.eeprom['paginas']]
+        return True
+
+    def progresso(self, i, passos):
+        if i == 0 or (i + 1) % 10 == 0 or i == passos - 1:
+            self.println(f"  [{i + 1}/{passos}] Passos acumulados: {self.passos_atual}")
+
+
+class Calibracao(_MapaPaginas):
+    """calibracao.ino: mapeamento de páginas, PROTO:KV, BAUD, ACEL, SETPOS, SETMAP e parada '!'"""
+
+    TITULO = 'SISTEMA DE CALIBRAÇÃO - TV ALICE'
+    MAGIC = 0xABCD
+    PARADA_IMEDIATA = ord('!')
+    RX_MAX = 64
+    BAUDRATES = (9600, 115200, 250000, 500000)
+
+    def iniciar(self):
+        super().iniciar()
+        self.modo_compacto = False
+        self.rampa_inicial_us = 0
+        self.rampa_cruzeiro_us = 0
+        self.rampa_passos = 0
+        self.rx_buf = bytearray()
+        self.parada_solicitada = False
+
+    def setup(self):
+        self.delay_ms(100)
+        if self.carregar_eeprom():
+            self.println(">>> Mapeamento carregado da EEPROM")
+        else:
+            self.println(">>> Nenhum mapeamento encontrado na EEPROM")
+        self.println(f"=== {self.TITULO} ===")
+        self.println("")
+        self.println("Comandos disponíveis:")
+        for linha in ("  RESET      - Define posição atual como início",
+                      "  MARK       - Marca fim da página atual",
+                      "  F:N        - Move N passos para frente",
+                      "  B:N        - Move N passos para trás",
+                      "  NEXT       - Vai para próxima página",
+                      "  PREV       - Vai para página anterior",
+                      "  GOTO:P     - Vai para página P",
+                      "  SAVE       - Salva mapeamento na EEPROM",
+                      "  LOAD       - Carrega mapeamento da EEPROM",
+                      "  STATUS     - Mostra estado completo",
+                      "  CLEAR      - Limpa mapeamento",
+                      "  PROTO:KV   - Status em quadros compactos (PROTO:TXT volta)",
+                      "  BAUD:N     - Troca velocidade da serial (confirmar com PING)",
+                      "  ACEL:I,C,N - Rampa dos movimentos de página (us inicial, us cruzeiro, passos)",
+                      "  SETMAP:P=N,... - Define páginas e grava só essas entradas na EEPROM",
+                      "  !          - Parada imediata (também durante movimentos)"):
+            self.println(linha)
+        self.println("")
+        self.mostrar_status()
+        self.println(">>> Pronto!")
+
+    def loop(self):
+        self.receber_serial()
+        while True:
+            cmd = self.proxima_linha()
+            if cmd is None:
+                break
+            self.processar_comando(cmd.strip().upper())
+            self.receber_serial()
+        # A confirmação sai por último, depois das linhas finais do movimento interrompido
+        if self.parada_solicitada:
+            self.parada_solicitada = False
+            self.parar_motor = False
+            self.println(">>> Parado")
+        self.delay_ms(10)
+
+    def receber_serial(self):
+        for byte in self.porta.ler():
+            if byte == self.PARADA_IMEDIATA:
+                self.parar_motor = True
+                self.parada_solicitada = True
+                self.rx_buf.clear()
+            elif len(self.rx_buf) < self.RX_MAX:
+                self.rx_buf.append(byte)
+
+    def proxima_linha(self):
+        fim = self.rx_buf.find(b'\n')
+        if fim < 0:
+            if len(self.rx_buf) == self.RX_MAX:
+                self.rx_buf.clear()  # Linha maior que o buffer: descartar
+            return None
+        linha = bytes(self.rx_buf[:fim])
+        del self.rx_buf[:fim + 1]
+        return linha.decode('utf-8', errors='replace')
+
+    def processar_comando(self, cmd):
+        if cmd == 'STOP':
+            self.parar_motor = True
+            self.parada_solicitada = True
+        elif cmd == 'RESET':
+            self.parar_motor = True
+            self.passos_atual = 0
+            self.pagina_atual = 0
+            self.paginas[0] = [0, False]
+            self.total_paginas_definidas = 0
+            self.println(">>> RESET: Posição definida como início (0 passos)")
+            self.println(">>> Página atual resetada para 0")
+            self.println(">>> Mapeamento da página 0 limpo - marque novamente")
+            self.mostrar_status()
+        elif cmd == 'MARK':
+            self.marcar_pagina()
+        elif cmd.startswith('F:'):
+            passos = to_int(cmd[2:])
+            if passos > 0:
+                self.mover_passos(passos, True, False)
+        elif cmd.startswith('B:'):
+            passos = to_int(cmd[2:])
+            if passos > 0:
+                self.mover_passos(passos, False, False)
+        elif cmd == 'NEXT':
+            self.ir_para_pagina(self.pagina_atual + 1)
+        elif cmd == 'PREV':
+            self.ir_para_pagina(self.pagina_atual - 1)
+        elif cmd.startswith('GOTO:'):
+            self.ir_para_pagina(to_int(cmd[5:]))
+        elif cmd == 'HOME':
+            self.ir_para_pagina(0)
+        elif cmd == 'SAVE':
+            self.salvar_eeprom()
+            self.println(">>> Mapeamento salvo na EEPROM!")
+        elif cmd == 'LOAD':
+            self.carregar_eeprom()
+            self.mostrar_status()
+        elif cmd in ('STATUS', 'S'):
+            self.mostrar_status()
+        elif cmd == 'CLEAR':
+            self.limpar_mapeamento()
+        elif cmd == 'PROTO:KV':
+            self.modo_compacto = True
+            self.println(">>> PROTO:KV")
+        elif cmd == 'PROTO:TXT':
+            self.modo_compacto = False
+            self.println(">>> PROTO:TXT")
+        elif cmd.startswith('BAUD:'):
+            self.trocar_baudrate(to_int(cmd[5:]))
+        elif cmd.startswith('SETPOS:'):
+            virgula = cmd.find(',')
+            pagina = to_int(cmd[7:virgula]) if virgula > 7 else -1
+            if 0 <= pagina < self.MAX_PAGINAS:
+                self.pagina_atual = pagina
+                self.passos_atual = to_int(cmd[virgula + 1:])
+                self.println(">>> Posição restaurada")
+                self.mostrar_status()
+            else:
+                self.println(">>> Posição inválida")
+        elif cmd.startswith('SETMAP:'):
+            self.aplicar_mapa(cmd[7:])
+        elif cmd.startswith('ACEL:'):
+            self.configurar_rampa(cmd)
+        elif cmd == 'PING':
+            self.println(">>> PONG")
+        elif cmd:
+            self.println(f">>> Comando inválido: {cmd}")
+
+    def aplicar_mapa(self, entradas):
+        """SETMAP: valida todas as entradas antes de alterar; grava só as recebidas"""
+        novas = []
+        for entrada in entradas.split(',') if entradas else []:
+            pagina, igual, valor = entrada.partition('=')
+            if not pagina or not igual or not valor:
+                self.println(">>> Mapa inválido")
+                return
+            pagina, definida = to_int(pagina), valor != '-'
+            if not 0 <= pagina < self.MAX_PAGINAS or (definida and to_int(valor) < 0):
+                self.println(">>> Mapa inválido")
+                return
+            novas.append((pagina, to_int(valor) if definida else 0, definida))
+        for pagina, passos, definida in novas:
+            self.paginas[pagina] = [passos, definida]
+        self.total_paginas_definidas = max((i + 1 for i, (_, d) in enumerate(self.paginas) if d), default=0)
+        if self.eeprom.get('magic') != self.MAGIC:
+            self.salvar_eeprom()  # Como o saveToEEPROM do firmware, avisa antes do SETMAP
+            self.println(">>> Mapeamento salvo na EEPROM!")
+        else:
+            eeprom = dict(self.eeprom, total=self.total_paginas_definidas,
+                          paginas=[list(p) for p in self.eeprom['paginas']])
+            for pagina, passos, definida in novas:
+                eeprom['paginas'][pagina] = [passos, definida]
+            self.gravar_eeprom(eeprom)
+        self.println(f">>> SETMAP:{len(novas)}")
+
+    def configurar_rampa(self, cmd):
+        v1 = cmd.find(',')
+        v2 = cmd.find(',', v1 + 1) if v1 >= 0 else -1
+        inicial = to_int(cmd[5:v1]) if v1 > 5 else -1
+        cruzeiro = to_int(cmd[v1 + 1:v2]) if v2 > v1 else -1
+        passos = to_int(cmd[v2 + 1:]) if v2 > v1 else -1
+        if passos == 0:
+            self.rampa_passos = 0
+            self.println(">>> ACEL:0,0,0")
+        elif 200 <= inicial <= 16000 and 200 <= cruzeiro <= inicial and 0 < passos <= 10000:
+            self.rampa_inicial_us, self.rampa_cruzeiro_us, self.rampa_passos = inicial, cruzeiro, passos
+            self.println(f">>> ACEL:{inicial},{cruzeiro},{passos}")
+        else:
+            self.println(">>> Aceleração inválida")
+
+    def trocar_baudrate(self, novo):
+        if novo not in self.BAUDRATES:
+            self.println(">>> Baudrate inválido")
+            return
+        self.println(f">>> BAUD:{novo}")
+        self.porta.esvaziar()  # A confirmação sai na velocidade antiga
+        self.porta.baudrate = novo
+        inicio = self.millis()
+        while self.millis() - inicio < 1000:
+            if self.porta.disponivel():
+                if self.ler_ate().strip().upper() == 'PING':
+                    self.println(">>> PONG")
+                    return
+            else:
+                self.porta.aguardar_dados(0.01)
+        # Host não confirmou: voltar à velocidade padrão
+        self.porta.baudrate = 9600
+        self.println(">>> BAUD:9600")
+
+    def marcar_pagina(self):
+        if self.passos_atual < 0:
+            self.println(">>> ERRO: Passos acumulados estão negativos!")
+            self.println(">>> Use HOME para voltar ao início antes de marcar.")
+            self.println(">>> Ou execute RESET para recalibrar do zero.")
+            return
+        atual = self.pagina_atual
+        self.paginas[atual] = [self.passos_atual, True]
+        if atual >= self.total_paginas_definidas:
+            self.total_paginas_definidas = atual + 1
+        self.println(f">>> Página {atual} marcada com {self.passos_atual} passos acumulados")
+        if atual > 0 and self.paginas[atual - 1][1]:
+            self.println(f"    Passos da página: {self.passos_atual - self.paginas[atual - 1][0]}")
+        elif atual == 0:
+            self.println("    (Página inicial)")
+        self.pagina_atual += 1
+        if self.pagina_atual >= self.MAX_PAGINAS:
+            self.pagina_atual = self.MAX_PAGINAS - 1
+            self.println(">>> Aviso: Limite de páginas atingido!")
+        self.println(f">>> Próxima página: {self.pagina_atual} (mova o papel e marque quando estiver na posição)")
+        self.mostrar_status()
+
+    def mover_passos(self, passos, frente, com_rampa):
+        if passos <= 0:
+            self.println(">>> Número de passos inválido!")
+            return
+        self.delay_us(100)  # Direção estabilizando
+        self.println(f">>> Movendo {passos} passos {'(frente)' if frente else '(trás)'}")
+        self.parar_motor = False
+        # Trapézio: v = sqrt(v0² + 2·a·d), d = passos desde o início ou até o fim
+        rampa = com_rampa and self.rampa_passos > 0
+        if rampa:
+            v0 = 1e6 / self.rampa_inicial_us
+            vmax = 1e6 / self.rampa_cruzeiro_us
+            dois_a = (vmax * vmax - v0 * v0) / self.rampa_passos
+        for i in range(passos):
+            atraso = self.delay_us_passo
+            if rampa:
+                d = min(i, passos - 1 - i)
+                atraso = int(1e6 / math.sqrt(v0 * v0 + dois_a * d)) if d < self.rampa_passos else self.rampa_cruzeiro_us
+            self.delay_us(20 + atraso)  # Pulsos de X e Y + atraso entre passos
+            self.passos_atual += 1 if frente else -1
+            self.receber_serial()
+            if self.modo_compacto:
+                if i == 0 or (i + 1) % 10 == 0 or i == passos - 1:
+                    self.println(codificar_quadro('P', {'s': self.passos_atual, 'i': i + 1, 'n': passos}))
+            else:
+                self.progresso(i, passos)
+            if self.parar_motor:
+                self.println(">>> Movimento interrompido!")
+                break
+        if self.modo_compacto:
+            self.println(codificar_quadro('D', {'s': self.passos_atual}))
+        else:
+            self.println(f">>> Concluído. Passos acumulados: {self.passos_atual}")
+
+    def ir_para_pagina(self, destino):
+        if not 0 <= destino < self.MAX_PAGINAS:
+            self.println(f">>> Página inválida: {destino}")
+            return
+        if destino == 0:
+            self.println(">>> Indo para HOME (Página 0)")
+            if self.passos_atual == 0:
+                self.println(">>> Já está no HOME")
+                self.pagina_atual = 0
+                self.mostrar_status()
+                return
+            passos = abs(self.passos_atual)
+            frente = self.passos_atual < 0
+            self.println(f">>> Movendo {passos} passos {'(frente)' if frente else '(trás)'}")
+            self.mover_passos(passos, frente, True)
+            if self.parar_motor:
+                return  # Interrompido: passos_atual já reflete onde parou
+            self.pagina_atual = 0
+            self.passos_atual = 0
+            self.println(">>> HOME alcançado (0 passos)")
+            self.mostrar_status()
+            return
+        passos_destino, definida = self.paginas[destino]
+        if not definida:
+            self.println(f">>> Página {destino} ainda não foi marcada!")
+            return
+        delta = passos_destino - self.passos_atual
+        if delta == 0:
+            self.println(">>> Já está na posição desta página")
+            self.pagina_atual = destino
+            return
+        self.println(f">>> Indo para página {destino} ({abs(delta)} passos)")
+        self.mover_passos(abs(delta), delta > 0, True)
+        if self.parar_motor:
+            return
+        self.pagina_atual = destino
+        self.passos_atual = passos_destino
+
+    def mostrar_status(self):
+        if self.modo_compacto:
+            mapa = [{'numero': i, 'passos': p} for i, (p, definida) in enumerate(self.paginas) if definida]
+            self.println(codificar_quadro('S', {'p': self.pagina_atual, 's': self.passos_atual,
+                                                't': self.total_paginas_definidas, 'v': self.delay_us_passo,
+                                                'm': mapa}))
+            return
+        self.println("--- STATUS ---")
+        self.println(f"Página atual: {self.pagina_atual}")
+        self.println(f"Passos acumulados: {self.passos_atual}")
+        self.println(f"Total de páginas definidas: {self.total_paginas_definidas}")
+        self.println("")
+        self.println("Mapeamento:")
+        self.println("Pág | Passos Acum | Passos Pág | Status")
+        self.println("----|-------------|------------|--------")
+        for i in range(min(self.total_paginas_definidas + 1, self.MAX_PAGINAS)):
+            linha = f" {i:>2}  | "
+            passos, definida = self.paginas[i]
+            if definida:
+                linha += f"{passos:<11}| "
+                if i > 0 and self.paginas[i - 1][1]:
+                    linha += f"{passos - self.paginas[i - 1][0]:<10}"
+                else:
+                    linha += "     -    "
+                linha += "|  ✓"
+            else:
+                linha += "     -     |     -    |  ⏳"
+            self.println(linha)
+        self.println("-------------")
+
+    def limpar_mapeamento(self):
+        self.paginas = [[0, False] for _ in range(self.MAX_PAGINAS)]
+        self.pagina_atual = 0
+        self.passos_atual = 0
+        self.total_paginas_definidas = 0
+        self.println(">>> Mapeamento limpo!")
+        self.mostrar_status()
+
+
+class CalibracaoSimples(_MapaPaginas):
+    """calibracao_simples.ino: CIMA/BAIXO, MARK:N e GOTO a 115200 baud, sem parada"""
+
+    TITULO = 'TV ALICE - CALIBRAÇÃO'
+    BAUDRATE_BOOT = 115200
+    MAGIC = 0xAA55
+    PASSOS_CIMA_BAIXO = {'': 1, '10': 10, '100': 100, '400': 400}
+
+    def setup(self):
+        self.carregar()
+        self.println(f"\n=== {self.TITULO} ===")
+        for linha in ("Comandos disponíveis:",
+                      "  RESET - Resetar para ponto inicial",
+                      "  STATUS - Mostrar passo atual e páginas",
+                      "  CIMA - Mover 1 passo para cima",
+                      "  BAIXO - Mover 1 passo para baixo",
+                      "  CIMA10, CIMA100, CIMA400 - Mover N passos para cima",
+                      "  BAIXO10, BAIXO100, BAIXO400 - Mover N passos para baixo",
+                      "  MARK - Marcar página atual",
+                      "  MARK:N - Marcar página específica N",
+                      "  GOTO:0, GOTO:1, ... - Ir para página N",
+                      "  SAVE - Salvar mapeamento",
+                      "  LOAD - Carregar mapeamento",
+                      "  CLEAR - Limpar mapeamento"):
+            self.println(linha)
+        self.println("\n>>> Aguardando comandos...\n")
+        self.mostrar_status()
+
+    def loop(self):
+        # Sem delay() no loop: responde assim que a linha chega
+        if self.porta.disponivel():
+            cmd = self.ler_ate().strip().upper()
+            if cmd:
+                self.println(f">>> Comando: [{cmd}]")
+                self.processar_comando(cmd)
+        else:
+            self.porta.aguardar_dados(0.01)
+            self.delay_us(0)  # Só verifica se o host reabriu a porta
+
+    def carregar(self):
+        if not self.carregar_eeprom():
+            self.println(">>> Nenhum dado salvo encontrado na EEPROM")
+            return
+        self.println(">>> Carregando mapeamento da EEPROM...")
+        self.println(f">>> Carregado: {self.total_paginas_definidas} páginas definidas")
+
+    def processar_comando(self, cmd):
+        m = re.match(r'^(CIMA|BAIXO)(\d*)$', cmd)
+        if cmd == 'RESET':
+            self.passos_atual = 0
+            self.pagina_atual = 0
+            self.paginas = [[0, False] for _ in range(self.MAX_PAGINAS)]
+            self.total_paginas_definidas = 0
+            self.println(">>> RESET: Posição ATUAL definida como início (Página 0, 0 passos)")
+            self.println(">>> A partir daqui, apenas movimentos CIMA são permitidos")
+            self.println(">>> Use CIMA para avançar, BAIXO será bloqueado se resultar em negativos")
+            self.mostrar_status()
+        elif cmd in ('STATUS', 'S'):
+            self.mostrar_status()
+        elif m and m.group(2) in self.PASSOS_CIMA_BAIXO:
+            self.mover_passos(self.PASSOS_CIMA_BAIXO[m.group(2)], m.group(1) == 'CIMA')
+        elif cmd == 'MARK':
+            self.marcar_pagina_especifica(self.pagina_atual)
+            self.pagina_atual += 1
+            if self.pagina_atual >= self.MAX_PAGINAS:
+                self.pagina_atual = self.MAX_PAGINAS - 1
+                self.println(">>> Aviso: Limite de páginas atingido!")
+            self.println(f">>> Próxima página: {self.pagina_atual} (mova o papel e marque quando estiver na posição)")
+            self.mostrar_status()
+        elif cmd.startswith('MARK:'):
+            pagina = to_int(cmd[5:])
+            if 0 <= pagina < self.MAX_PAGINAS:
+                self.marcar_pagina_especifica(pagina)
+            else:
+                self.println(f">>> Página inválida: {pagina}")
+        elif cmd.startswith('GOTO:'):
+            self.ir_para_pagina(to_int(cmd[5:]))
+        elif cmd == 'SAVE':
+            self.println(">>> Salvando mapeamento na EEPROM...")
+            self.salvar_eeprom()
+            self.println(">>> Mapeamento salvo com sucesso!")
+        elif cmd == 'LOAD':
+            self.carregar()
+            self.mostrar_status()
+        elif cmd == 'CLEAR':
+            self.paginas = [[0, False] for _ in range(self.MAX_PAGINAS)]
+            self.total_paginas_definidas = 0
+            self.pagina_atual = 0
+            self.passos_atual = 0
+            self.println(">>> Mapeamento limpo!")
+            self.mostrar_status()
+        else:
+            self.println(f">>> Comando inválido: {cmd}")
+            self.println(">>> Digite STATUS para ver ajuda")
+
+    def mover_passos(self, passos, frente):
+        if passos <= 0:
+            self.println(">>> Número de passos inválido!")
+            return
+        if not frente and self.passos_atual - passos < 0:
+            self.println(">>> ERRO: Movimento BAIXO bloqueado!")
+            self.println(f">>> Passos atuais: {self.passos_atual}, tentando mover: {passos}")
+            self.println(">>> Isso resultaria em passos negativos!")
+            self.println(">>> Use RESET para definir novo ponto inicial")
+            self.println(">>> Ou use CIMA para avançar")
+            return
+        self.delay_us(100)
+        self.println(f">>> Movendo {passos} passos {'(CIMA)' if frente else '(BAIXO)'}")
+        for i in range(passos):
+            self.delay_us(2 * self.delay_us_passo)  # Meio período em HIGH e meio em LOW
+            self.passos_atual += 1 if frente else -1
+            if self.passos_atual < 0:
+                self.passos_atual = 0
+                self.println(">>> AVISO: Passos negativos detectados, corrigido para 0!")
+                break
+            self.progresso(i, passos)
+        self.println(f">>> Concluído. Passos acumulados: {self.passos_atual}")
+
+    def marcar_pagina_especifica(self, pagina):
+        if self.passos_atual < 0:
+            self.println(">>> ERRO: Passos acumulados estão negativos!")
+            self.println(">>> Execute RESET para definir novo ponto inicial.")
+            return
+        self.paginas[pagina] = [self.passos_atual, True]
+        if pagina >= self.total_paginas_definidas:
+            self.total_paginas_definidas = pagina + 1
+        self.println(f">>> Página {pagina} marcada com {self.passos_atual} passos acumulados")
+        if pagina > 0 and self.paginas[pagina - 1][1]:
+            self.println(f"    Passos da página: {self.passos_atual - self.paginas[pagina - 1][0]}")
+        elif pagina == 0:
+            self.println("    (Página inicial)")
+        if pagina > self.pagina_atual:
+            self.pagina_atual = pagina
+
+    def ir_para_pagina(self, destino):
+        if not 0 <= destino < self.MAX_PAGINAS:
+            self.println(f">>> Página inválida: {destino}")
+            return
+        if destino == 0:
+            self.println(">>> Indo para HOME (Página 0)")
+            if self.passos_atual == 0:
+                self.println(">>> Já está no HOME")
+                self.pagina_atual = 0
+                self.mostrar_status()
+                return
+            if self.passos_atual < 0:
+                self.println(">>> ERRO: Passos negativos detectados!")
+                self.println(">>> Execute RESET para corrigir.")
+                return
+            self.println(f">>> Movendo {self.passos_atual} passos (BAIXO)")
+            self.mover_passos(self.passos_atual, False)
+            self.pagina_atual = 0
+            self.passos_atual = 0
+            self.println(">>> HOME alcançado (0 passos)")
+            self.mostrar_status()
+            return
+        passos_destino, definida = self.paginas[destino]
+        if not definida:
+            self.println(f">>> Página {destino} ainda não foi marcada!")
+            return
+        delta = passos_destino - self.passos_atual
+        if delta == 0:
+            self.println(">>> Já está na posição desta página")
+            self.pagina_atual = destino
+            return
+        self.println(f">>> Indo para página {destino} ({passos_destino} passos)")
+        self.mover_passos(abs(delta), delta > 0)
+        self.pagina_atual = destino
+        self.println(f">>> Página {destino} alcançada!")
+        self.mostrar_status()
+
+    def mostrar_status(self):
+        self.println("\n--- STATUS ---")
+        self.println(f"Página atual: {self.pagina_atual}")
+        self.println(f"Passos acumulados: {self.passos_atual}")
+        self.println(f"Total de páginas definidas: {self.total_paginas_definidas}")
+        self.println("\nMapeamento:")
+        self.println("Pág | Passos Acum | Passos Pág | Status")
+        self.println("----|-------------|------------|--------")
+        for i, (passos, definida) in enumerate(self.paginas):
+            if i < self.total_paginas_definidas or definida:
+                passos_pagina = passos - self.paginas[i - 1][0] if i > 0 and self.paginas[i - 1][1] else 0
+                self.println(f"  {i}  |  {passos if definida else '-'}  |  "
+                             f"{passos_pagina if definida and i > 0 else '-'}  |  {'✓' if definida else '⏳'}")
+        self.println("-------------\n")
+
+
+class MotorComIr(FirmwareEmulado):
+    """motor_com_ir.ino: F/B contínuos, S/STOP, R:N, V:N, STATUS e teclas do controle IR
+
+    Um passo por volta do loop(), que tem delay(10): ~10 ms por passo,
+    qualquer que seja o delayUs. "R:-N" cai no ramo de "R:" com N negativo
+    e é ignorado em silêncio, como no firmware.
+    """
+
+    TITULO = 'MOTOR COM CONTROLE IR'
+    IR_ESQUERDA = 0x5
+    IR_DIREITA = 0x1B
+    IR_MENOS = 0x7
+    IR_MAIS = 0x9
+    IR_PARAR = 0x1E
+
+    def iniciar(self):
+        self.delay_us_passo = 2000
+        self.motor_movendo = False
+        self.parar_motor = False
+        self.passos_restantes = 0
+        self.frente = True
+        self.passos_x = 0  # Posição do rolo X (o firmware não guarda; usada pelos comandos da TV)
+        self._teclas = []
+
+    def pressionar_ir(self, codigo):
+        """Simula uma tecla do controle remoto (tratada no próximo loop())"""
+        self._teclas.append(codigo)
+
+    def setup(self):
+        self.delay_ms(2000)
+        self.println(f"=== {self.TITULO} ===")
+        for linha in ("", "Comandos IR:", "  Esquerda → Gira trás", "  Direita → Gira frente",
+                      "  Menos (-) → Diminuir velocidade", "  Mais (+) → Aumentar velocidade",
+                      "  Parar → Parar motor", "", "Comandos Serial também funcionam: F, B, S, R:200, V:2000",
+                      "", f"Velocidade inicial: {self.delay_us_passo}us"):
+            self.println(linha)
+        self.println(">>> Pronto!")
+
+    def loop(self):
+        if self._teclas:
+            self.tratar_ir(self._teclas.pop(0))
+        if self.porta.disponivel():
+            cmd = self.ler_ate().strip().upper()
+            self.println(f"[SERIAL] Comando: {cmd}")
+            self.processar_comando(cmd)
+        if self.motor_movendo and not self.parar_motor:
+            if self.passos_restantes == -1 or self.passos_restantes > 0:
+                self.executar_passo()
+            else:
+                self.motor_movendo = False
+                self.movimento_completo()
+        self.delay_ms(10)
+
+    def tratar_ir(self, codigo):
+        nomes = {self.IR_ESQUERDA: ('ESQUERDA', self.girar_tras), self.IR_DIREITA: ('DIREITA', self.girar_frente),
+                 self.IR_MENOS: ('MENOS', self.diminuir_velocidade), self.IR_MAIS: ('MAIS', self.aumentar_velocidade),
+                 self.IR_PARAR: ('PARAR', self.parar)}
+        if codigo in nomes:
+            nome, acao = nomes[codigo]
+            self.println(f"[IR] Comando: 0x{codigo:X} ({nome})")
+            acao()
+        else:
+            self.println(f"[IR] Comando: 0x{codigo:X} (DESCONHECIDO) | HEX: 0x{codigo:X}")
+
+    def movimento_completo(self):
+        self.println(">>> Movimento completo!")
+
+    def girar(self, frente):
+        self.frente = frente
+        self.motor_movendo = True
+        self.passos_restantes = -1  # Contínuo
+        self.parar_motor = False
+        self.println(">>> Girando FRENTE (direita) - AMBOS MOTORES" if frente
+                     else ">>> Girando TRÁS (esquerda) - AMBOS MOTORES")
+
+    def girar_frente(self):
+        self.girar(True)
+
+    def girar_tras(self):
+        self.girar(False)
+
+    def parar(self):
+        self.parar_motor = True
+        self.motor_movendo = False
+        self.passos_restantes = 0
+        self.println(">>> PARAR")
+
+    def aumentar_velocidade(self):
+        if self.delay_us_passo > 500:
+            self.delay_us_passo -= 200
+            self.println(f">>> Velocidade aumentada: {self.delay_us_passo}us")
+        else:
+            self.println(">>> Velocidade já está no máximo!")
+
+    def diminuir_velocidade(self):
+        if self.delay_us_passo < 5000:
+            self.delay_us_passo += 200
+            self.println(f">>> Velocidade diminuída: {self.delay_us_passo}us")
+        else:
+            self.println(">>> Velocidade já está no mínimo!")
+
+    def rotacionar(self, passos, frente):
+        self.frente = frente
+        self.motor_movendo = True
+        self.passos_restantes = passos
+        self.parar_motor = False
+        self.println(f">>> Rotacionando {passos} passos {'(frente)' if frente else '(trás)'}")
+
+    def processar_comando(self, cmd):
+        if cmd == 'F':
+            self.girar_frente()
+        elif cmd == 'B':
+            self.girar_tras()
+        elif cmd in ('S', 'STOP'):
+            self.parar()
+        elif cmd.startswith('R:'):
+            passos = to_int(cmd[2:])
+            if passos > 0:
+                self.rotacionar(passos, True)
+        elif cmd.startswith('V:'):
+            velocidade = to_int(cmd[2:])
+            if 500 <= velocidade <= 10000:
+                self.delay_us_passo = velocidade
+                self.println(f">>> Velocidade: {velocidade}us")
+            else:
+                self.println(">>> Velocidade inválida (500-10000)")
+        elif cmd == 'STATUS':
+            self.mostrar_status()
+
+    def executar_passo(self):
+        self.delay_us(20 + self.delay_us_passo)
+        self.passos_x += 1 if self.frente else -1
+        if self.passos_restantes > 0:
+            self.passos_restantes -= 1
+
+    def mostrar_status(self):
+        self.println("--- STATUS ---")
+        self.println(f"Velocidade: {self.delay_us_passo}us")
+        self.println(f"Motor: {'MOVENDO' if self.motor_movendo else 'PARADO'}")
+        if self.motor_movendo:
+            self.println(f"Direção: {'FRENTE' if self.frente else 'TRÁS'}")
+            if self.passos_restantes > 0:
+                self.println(f"Passos restantes: {self.passos_restantes}")
+            elif self.passos_restantes == -1:
+                self.println("Movimento: CONTÍNUO")
+        self.println("-------------")
+
+
+class MotorTvAlice(MotorComIr):
+    """motor_com_ir + os comandos que a interface_tv_alice envia (PAGE:N, SYNC:cm, SETPAGE:cm)
+
+    Nenhum .ino do repositório os implementa ainda: aqui seguem o modelo
+    espiral (GeometriaEspiral) e respondem com as linhas "Rolo X/Y" e
+    "Página: p/t" que o parser e a página já interpretam.
+    """
+
+    def iniciar(self):
+        super().iniciar()
+        self.geometria = GeometriaEspiral()
+        self.comprimento_pagina_cm = 20.0
+        self._com_rolos = False
+
+    @property
+    def posicao_cm(self):
+        return self.geometria.passos_x_para_cm(max(0, self.passos_x))
+
+    @property
+    def total_paginas(self):
+        return max(1, int(self.geometria.comprimento_total_cm // self.comprimento_pagina_cm))
+
+    @property
+    def pagina(self):
+        return min(self.total_paginas, int(self.posicao_cm // self.comprimento_pagina_cm) + 1)
+
+    def processar_comando(self, cmd):
+        if cmd.startswith('PAGE:'):
+            self.mover_cm(to_int(cmd[5:]) * self.comprimento_pagina_cm)
+        elif cmd.startswith('SYNC:'):
+            self.mover_cm(to_float(cmd[5:]))
+        elif cmd.startswith('SETPAGE:'):
+            cm = to_float(cmd[8:])
+            if cm > 0:
+                self.comprimento_pagina_cm = cm
+            self.mostrar_rolos()
+            self.println(f">>> Concluído. Comprimento da página: {self.comprimento_pagina_cm:.1f}cm")
+        else:
+            super().processar_comando(cmd)
+
+    def mover_cm(self, distancia_cm):
+        inicio = self.posicao_cm
+        alvo = min(max(inicio + distancia_cm, 0.0), self.geometria.comprimento_total_cm)
+        passos = round(self.geometria.passos_entre(inicio, alvo)[0])
+        if passos == 0:
+            self.mostrar_rolos()
+            self.movimento_completo()
+            return
+        self._com_rolos = True
+        self.rotacionar(abs(passos), passos > 0)
+
+    def movimento_completo(self):
+        if self._com_rolos:
+            self._com_rolos = False
+            self.mostrar_rolos()
+        super().movimento_completo()
+
+    def mostrar_rolos(self):
+        x = self.posicao_cm
+        y = self.geometria.comprimento_total_cm - x
+        self.println(f"Rolo X: {x:.1f}cm | Diâmetro: {self.geometria.diametro(x):.1f}mm")
+        self.println(f"Rolo Y: {y:.1f}cm | Diâmetro: {self.geometria.diametro(y):.1f}mm")
+        self.println(f"Página: {self.pagina}/{self.total_paginas}")
+
+
+FIRMWARES = {
+    'calibracao': Calibracao,
+    'calibracao_simples': CalibracaoSimples,
+    'motor_com_ir': MotorComIr,
+    'tv_alice': MotorTvAlice,
+}
+
+
+def emular(nome='calibracao', link=None, escala_tempo=1.0, arquivo_eeprom=None):
+    """Abre a pty e roda o firmware numa thread; retorna (porta, firmware)"""
+    classe = FIRMWARES[nome]
+    porta = PortaPty(classe.BAUDRATE_BOOT, link=link)
+    porta.abrir()
+    firmware = classe(porta, escala_tempo=escala_tempo, arquivo_eeprom=arquivo_eeprom)
+    threading.Thread(target=firmware.executar, name=f'emulador-{nome}', daemon=True).start()
+    return porta, firmware
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Emula um firmware do TV Alice num pseudo-terminal')
+    parser.add_argument('--firmware', choices=sorted(FIRMWARES), default='calibracao')
+    parser.add_argument('--link', help='Symlink para a porta (ex.: /tmp/tty-tv-alice)')
+    parser.add_argument('--escala-tempo', type=float, default=1.0,
+                        help='Multiplica os atrasos dos passos e do boot (0 = sem espera)')
+    parser.add_argument('--eeprom', help='Arquivo JSON que guarda a EEPROM entre execuções')
+    args = parser.parse_args()
+
+    porta, firmware = emular(args.firmware, args.link, args.escala_tempo, args.eeprom)
+    print("=" * 60)
+    print(f"EMULADOR DE FIRMWARE - {firmware.TITULO}")
+    print("=" * 60)
+    print(f"Porta: {porta.nome}" + (f" (link: {args.link})" if args.link else ""))
+    print(f"Baudrate de boot: {firmware.BAUDRATE_BOOT}; escala de tempo: {args.escala_tempo}")
+    print("Conecte a interface nesta porta. Ctrl+C encerra.")
+    print("=" * 60)
+    try:
+        while True:
+            time.sleep(5)
+            e = porta.estatisticas()
+            print(f"[{'conectado' if e['host_conectado'] else 'livre'}] baud {e['baudrate']} | "
+                  f"rx {e['bytes_rx']} B, tx {e['bytes_tx']} B, perdidos {e['descartados_rx']}, "
+                  f"ruído {e['ruido']} | reinícios {firmware.reinicios}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        firmware.parar()
+        porta.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Geometria Espiral - TV Alice
+Modelo exato do rolo como espiral de Arquimedes: cada volta acrescenta
+duas espessuras de papel ao diâmetro. Comprimento ↔ voltas em forma
+fechada (O(1)), para planejar movimentos sem integrar passo a passo
+
+    Voltas n com núcleo D0 e espessura h:
+        D(n) = D0 + 2·h·n
+        L(n) = π·n·(D0 + h·n)
+        n(L) = (√(D0² + 4·h·L/π) − D0) / (2·h)
+
+As funções aceitam números ou arrays NumPy (avaliação em lote)
+"""
+
+import argparse
+import bisect
+import json
+import math
+import time
+
+try:
+    import numpy as np
+except ImportError:  # Opcional: só a avaliação em lote precisa
+    np = None
+
+from simulador_tv import SimuladorTV, ESPESSURA_PAPEL_MM, PASSOS_POR_VOLTA
+
+
+def _raiz(valor):
+    if np is not None and isinstance(valor, np.ndarray):
+        return np.sqrt(valor)
+    return math.sqrt(valor)
+
+
+class GeometriaEspiral:
+    """Rolos X (enrola) e Y (desenrola) como espirais de Arquimedes
+
+    Posições são o comprimento de papel enrolado em X, em cm
+    (0 = todo o papel em Y), como no SimuladorTV.
+    """
+
+    def __init__(self, diametro_nucleo_mm=41, espessura_mm=ESPESSURA_PAPEL_MM,
+                 comprimento_total_cm=150, passos_por_volta=PASSOS_POR_VOLTA):
+        if espessura_mm <= 0:
+            raise ValueError("Espessura do papel deve ser positiva")
+        self.diametro_nucleo_mm = diametro_nucleo_mm
+        self.espessura_mm = espessura_mm
+        self.comprimento_total_cm = comprimento_total_cm
+        self.passos_por_volta = passos_por_volta
+
+    # --- Um rolo ---
+
+    def voltas_para_comprimento(self, voltas):
+        """Comprimento enrolado (cm) após n voltas a partir do núcleo"""
+        return math.pi * voltas * (self.diametro_nucleo_mm + self.espessura_mm * voltas) / 10.0
+
+    def comprimento_para_voltas(self, comprimento_cm):
+        """Voltas necessárias para enrolar comprimento_cm a partir do núcleo"""
+        d0, h = self.diametro_nucleo_mm, self.espessura_mm
+        return (_raiz(d0 * d0 + 4.0 * h * comprimento_cm * 10.0 / math.pi) - d0) / (2.0 * h)
+
+    def diametro(self, comprimento_cm):
+        """Diâmetro externo (mm) de um rolo com comprimento_cm enrolado"""
+        d0 = self.diametro_nucleo_mm
+        return _raiz(d0 * d0 + 4.0 * self.espessura_mm * comprimento_cm * 10.0 / math.pi)
+
+    # --- Par de rolos ---
+
+    def voltas(self, posicao_cm):
+        """Voltas acumuladas (X, Y) com posicao_cm enrolado em X"""
+        return (self.comprimento_para_voltas(posicao_cm),
+                self.comprimento_para_voltas(self.comprimento_total_cm - posicao_cm))
+
+    def passos_entre(self, inicio_cm, fim_cm):
+        """Passos (X, Y) para levar o papel de inicio_cm a fim_cm (negativos = para trás)"""
+        x0, y0 = self.voltas(inicio_cm)
+        x1, y1 = self.voltas(fim_cm)
+        # Y desenrola enquanto X enrola: suas voltas acumuladas diminuem
+        return (x1 - x0) * self.passos_por_volta, (y0 - y1) * self.passos_por_volta
+
+    def relacao_velocidade(self, posicao_cm):
+        """Razão instantânea passos_Y / passos_X (= diâmetro X / diâmetro Y)"""
+        return self.diametro(posicao_cm) / self.diametro(self.comprimento_total_cm - posicao_cm)
+
+    def passos_x_para_cm(self, passos_x):
+        """Posição (cm) após passos_x do rolo X desde o início do papel"""
+        return self.voltas_para_comprimento(passos_x / self.passos_por_volta)
+
+
+def comparar_com_simulador(geometria, comprimento_movimento_cm=20, amostras=16):
+    """Diferença entre o modelo espiral e a aproximação linear do SimuladorTV"""
+    sim = SimuladorTV(diametro_inicial_mm=geometria.diametro_nucleo_mm,
+                      comprimento_total_cm=geometria.comprimento_total_cm)
+    resultado = []
+    maximo = geometria.comprimento_total_cm - comprimento_movimento_cm
+    for i in range(amostras):
+        posicao = maximo * i / (amostras - 1)
+        sim.comprimento_enrolado_X = posicao
+        sim.comprimento_enrolado_Y = geometria.comprimento_total_cm - posicao
+        linear = sim.calcular_relacao_velocidade(comprimento_movimento_cm)
+        passos_x, passos_y = geometria.passos_entre(posicao, posicao + comprimento_movimento_cm)
+        resultado.append({
+            'posicao_cm': posicao,
+            'diametro_x_mm': geometria.diametro(posicao),
+            'diametro_x_linear_mm': linear['diametro_X'],
+            'passos_x': passos_x,
+            'passos_x_linear': linear['passos_X'],
+            'passos_y': passos_y,
+            'passos_y_linear': linear['passos_Y'],
+        })
+    return resultado
+
+
+def comparar_com_mapa(geometria, paginas, comprimento_pagina_cm=None):
+    """Confronta um mapa de calibração (MARK) com os dois modelos
+
+    paginas: lista de {'numero', 'passos'} como em /export. Os passos
+    gravados são os do rolo X (os dois motores dão o mesmo número de passos).
+    Com comprimento_pagina_cm, compara também com os passos previstos para
+    páginas de tamanho fixo.
+    """
+    tabela = SimuladorTV(diametro_inicial_mm=geometria.diametro_nucleo_mm,
+                         comprimento_total_cm=geometria.comprimento_total_cm).exportar_tabela_passos()
+    resultado = []
+    for pagina in sorted(paginas, key=lambda p: p['numero']):
+        passos = pagina['passos']
+        # Linear: inverter a tabela de passos acumulados (monotônica)
+        i = min(bisect.bisect_left(tabela.passos_x, passos), len(tabela) - 1)
+        linha = {
+            'numero': pagina['numero'],
+            'passos': passos,
+            'posicao_cm': geometria.passos_x_para_cm(passos),
+            'posicao_linear_cm': i * tabela.resolucao_mm / 10.0,
+        }
+        if comprimento_pagina_cm:
+            alvo = pagina['numero'] * comprimento_pagina_cm
+            linha['passos_previstos'] = geometria.passos_entre(0, alvo)[0]
+            linha['passos_previstos_linear'] = tabela.passos_entre(0, alvo)[0]
+        resultado.append(linha)
+    return resultado
+
+
+def medir_vazao(geometria, quantidade=1_000_000):
+    """Avaliações de passos_entre por segundo (em lote se houver NumPy)"""
+    if np is not None:
+        inicio = np.random.default_rng(0).uniform(0, geometria.comprimento_total_cm, quantidade)
+        fim = np.clip(inicio + 20.0, 0, geometria.comprimento_total_cm)
+        t = time.perf_counter()
+        geometria.passos_entre(inicio, fim)
+    else:
+        quantidade = min(quantidade, 100_000)
+        t = time.perf_counter()
+        for i in range(quantidade):
+            geometria.passos_entre(i % 130, i % 130 + 20.0)
+    return quantidade / (time.perf_counter() - t)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Valida o modelo espiral contra o linear e a calibração')
+    parser.add_argument('--nucleo-mm', type=float, default=41)
+    parser.add_argument('--espessura-mm', type=float, default=ESPESSURA_PAPEL_MM)
+    parser.add_argument('--comprimento-cm', type=float, default=150)
+    parser.add_argument('--mapa', help='JSON exportado pela calibração (/export)')
+    parser.add_argument('--pagina-cm', type=float, help='Comprimento nominal de cada página')
+    args = parser.parse_args()
+
+    geo = GeometriaEspiral(args.nucleo_mm, args.espessura_mm, args.comprimento_cm)
+
+    print("=" * 60)
+    print("Modelo espiral vs aproximação linear (movimentos de 20 cm)")
+    print("=" * 60)
+    print(f"{'pos cm':>7} {'Dx esp':>8} {'Dx lin':>8} {'Px esp':>8} {'Px lin':>8} {'Py esp':>8} {'Py lin':>8}")
+    for r in comparar_com_simulador(geo):
+        print(f"{r['posicao_cm']:7.1f} {r['diametro_x_mm']:8.2f} {r['diametro_x_linear_mm']:8.2f} "
+              f"{r['passos_x']:8.1f} {r['passos_x_linear']:8.1f} {r['passos_y']:8.1f} {r['passos_y_linear']:8.1f}")
+
+    if args.mapa:
+        with open(args.mapa) as f:
+            dados = json.load(f)
+        paginas = dados.get('paginas', dados.get('mapping', []))
+        print(f"\nMapa de calibração: {len(paginas)} páginas")
+        linhas = comparar_com_mapa(geo, paginas, args.pagina_cm)
+        anterior = None
+        for r in linhas:
+            tamanho = f"{r['posicao_cm'] - anterior:6.2f}" if anterior is not None else '     -'
+            extra = ''
+            if args.pagina_cm:
+                extra = (f"  previsto {r['passos_previstos']:7.1f} (erro {r['passos'] - r['passos_previstos']:+6.1f})"
+                         f"  linear {r['passos_previstos_linear']:6d}")
+            print(f"  pág {r['numero']:2d}: {r['passos']:6d} passos → {r['posicao_cm']:6.2f} cm "
+                  f"(linear {r['posicao_linear_cm']:6.2f}), página {tamanho} cm{extra}")
+            anterior = r['posicao_cm']
+
+    print(f"\nVazão: {medir_vazao(geo):,.0f} passos_entre/s")
+
+
+if __name__ == '__main__':
+    main()
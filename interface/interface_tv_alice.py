@@ -4,20 +4,11 @@ Interface Web para TV Alice - Controle Sincronizado de Rolos
 Acesse http://localhost:5000 no navegador
 """
 
-from flask import Flask, render_template_string, request, jsonify
-import serial
-import time
-import threading
-import re
+from flask import Flask, render_template_string
+from api_tv_alice import api, iniciar_reconexao
 
 app = Flask(__name__)
-
-# Variáveis globais
-ser = None
-connected = False
-port = '/dev/cu.usbmodem1301'
-baudrate = 9600
-messages_buffer = []
+app.register_blueprint(api)
 
 # HTML da interface
 HTML_TEMPLATE = """
@@ -231,6 +222,7 @@ HTML_TEMPLATE = """
     <div class="container">
         <h1>📺 TV Alice - Controle de Rolos</h1>
         <div class="subtitle">Sistema Sincronizado de Enrolamento</div>
+        {% if outra_pagina %}<div class="subtitle"><a href="{{ outra_pagina }}">📐 Calibração →</a></div>{% endif %}
         
         <div id="status" class="status disconnected">
             Desconectado
@@ -335,12 +327,65 @@ HTML_TEMPLATE = """
         let currentPage = 1;
         let totalPages = 7;
         
-        function addMessage(msg) {
+        // Linhas mantidas na tela: memória constante em telas que ficam dias ligadas
+        const MAX_MENSAGENS = 200;
+        
+        function addMessage(msg, em) {
             const messages = document.getElementById('messages');
-            const time = new Date().toLocaleTimeString();
-            messages.innerHTML += `<div>[${time}] ${msg}</div>`;
+            const time = (em ? new Date(em * 1000) : new Date()).toLocaleTimeString();
+            const linha = document.createElement('div');
+            linha.textContent = `[${time}] ${msg}`;
+            messages.appendChild(linha);
+            while (messages.childElementCount > MAX_MENSAGENS) {
+                messages.firstElementChild.remove();
+            }
             messages.scrollTop = messages.scrollHeight;
         }
+
+        // Registro do servidor (/log): conexão, comandos, IR e trabalhos de todas as abas.
+        // O cursor evita repetir eventos; ao (re)abrir o fluxo, /log?after= traz o que faltou
+        let logCursor = null;
+        let logPendentes = null;  // Eventos SSE que chegam durante uma sincronização
+        
+        function addLogEvent(entrada) {
+            if (logCursor !== null && entrada.id <= logCursor) return;
+            logCursor = entrada.id;
+            addMessage(entrada.mensagem, entrada.em);
+        }
+        
+        async function syncLog() {
+            logPendentes = logPendentes || [];
+            try {
+                const url = logCursor === null ? `/log?limit=${MAX_MENSAGENS}` : `/log?after=${logCursor}&limit=${MAX_MENSAGENS}`;
+                const data = await (await fetch(url)).json();
+                if (logCursor !== null && data.latest < logCursor) logCursor = 0;  // Servidor reiniciado
+                if (data.missed > 0) addMessage(`⚠️ ${data.missed} evento(s) já saíram do registro do servidor`);
+                data.events.forEach(addLogEvent);
+            } catch (error) {
+                console.error('Erro ao ler o registro:', error);
+            } finally {
+                const pendentes = logPendentes;
+                logPendentes = null;
+                pendentes.forEach(addLogEvent);
+            }
+        }
+        
+        // Estados enviados pelo servidor: abrindo → aguardando_banner → negociando → pronto
+        let connectionState = 'desconectado';
+        
+        function updateConnectionState(state) {
+            if (!state || state === connectionState) return;
+            connectionState = state;
+            if (state === 'pronto') {
+                updateStatus(true);
+                getStatus();
+            } else if (state === 'desconectado') {
+                updateStatus(false);
+            } else {
+                updateStatus(false);
+                document.getElementById('status').textContent = `⏳ Conectando (${state.replace('_', ' ')})...`;
+            }
+        }
         
         function updateStatus(connected) {
             const status = document.getElementById('status');
@@ -354,53 +399,6 @@ HTML_TEMPLATE = """
             }
         }
         
-        function updateRoloStatus(data) {
-            if (!data) return;
-            
-            console.log('Atualizando status com:', data);
-            
-            // Parse status do Arduino - procurar em todas as linhas
-            const lines = data.split('\n');
-            let compX, diamX, compY, diamY, page;
-            
-            for (let line of lines) {
-                // Rolo X
-                const matchX = line.match(/Rolo X: ([\d.]+)cm.*Diâmetro: ([\d.]+)mm/);
-                if (matchX) {
-                    compX = matchX[1];
-                    diamX = matchX[2];
-                }
-                
-                // Rolo Y
-                const matchY = line.match(/Rolo Y: ([\d.]+)cm.*Diâmetro: ([\d.]+)mm/);
-                if (matchY) {
-                    compY = matchY[1];
-                    diamY = matchY[2];
-                }
-                
-                // Página
-                const matchPage = line.match(/Página: (\d+)\/(\d+)/);
-                if (matchPage) {
-                    page = {current: parseInt(matchPage[1]), total: parseInt(matchPage[2])};
-                }
-            }
-            
-            // Atualizar interface
-            if (compX) {
-                document.getElementById('compX').textContent = compX + ' cm';
-                document.getElementById('diamX').textContent = diamX + ' mm';
-            }
-            if (compY) {
-                document.getElementById('compY').textContent = compY + ' cm';
-                document.getElementById('diamY').textContent = diamY + ' mm';
-            }
-            if (page) {
-                currentPage = page.current;
-                totalPages = page.total;
-                document.getElementById('pageDisplay').textContent = `${currentPage} / ${totalPages}`;
-            }
-        }
-        
         async function connect() {
             const port = document.getElementById('port').value;
             const response = await fetch('/connect', {
@@ -410,9 +408,7 @@ HTML_TEMPLATE = """
             });
             const data = await response.json();
             if (data.success) {
-                updateStatus(true);
-                addMessage('✅ Conectado ao Arduino');
-                getStatus();
+                updateConnectionState(data.state);
             } else {
                 addMessage('❌ Erro: ' + data.error);
             }
@@ -422,7 +418,26 @@ HTML_TEMPLATE = """
             const response = await fetch('/disconnect', {method: 'POST'});
             const data = await response.json();
             updateStatus(false);
-            addMessage('❌ Desconectado');
+        }
+        
+        // Movimentos longos viram trabalhos: o resultado chega pelo registro (/log)
+        const COMANDO_MOVIMENTO = /^(PAGE:|GOTO:|SYNC:|F:|B:|R:|NEXT$|PREV$|HOME$)/i;
+        
+        async function submitJob(cmd) {
+            try {
+                const response = await fetch('/jobs', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({command: cmd})
+                });
+                const data = await response.json();
+                if (!data.success) {
+                    addMessage(`❌ Erro: ${data.error}`);
+                    return;
+                }
+            } catch (error) {
+                addMessage(`❌ Erro ao enviar comando: ${error.message}`);
+            }
         }
         
         async function sendCommand(cmd) {
@@ -430,6 +445,10 @@ HTML_TEMPLATE = """
                 addMessage('⚠️ Arduino não conectado!');
                 return;
             }
+            if (COMANDO_MOVIMENTO.test(cmd)) {
+                submitJob(cmd);
+                return;
+            }
             try {
                 const response = await fetch('/command', {
                     method: 'POST',
@@ -437,7 +456,6 @@ HTML_TEMPLATE = """
                     body: JSON.stringify({command: cmd})
                 });
                 const data = await response.json();
-                addMessage(`📤 ${cmd}`);
                 
                 if (data.error) {
                     addMessage(`❌ Erro: ${data.error}`);
@@ -447,12 +465,11 @@ HTML_TEMPLATE = """
                 if (data.message) {
                     console.log('Resposta do Arduino:', data.message);
                     // Mostrar apenas as últimas linhas relevantes
-                    const lines = data.message.split('\n').filter(l => l.trim());
+                    const lines = data.message.split('\\n').filter(l => l.trim());
                     const relevantLines = lines.slice(-5).join(' | ');
                     if (relevantLines) {
                         addMessage(`📥 ${relevantLines}`);
                     }
-                    updateRoloStatus(data.message);
                 }
             } catch (error) {
                 addMessage(`❌ Erro ao enviar comando: ${error.message}`);
@@ -479,39 +496,47 @@ HTML_TEMPLATE = """
             sendCommand(`PAGE:${delta}`);
         }
         
+        async function goToAbsolutePage(page) {
+            // Tradução para PAGE:delta no servidor, a partir da posição autoritativa
+            // (inclui movimentos já enfileirados), não do currentPage do navegador
+            if (!isConnected) {
+                addMessage('⚠️ Arduino não conectado!');
+                return;
+            }
+            try {
+                const response = await fetch('/goto', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({page: page})
+                });
+                const data = await response.json();
+                if (!data.success) {
+                    addMessage(`❌ Erro: ${data.error}`);
+                } else if (!data.job) {
+                    addMessage(`ℹ️ Já está na página ${data.position.pagina_destino}`);
+                } else {
+                    addMessage(`📤 ${data.job.comando} (trabalho #${data.job.id})`);
+                }
+            } catch (error) {
+                addMessage(`❌ Erro ao enviar comando: ${error.message}`);
+            }
+        }
+        
         function goToPage() {
             const page = parseInt(document.getElementById('pageInput').value);
             if (isNaN(page) || page < 1) {
                 addMessage('⚠️ Digite um número de página válido');
                 return;
             }
-            const delta = page - currentPage;
-            if (delta === 0) {
-                addMessage('ℹ️ Já está na página ' + page);
-                return;
-            }
-            console.log('Indo para página', page, 'delta:', delta);
-            sendCommand(`PAGE:${delta}`);
+            goToAbsolutePage(page);
         }
         
         function goToFirstPage() {
-            const delta = 1 - currentPage;
-            if (delta === 0) {
-                addMessage('ℹ️ Já está na primeira página');
-                return;
-            }
-            console.log('Indo para primeira página, delta:', delta);
-            sendCommand(`PAGE:${delta}`);
+            goToAbsolutePage('first');
         }
         
         function goToLastPage() {
-            const delta = totalPages - currentPage;
-            if (delta === 0) {
-                addMessage('ℹ️ Já está na última página');
-                return;
-            }
-            console.log('Indo para última página, delta:', delta);
-            sendCommand(`PAGE:${delta}`);
+            goToAbsolutePage('last');
         }
         
         function setPageLength(cm) {
@@ -525,9 +550,20 @@ HTML_TEMPLATE = """
             }
         }
         
-        function stopMotor() {
-            sendCommand('STOP');
-            addMessage('🛑 Comando de parar enviado');
+        async function stopMotor() {
+            // Rota própria: não espera o movimento em curso nem os comandos na fila
+            try {
+                const response = await fetch('/stop', {method: 'POST'});
+                const data = await response.json();
+                if (data.escrita_ms == null) {
+                    addMessage(`❌ Erro ao parar: ${data.error}`);
+                    return;
+                }
+                const confirmacao = data.confirmacao_ms !== null ? `${data.confirmacao_ms.toFixed(0)} ms` : 'sem confirmação';
+                addMessage(`🛑 Parado: enviado em ${data.escrita_ms.toFixed(1)} ms, ${confirmacao}, ${data.cancelados} cancelado(s)`);
+            } catch (error) {
+                addMessage(`❌ Erro ao parar: ${error.message}`);
+            }
         }
         
         function moveSync(forward) {
@@ -557,12 +593,39 @@ HTML_TEMPLATE = """
             sendCommand('STATUS');
         }
         
-        // Atualizar status periodicamente
-        setInterval(() => {
-            if (isConnected) {
-                getStatus();
+        function atualizarEstado(estado) {
+            if (estado.rolo_x) {
+                document.getElementById('compX').textContent = estado.rolo_x.comprimento_cm.toFixed(1) + ' cm';
+                document.getElementById('diamX').textContent = estado.rolo_x.diametro_mm.toFixed(1) + ' mm';
+            }
+            if (estado.rolo_y) {
+                document.getElementById('compY').textContent = estado.rolo_y.comprimento_cm.toFixed(1) + ' cm';
+                document.getElementById('diamY').textContent = estado.rolo_y.diametro_mm.toFixed(1) + ' mm';
             }
-        }, 3000);
+            if (estado.total_paginas) {
+                currentPage = estado.pagina_atual;
+                totalPages = estado.total_paginas;
+                document.getElementById('pageDisplay').textContent = `${currentPage} / ${totalPages}`;
+            }
+        }
+        
+        // Estado enviado pelo servidor (um único STATUS compartilhado entre todas as abas)
+        const eventos = new EventSource('/eventos');
+        eventos.onmessage = (e) => {
+            const estado = JSON.parse(e.data);
+            updateConnectionState(estado.estado_conexao);
+            atualizarEstado(estado);
+        };
+        // Eventos já interpretados no servidor (IR, comandos, trabalhos) chegam pelo registro
+        eventos.onopen = syncLog;
+        eventos.addEventListener('log', (e) => {
+            const entrada = JSON.parse(e.data);
+            if (logPendentes) {
+                logPendentes.push(entrada);
+            } else {
+                addLogEvent(entrada);
+            }
+        });
     </script>
 </body>
 </html>
@@ -570,74 +633,7 @@ HTML_TEMPLATE = """
 
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
-
-@app.route('/connect', methods=['POST'])
-def connect_arduino():
-    global ser, connected, port
-    try:
-        data = request.json
-        port = data.get('port', '/dev/cu.usbmodem1301')
-        
-        if ser:
-            ser.close()
-        
-        ser = serial.Serial(port, baudrate, timeout=1)
-        time.sleep(2)
-        connected = True
-        return jsonify({'success': True})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
-
-@app.route('/disconnect', methods=['POST'])
-def disconnect_arduino():
-    global ser, connected
-    if ser:
-        ser.close()
-        ser = None
-    connected = False
-    return jsonify({'success': True})
-
-@app.route('/command', methods=['POST'])
-def send_command():
-    global ser, connected
-    if not connected or not ser:
-        return jsonify({'success': False, 'error': 'Arduino não conectado'})
-    
-    try:
-        data = request.json
-        command = data.get('command', '')
-        
-        # Limpar buffer antes de enviar
-        ser.reset_input_buffer()
-        ser.reset_output_buffer()
-        
-        # Enviar comando
-        ser.write(f"{command}\n".encode())
-        ser.flush()
-        
-        # Ler resposta com timeout maior
-        time.sleep(0.3)  # Dar tempo para Arduino processar
-        message = ""
-        start_time = time.time()
-        max_wait = 1.0  # 1 segundo máximo
-        
-        while (time.time() - start_time) < max_wait:
-            if ser.in_waiting:
-                line = ser.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    message += line + "\n"
-                    # Se recebeu várias linhas, continuar lendo
-                    if ser.in_waiting == 0:
-                        time.sleep(0.1)  # Pequeno delay para ver se vem mais
-                        if ser.in_waiting == 0:
-                            break
-            else:
-                time.sleep(0.05)
-        
-        return jsonify({'success': True, 'message': message.strip()})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+    return render_template_string(HTML_TEMPLATE, outra_pagina=None)
 
 if __name__ == '__main__':
     print("=" * 50)
@@ -645,5 +641,5 @@ if __name__ == '__main__':
     print("=" * 50)
     print(f"Acesse: http://localhost:5000")
     print("=" * 50)
+    iniciar_reconexao()
     app.run(debug=True, host='0.0.0.0', port=5000)
-
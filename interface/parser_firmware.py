@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Parser da saída do firmware - TV Alice
+Parser incremental orientado a linhas: recebe os bytes da serial como
+chegam, separa as linhas e converte cada uma em eventos tipados (página,
+passos, rolo, linha do mapeamento, progresso, movimento concluído,
+comando IR...). O estado dos rolos e páginas é só a aplicação desses
+eventos, então todos os clientes veem a mesma interpretação
+"""
+
+import re
+from collections import namedtuple
+
+from protocolo_compacto import eh_quadro, decodificar_quadro, ErroQuadro
+
+# Tipos de evento (dados entre parênteses)
+PAGINA = 'pagina'                            # (pagina, total: None se o firmware não informa)
+PASSOS = 'passos'                            # (passos) acumulados desde o início
+# PROGRESSO e MOVIMENTO_CONCLUIDO também trazem 'passos' e o aplicam ao estado
+TOTAL_DEFINIDAS = 'total_definidas'          # (total)
+ROLO = 'rolo'                                # (rolo: 'x'/'y', comprimento_cm, diametro_mm)
+LINHA_MAPA = 'linha_mapa'                    # (numero, passos, definida) dentro de um STATUS
+FIM_STATUS = 'fim_status'                    # (mapeamento: None se a tabela não foi vista)
+VELOCIDADE = 'velocidade'                    # (velocidade_us)
+MOTOR = 'motor'                              # (movendo)
+PROGRESSO = 'progresso'                      # (passo, total, passos)
+MOVIMENTO_CONCLUIDO = 'movimento_concluido'  # (passos: None se a linha não traz)
+PARADO = 'parado'                            # () confirmação de STOP
+COMANDO_INVALIDO = 'comando_invalido'        # (comando)
+COMANDO_IR = 'comando_ir'                    # (codigo: hex, tecla)
+QUADRO_INVALIDO = 'quadro_invalido'          # (linha) quadro compacto com CRC/tamanho errado
+
+Evento = namedtuple('Evento', 'tipo dados')
+
+# Expressões pré-compiladas (uma vez por processo); cada uma só roda depois
+# de um teste barato de prefixo/substring
+RE_INICIO_STATUS = re.compile(r'^--- STATUS ---$')
+RE_RODAPE_STATUS = re.compile(r'^-{13}$')
+RE_PAGINA_ATUAL = re.compile(r'^Página atual:\s*(\d+)')
+RE_PASSOS = re.compile(r'Passos acumulados:\s*(-?\d+)')
+RE_TOTAL_DEFINIDAS = re.compile(r'^Total de páginas definidas:\s*(\d+)')
+RE_LINHA_TABELA = re.compile(r'^(\d+)\s*\|\s*(-?\d+|-)\s*\|\s*(-?\d+|-)\s*\|\s*(✓|⏳)')
+RE_ROLO = re.compile(r'Rolo ([XY]): ([\d.]+)cm.*Diâmetro: ([\d.]+)mm')
+RE_PAGINA_TOTAL = re.compile(r'Página: (\d+)/(\d+)')
+RE_VELOCIDADE = re.compile(r'^(?:>>> )?Velocidade[^:]*:\s*(\d+)us')
+RE_MOTOR = re.compile(r'^Motor: (MOVENDO|PARADO)')
+RE_PROXIMA_PAGINA = re.compile(r'^>>> Próxima página: (\d+)')
+RE_INDO_PARA_PAGINA = re.compile(r'^>>> Indo para página (\d+)')
+RE_HOME = re.compile(r'^>>> (Indo para HOME|HOME alcançado|Já está no HOME)')
+RE_CONCLUIDO = re.compile(r'^>>> (Conclu|Movimento completo)')
+RE_PARADO = re.compile(r'^>>> (Parado|PARAR)$')
+RE_COMANDO_INVALIDO = re.compile(r'^>>> Comando inválido:?\s*(.*)$')
+# "[i/N] Passos acumulados: X" a cada 10 passos (a linha mais frequente: uma regex só)
+RE_PROGRESSO = re.compile(r'^\[(\d+)/(\d+)\](?:\s*Passos acumulados:\s*(-?\d+))?')
+RE_IR = re.compile(r'^\[IR\] Comando: 0x([0-9A-Fa-f]+) \((\w+)\)')
+
+
+def estado_inicial():
+    """Estado antes de qualquer resposta do Arduino"""
+    return {
+        'pagina_atual': 0,
+        'total_paginas': None,
+        'passos_atual': 0,
+        'total_definidas': 0,
+        'mapeamento': [],
+        'rolo_x': None,
+        'rolo_y': None,
+        'velocidade_us': None,
+        'movendo': False,
+    }
+
+
+def aplicar_evento(estado, evento):
+    """Atualiza o dict de estado com o evento; retorna True se algo mudou"""
+    tipo, d = evento
+    if tipo == PROGRESSO or tipo == PASSOS or tipo == MOVIMENTO_CONCLUIDO:
+        passos = d['passos']
+        if passos is None or estado['passos_atual'] == passos:
+            return False
+        estado['passos_atual'] = passos
+        return True
+    if tipo == PAGINA:
+        novo = {'pagina_atual': d['pagina']}
+        if d['total'] is not None:
+            novo['total_paginas'] = d['total']
+    elif tipo == ROLO:
+        novo = {'rolo_' + d['rolo']: {'comprimento_cm': d['comprimento_cm'], 'diametro_mm': d['diametro_mm']}}
+    elif tipo == FIM_STATUS:
+        if d['mapeamento'] is None:
+            return False
+        novo = {'mapeamento': d['mapeamento']}
+    elif tipo == TOTAL_DEFINIDAS:
+        novo = {'total_definidas': d['total']}
+    elif tipo == VELOCIDADE:
+        novo = {'velocidade_us': d['velocidade_us']}
+    elif tipo == MOTOR:
+        novo = {'movendo': d['movendo']}
+    else:
+        return False
+    mudou = False
+    for chave, valor in novo.items():
+        if estado[chave] != valor:
+            estado[chave] = valor
+            mudou = True
+    return mudou
+
+
+class ParserFirmware:
+    """Consome a saída do firmware (bytes ou linhas) e emite eventos
+
+    alimentar(dados) aceita pedaços de qualquer tamanho, inclusive linhas
+    partidas entre leituras; o estado resultante fica em self.estado.
+    """
+
+    def __init__(self):
+        self.estado = estado_inicial()
+        self.quadros_invalidos = 0
+        self.linhas = 0
+        self.linhas_descartadas = 0
+        self.ultimo_erro = None
+        self._tabela = None
+        self._pendente = bytearray()
+
+    def alimentar(self, dados):
+        """Bytes recebidos -> lista de (linha, eventos) das linhas completadas"""
+        pendente = self._pendente
+        pendente.extend(dados)
+        fim = pendente.rfind(b'\n')
+        if fim < 0:
+            return []
+        # Só linhas completas são decodificadas: um caractere UTF-8 nunca fica partido
+        texto = pendente[:fim].decode('utf-8', errors='ignore')
+        del pendente[:fim + 1]
+        resultado = []
+        for linha in texto.split('\n'):
+            linha = linha.strip()
+            if linha:
+                try:
+                    eventos = self.processar(linha)
+                except Exception as e:
+                    # Uma linha que o parser não entende não pode derrubar a leitura
+                    self.descartar(linha, e)
+                    eventos = []
+                resultado.append((linha, eventos))
+        return resultado
+
+    def descartar(self, linha, erro, pendente=False):
+        """Conta a linha (ou pedaço) descartado e guarda o último erro para o diagnóstico
+
+        pendente=True também joga fora a linha incompleta em buffer.
+        """
+        if pendente:
+            self._pendente.clear()
+        self.linhas_descartadas += 1
+        self.ultimo_erro = f"{type(erro).__name__}: {erro} em {linha!r}"
+
+    def diagnostico(self):
+        return {
+            'linhas': self.linhas,
+            'quadros_invalidos': self.quadros_invalidos,
+            'linhas_descartadas': self.linhas_descartadas,
+            'ultimo_erro': self.ultimo_erro,
+        }
+
+    def processar(self, linha):
+        """Interpreta uma linha, aplica os eventos ao estado e os retorna"""
+        self.linhas += 1
+        eventos = self.interpretar(linha)
+        for evento in eventos:
+            aplicar_evento(self.estado, evento)
+        return eventos
+
+    def interpretar(self, linha):
+        """Eventos de uma linha (só a tabela do STATUS guarda contexto entre linhas)"""
+        if not linha:
+            return []
+        inicial = linha[0]
+
+        # Progresso primeiro: é a maioria das linhas durante um movimento
+        if inicial == '[':
+            m = RE_PROGRESSO.match(linha)
+            if m:
+                passo, total, passos = m.groups()
+                return [Evento(PROGRESSO, {'passo': int(passo), 'total': int(total),
+                                           'passos': int(passos) if passos is not None else None})]
+            m = RE_IR.match(linha)
+            if m:
+                return [Evento(COMANDO_IR, {'codigo': m.group(1).upper(), 'tecla': m.group(2)})]
+            return []
+
+        if inicial == '$' and eh_quadro(linha):
+            return self._interpretar_quadro(linha)
+
+        if inicial == '-':
+            if RE_INICIO_STATUS.match(linha):
+                self._tabela = []
+            elif RE_RODAPE_STATUS.match(linha):
+                tabela, self._tabela = self._tabela, None
+                return [Evento(FIM_STATUS, {'mapeamento': tabela})]
+            return []
+
+        if inicial.isdigit():
+            m = RE_LINHA_TABELA.match(linha)
+            if m:
+                if self._tabela is None or m.group(2) == '-':
+                    return []
+                dados = {'numero': int(m.group(1)), 'passos': int(m.group(2)), 'definida': m.group(4) == '✓'}
+                self._tabela.append(dados)
+                return [Evento(LINHA_MAPA, dados)]
+
+        eventos = []
+        if inicial == '>':
+            if RE_CONCLUIDO.match(linha):
+                passos = RE_PASSOS.search(linha)
+                return [Evento(MOVIMENTO_CONCLUIDO, {'passos': int(passos.group(1)) if passos else None})]
+            m = RE_PROXIMA_PAGINA.match(linha) or RE_INDO_PARA_PAGINA.match(linha)
+            if m:
+                return [Evento(PAGINA, {'pagina': int(m.group(1)), 'total': None})]
+            if RE_HOME.match(linha):
+                return [Evento(PAGINA, {'pagina': 0, 'total': None})]
+            if RE_PARADO.match(linha):
+                return [Evento(PARADO, {})]
+            m = RE_COMANDO_INVALIDO.match(linha)
+            if m:
+                return [Evento(COMANDO_INVALIDO, {'comando': m.group(1)})]
+
+        # Linhas do STATUS e das mensagens do firmware de rolos (prefixos variados)
+        if linha.startswith('Página atual:'):
+            m = RE_PAGINA_ATUAL.match(linha)
+            if m:
+                eventos.append(Evento(PAGINA, {'pagina': int(m.group(1)), 'total': None}))
+        elif linha.startswith('Total de páginas'):
+            m = RE_TOTAL_DEFINIDAS.match(linha)
+            if m:
+                eventos.append(Evento(TOTAL_DEFINIDAS, {'total': int(m.group(1))}))
+        elif linha.startswith('Motor: '):
+            m = RE_MOTOR.match(linha)
+            if m:
+                eventos.append(Evento(MOTOR, {'movendo': m.group(1) == 'MOVENDO'}))
+        if 'Passos acumulados' in linha:
+            m = RE_PASSOS.search(linha)
+            if m:
+                eventos.append(Evento(PASSOS, {'passos': int(m.group(1))}))
+        if 'Rolo ' in linha:
+            m = RE_ROLO.search(linha)
+            if m:
+                eventos.append(Evento(ROLO, {'rolo': m.group(1).lower(), 'comprimento_cm': float(m.group(2)),
+                                             'diametro_mm': float(m.group(3))}))
+        if 'Página: ' in linha:
+            m = RE_PAGINA_TOTAL.search(linha)
+            if m:
+                eventos.append(Evento(PAGINA, {'pagina': int(m.group(1)), 'total': int(m.group(2))}))
+        if 'Velocidade' in linha:
+            m = RE_VELOCIDADE.match(linha)
+            if m:
+                eventos.append(Evento(VELOCIDADE, {'velocidade_us': int(m.group(1))}))
+        return eventos
+
+    def _interpretar_quadro(self, linha):
+        """Quadros compactos: $S (status), $P (progresso), $D (concluído)"""
+        try:
+            tipo, campos = decodificar_quadro(linha)
+        except ErroQuadro as e:
+            self.quadros_invalidos += 1
+            self.ultimo_erro = str(e)
+            return [Evento(QUADRO_INVALIDO, {'linha': linha})]
+        if tipo == 'P':
+            return [Evento(PROGRESSO, {'passo': campos.get('i'), 'total': campos.get('n'), 'passos': campos.get('s')})]
+        if tipo == 'D':
+            return [Evento(MOVIMENTO_CONCLUIDO, {'passos': campos.get('s')})]
+        eventos = []
+        if 's' in campos:
+            eventos.append(Evento(PASSOS, {'passos': campos['s']}))
+        if tipo == 'S':
+            if 'p' in campos:
+                eventos.append(Evento(PAGINA, {'pagina': campos['p'], 'total': None}))
+            if 't' in campos:
+                eventos.append(Evento(TOTAL_DEFINIDAS, {'total': campos['t']}))
+            if 'v' in campos:
+                eventos.append(Evento(VELOCIDADE, {'velocidade_us': campos['v']}))
+            eventos.append(Evento(FIM_STATUS, {'mapeamento': campos.get('m', [])}))
+        return eventos
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Perfil de Aceleração - TV Alice
+Gera o atraso de cada passo de um movimento com rampa trapezoidal
+(aceleração limitada) ou curva S (aceleração e jerk limitados), para que
+as trocas de página saiam do repouso devagar e cruzem bem mais rápido
+que o delayUs fixo. O firmware de calibração executa o trapézio a partir
+do comando ACEL:I,C,N; a curva S fica no host (planejador e relatório).
+Só a biblioteca padrão: o envio ao firmware fica em aceleracao_firmware.py
+"""
+
+import argparse
+import math
+from array import array
+
+# Dois pulsos de 10 us em executarPasso() somam-se ao atraso de cada passo
+SOBRECARGA_PASSO_US = 20
+
+# Firmwares que entendem ACEL:I,C,N
+FIRMWARES_COM_ACEL = ('calibracao',)
+
+# Maior rampa que o firmware aceita no ACEL:I,C,N (e que cabe no uint16 do planejador)
+PASSOS_RAMPA_MAXIMOS = 10000
+
+# Comandos que movem páginas inteiras (os únicos que usam a rampa no firmware)
+COMANDOS_COM_RAMPA = ('GOTO:', 'PAGE:', 'NEXT', 'PREV', 'HOME')
+
+
+def comando_com_rampa(texto):
+    return texto.strip().upper().startswith(COMANDOS_COM_RAMPA)
+
+
+class PerfilAceleracao:
+    """Rampa de atraso_inicial_us (partida do repouso) até atraso_cruzeiro_us
+
+    aceleracao em passos/s²; jerk em passos/s³ (None = trapézio).
+    """
+
+    def __init__(self, atraso_inicial_us=5000, atraso_cruzeiro_us=1000, aceleracao=2000.0, jerk=None):
+        if not 200 <= atraso_cruzeiro_us <= atraso_inicial_us <= 16000:
+            raise ValueError("Atrasos devem satisfazer 200 <= cruzeiro <= inicial <= 16000 us")
+        if aceleracao <= 0 or (jerk is not None and jerk <= 0):
+            raise ValueError("Aceleração e jerk devem ser positivos")
+        self.atraso_inicial_us = atraso_inicial_us
+        self.atraso_cruzeiro_us = atraso_cruzeiro_us
+        self.aceleracao = aceleracao
+        self.jerk = jerk
+        self._rampa = None
+        # A curva S nunca é mais curta que o trapézio: barra antes de integrar uma rampa absurda
+        v0, vmax = 1e6 / atraso_inicial_us, 1e6 / atraso_cruzeiro_us
+        _validar_rampa(math.ceil((vmax * vmax - v0 * v0) / (2 * aceleracao)))
+
+    @classmethod
+    def de_rampa(cls, atraso_inicial_us, atraso_cruzeiro_us, passos_rampa):
+        """Trapézio equivalente aos parâmetros do ACEL (aceleração deduzida dos passos)"""
+        v0, vmax = 1e6 / atraso_inicial_us, 1e6 / atraso_cruzeiro_us
+        aceleracao = (vmax * vmax - v0 * v0) / (2 * passos_rampa) if passos_rampa else math.inf
+        return cls(atraso_inicial_us, atraso_cruzeiro_us, aceleracao)
+
+    @property
+    def passos_rampa(self):
+        """Passos até atingir o cruzeiro"""
+        return len(self._velocidades_rampa())
+
+    def _velocidades_rampa(self):
+        """Velocidade (passos/s) em cada passo da subida, calculada uma vez"""
+        if self._rampa is None:
+            v0, vmax = 1e6 / self.atraso_inicial_us, 1e6 / self.atraso_cruzeiro_us
+            if self.jerk is None:
+                passos = math.ceil((vmax * vmax - v0 * v0) / (2 * self.aceleracao))
+                self._rampa = [math.sqrt(v0 * v0 + 2 * self.aceleracao * d) for d in range(passos)]
+            else:
+                self._rampa = _rampa_curva_s(v0, vmax, self.aceleracao, self.jerk)
+                _validar_rampa(len(self._rampa))
+        return self._rampa
+
+    def atrasos(self, passos):
+        """Atraso (us) antes de cada passo: sobe, cruza e desce simetricamente"""
+        rampa = self._velocidades_rampa()
+        vmax = 1e6 / self.atraso_cruzeiro_us
+        atrasos = array('H')
+        for i in range(passos):
+            d = min(i, passos - 1 - i)
+            atrasos.append(int(1e6 / (rampa[d] if d < len(rampa) else vmax)))
+        return atrasos
+
+    def duracao_s(self, passos):
+        return (sum(self.atrasos(passos)) + passos * SOBRECARGA_PASSO_US) / 1e6
+
+    def comando(self):
+        """ACEL para o firmware (sempre trapézio com a mesma distância de rampa)"""
+        return f"ACEL:{self.atraso_inicial_us},{self.atraso_cruzeiro_us},{max(1, self.passos_rampa)}"
+
+
+def _validar_rampa(passos):
+    if passos > PASSOS_RAMPA_MAXIMOS:
+        raise ValueError(f"Rampa de {passos} passos excede o máximo de {PASSOS_RAMPA_MAXIMOS}: "
+                         "aumente a aceleração (ou o jerk) ou aproxime os atrasos inicial e de cruzeiro")
+
+
+def _rampa_curva_s(v0, vmax, aceleracao, jerk, dt=1e-4):
+    """Integra a subida com jerk limitado e registra a velocidade a cada passo inteiro"""
+    velocidades = []
+    v, a, posicao = v0, 0.0, 0.0
+    while v < vmax:
+        # Começa a reduzir a aceleração a tempo de chegar ao cruzeiro com a = 0
+        if v + a * a / (2 * jerk) >= vmax:
+            a = max(a - jerk * dt, jerk * dt)
+        else:
+            a = min(a + jerk * dt, aceleracao)
+        v = min(v + a * dt, vmax)
+        posicao += v * dt
+        while len(velocidades) < int(posicao):
+            velocidades.append(v)
+    return velocidades
+
+
+def duracao_constante_s(passos, atraso_us):
+    """Duração atual: todo o movimento no mesmo delayUs"""
+    return passos * (atraso_us + SOBRECARGA_PASSO_US) / 1e6
+
+
+def relatorio_economia(modelo, perfis, atraso_constante_us=5000, paginas_cm=(10, 15, 20, 25, 30)):
+    """Tempo estimado por troca de página: delayUs fixo vs cada perfil
+
+    modelo: objeto com passos_entre (TabelaPassos, GeometriaEspiral); usa o
+    maior dos dois eixos a partir do meio do rolo.
+    """
+    linhas = []
+    for comprimento in paginas_cm:
+        meio = max(0.0, (modelo.comprimento_total_cm - comprimento) / 2)
+        passos = max(abs(round(p)) for p in modelo.passos_entre(meio, meio + comprimento))
+        linha = {
+            'pagina_cm': comprimento,
+            'passos': passos,
+            'constante_s': duracao_constante_s(passos, atraso_constante_us),
+        }
+        for nome, perfil in perfis.items():
+            linha[nome] = perfil.duracao_s(passos)
+        linhas.append(linha)
+    return linhas
+
+
+def main():
+    from simulador_tv import SimuladorTV
+
+    parser = argparse.ArgumentParser(description='Estimativa de tempo por página com rampas de aceleração')
+    parser.add_argument('--constante-us', type=int, default=5000, help='delayUs atual do firmware')
+    parser.add_argument('--inicial-us', type=int, default=5000)
+    parser.add_argument('--cruzeiro-us', type=int, default=1000)
+    parser.add_argument('--aceleracao', type=float, default=2000.0, help='passos/s²')
+    parser.add_argument('--jerk', type=float, default=20000.0, help='passos/s³ (curva S)')
+    args = parser.parse_args()
+
+    perfis = {
+        'trapezio_s': PerfilAceleracao(args.inicial_us, args.cruzeiro_us, args.aceleracao),
+        'curva_s_s': PerfilAceleracao(args.inicial_us, args.cruzeiro_us, args.aceleracao, args.jerk),
+    }
+    linhas = relatorio_economia(SimuladorTV().exportar_tabela_passos(), perfis, args.constante_us)
+
+    print("=" * 72)
+    print(f"Troca de página: {args.constante_us}us fixo vs rampa {args.inicial_us}→{args.cruzeiro_us}us "
+          f"({args.aceleracao:.0f} passos/s², jerk {args.jerk:.0f})")
+    print("=" * 72)
+    print(f"{'página':>7} {'passos':>7} {'fixo':>8} {'trapézio':>10} {'curva S':>9} {'economia':>9}")
+    for l in linhas:
+        economia = 1 - l['trapezio_s'] / l['constante_s']
+        print(f"{l['pagina_cm']:5.0f}cm {l['passos']:7d} {l['constante_s']:7.2f}s {l['trapezio_s']:9.2f}s "
+              f"{l['curva_s_s']:8.2f}s {economia:8.0%}")
+    print(f"\nRampa: trapézio {perfis['trapezio_s'].passos_rampa} passos, "
+          f"curva S {perfis['curva_s_s'].passos_rampa} passos")
+    print(f"Firmware: {perfis['trapezio_s'].comando()}")
+    print("=" * 72)
+
+
+if __name__ == '__main__':
+    main()
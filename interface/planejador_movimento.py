@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Planejador de Movimento - TV Alice
+Transforma um movimento de papel (cm ou páginas) em uma sequência de
+"ticks" com passos independentes para X e Y: a razão Y/X muda ao longo
+do movimento (DDA por segmento) e os atrasos seguem o PerfilAceleracao.
+A sequência é compactada em poucos bytes para enviar ao Arduino
+
+Formato binário (little-endian):
+    cabeçalho  'TM', versão, flags (bit0 = frente), passos X, passos Y,
+               atraso inicial (us), atraso de cruzeiro (us), passos de rampa
+    corpo      1 byte por sequência de ticks iguais:
+               bits 7-6 = padrão (1 = só X, 2 = só Y, 3 = X e Y),
+               bits 5-0 = repetições - 1 (até 64)
+"""
+
+import argparse
+import math
+import struct
+import time
+
+from simulador_tv import SimuladorTV
+from perfil_aceleracao import PerfilAceleracao
+
+FORMATO_CABECALHO = '<2sBBIIHHH'
+MAGIC = b'TM'
+VERSAO = 1
+
+PASSO_X = 1
+PASSO_Y = 2
+PASSO_XY = PASSO_X | PASSO_Y
+REPETICOES_MAXIMAS = 64
+
+
+class Movimento:
+    """Sequência planejada: um padrão (X, Y ou ambos) e um atraso por tick"""
+
+    def __init__(self, inicio_cm, fim_cm, padroes, perfil):
+        self.inicio_cm = inicio_cm
+        self.fim_cm = fim_cm
+        self.padroes = padroes  # bytearray, um código PASSO_* por tick
+        self.perfil = perfil
+
+    def __len__(self):
+        return len(self.padroes)
+
+    @property
+    def frente(self):
+        return self.fim_cm >= self.inicio_cm
+
+    @property
+    def passos_x(self):
+        return sum(1 for p in self.padroes if p & PASSO_X)
+
+    @property
+    def passos_y(self):
+        return sum(1 for p in self.padroes if p & PASSO_Y)
+
+    def atrasos_us(self):
+        """Atraso antes de cada tick, pelo perfil de aceleração (sobe e desce)"""
+        return self.perfil.atrasos(len(self.padroes))
+
+    @property
+    def duracao_s(self):
+        return self.perfil.duracao_s(len(self.padroes))
+
+    def para_bytes(self):
+        cabecalho = struct.pack(FORMATO_CABECALHO, MAGIC, VERSAO, int(self.frente),
+                                self.passos_x, self.passos_y, self.perfil.atraso_inicial_us,
+                                self.perfil.atraso_cruzeiro_us, self.perfil.passos_rampa)
+        corpo = bytearray()
+        padroes = self.padroes
+        i, total = 0, len(padroes)
+        while i < total:
+            padrao = padroes[i]
+            fim = i + 1
+            while fim < total and fim - i < REPETICOES_MAXIMAS and padroes[fim] == padrao:
+                fim += 1
+            corpo.append((padrao << 6) | (fim - i - 1))
+            i = fim
+        return cabecalho + bytes(corpo)
+
+    @classmethod
+    def de_bytes(cls, dados):
+        """Reconstrói a sequência (posições em cm não vão no binário; perfil volta como trapézio)"""
+        (magic, versao, flags, passos_x, passos_y, atraso_inicial_us,
+         atraso_cruzeiro_us, passos_rampa) = struct.unpack_from(FORMATO_CABECALHO, dados)
+        if magic != MAGIC or versao != VERSAO:
+            raise ValueError("Não é um movimento planejado TV Alice (v1)")
+        padroes = bytearray()
+        for byte in dados[struct.calcsize(FORMATO_CABECALHO):]:
+            padroes.extend(bytes([byte >> 6]) * ((byte & 0x3F) + 1))
+        perfil = PerfilAceleracao.de_rampa(atraso_inicial_us, atraso_cruzeiro_us, passos_rampa)
+        movimento = cls(0.0, 1.0 if flags & 1 else -1.0, padroes, perfil)
+        if (movimento.passos_x, movimento.passos_y) != (passos_x, passos_y):
+            raise ValueError("Contagem de passos não confere com o cabeçalho")
+        return movimento
+
+
+class PlanejadorMovimento:
+    """Planeja movimentos de papel sobre um modelo de passos do SimuladorTV
+
+    modelo: qualquer objeto com passos_entre(inicio_cm, fim_cm) -> (X, Y),
+    como TabelaPassos (padrão, gerada pelo SimuladorTV) ou GeometriaEspiral.
+    """
+
+    def __init__(self, simulador=None, modelo=None, comprimento_pagina_cm=20,
+                 resolucao_segmento_mm=5.0, perfil=None):
+        self.simulador = simulador or SimuladorTV()
+        self.modelo = modelo or self.simulador.exportar_tabela_passos()
+        self.comprimento_pagina_cm = comprimento_pagina_cm
+        self.resolucao_segmento_mm = resolucao_segmento_mm  # Trecho com razão Y/X constante
+        self.perfil = perfil or PerfilAceleracao()
+
+    def planejar(self, inicio_cm, fim_cm):
+        """Movimento de inicio_cm a fim_cm (papel enrolado em X)"""
+        total = self.simulador.comprimento_total_cm
+        inicio_cm = max(0.0, min(inicio_cm, total))
+        fim_cm = max(0.0, min(fim_cm, total))
+        distancia = abs(fim_cm - inicio_cm)
+        segmentos = max(1, math.ceil(distancia * 10.0 / self.resolucao_segmento_mm))
+        sentido = 1.0 if fim_cm >= inicio_cm else -1.0
+
+        padroes = bytearray()
+        feitos_x = feitos_y = 0
+        for k in range(1, segmentos + 1):
+            alvo = inicio_cm + sentido * distancia * k / segmentos
+            px, py = self.modelo.passos_entre(inicio_cm, alvo)
+            # Arredondar o acumulado (não cada segmento) evita deriva entre segmentos
+            dx = abs(round(px)) - feitos_x
+            dy = abs(round(py)) - feitos_y
+            feitos_x += dx
+            feitos_y += dy
+            padroes.extend(_dda(dx, dy))
+        return Movimento(inicio_cm, fim_cm, padroes, self.perfil)
+
+    def planejar_paginas(self, pagina_atual, delta):
+        """Movimento de delta páginas (negativo = para trás) a partir de pagina_atual"""
+        inicio = pagina_atual * self.comprimento_pagina_cm
+        return self.planejar(inicio, inicio + delta * self.comprimento_pagina_cm)
+
+
+def _dda(dx, dy):
+    """Intercala dx passos de X e dy de Y (Bresenham no eixo dominante)"""
+    if dx <= 0 and dy <= 0:
+        return b''
+    if dx >= dy:
+        maior, menor, padrao_maior = dx, dy, PASSO_X
+    else:
+        maior, menor, padrao_maior = dy, dx, PASSO_Y
+    ticks = bytearray(maior)
+    erro = maior // 2
+    for i in range(maior):
+        erro -= menor
+        if erro < 0:
+            erro += maior
+            ticks[i] = PASSO_XY
+        else:
+            ticks[i] = padrao_maior
+    return ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Planeja movimentos X/Y e mede a vazão do planejador')
+    parser.add_argument('--inicio-cm', type=float, default=100.0)
+    parser.add_argument('--distancia-cm', type=float, default=20.0)
+    parser.add_argument('--movimentos', type=int, default=2000, help='Movimentos no benchmark')
+    args = parser.parse_args()
+
+    planejador = PlanejadorMovimento()
+    mov = planejador.planejar(args.inicio_cm, args.inicio_cm + args.distancia_cm)
+    dados = mov.para_bytes()
+
+    print("=" * 60)
+    print("PLANEJADOR DE MOVIMENTO - TV Alice")
+    print("=" * 60)
+    print(f"Movimento: {mov.inicio_cm:.1f} → {mov.fim_cm:.1f} cm")
+    print(f"Passos X: {mov.passos_x}  Passos Y: {mov.passos_y}  Ticks: {len(mov)}")
+    print(f"Duração estimada: {mov.duracao_s:.2f} s")
+    print(f"Binário: {len(dados)} bytes ({len(dados) * 8 / len(mov):.2f} bits/tick)")
+
+    inicio = time.perf_counter()
+    for i in range(args.movimentos):
+        posicao = (i * 7.3) % (planejador.simulador.comprimento_total_cm - args.distancia_cm)
+        planejador.planejar(posicao, posicao + args.distancia_cm).para_bytes()
+    decorrido = time.perf_counter() - inicio
+    print(f"Vazão: {args.movimentos / decorrido:,.0f} movimentos/s (planejar + codificar)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Protocolo Compacto - TV Alice
+Codifica/decodifica os quadros de status e eventos ativados com PROTO:KV
+no firmware de calibração:
+
+    $<tipo>,<tamanho>,<payload>*<CRC16 hex>
+
+    $S  status     p=2;s=840;t=2;v=5000;m=0:420,1:840
+    $P  progresso  s=120;i=20;n=100
+    $D  concluído  s=840
+"""
+
+import re
+
+RE_QUADRO = re.compile(r'^\$([A-Z]),(\d+),(.*)\*([0-9A-F]{4})$')
+
+COMANDO_ATIVAR = 'PROTO:KV'
+CONFIRMACAO_ATIVAR = '>>> PROTO:KV'
+
+
+class ErroQuadro(ValueError):
+    """Quadro malformado, com tamanho errado ou CRC inválido"""
+
+
+def crc16(dados):
+    """CRC-16/CCITT-FALSE (polinômio 0x1021, inicial 0xFFFF), igual ao firmware"""
+    crc = 0xFFFF
+    for byte in dados:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+            crc &= 0xFFFF
+    return crc
+
+
+def eh_quadro(linha):
+    return linha.startswith('$')
+
+
+def codificar_quadro(tipo, campos):
+    """Monta a linha do quadro a partir de um dict de campos"""
+    partes = []
+    for chave, valor in campos.items():
+        if chave == 'm':
+            valor = ','.join(f"{p['numero']}:{p['passos']}" for p in valor)
+        partes.append(f"{chave}={valor}")
+    payload = ';'.join(partes)
+    return f"${tipo},{len(payload)},{payload}*{crc16(payload.encode()):04X}"
+
+
+def decodificar_quadro(linha):
+    """Valida e decodifica um quadro; retorna (tipo, campos)"""
+    m = RE_QUADRO.match(linha)
+    if not m:
+        raise ErroQuadro(f"Quadro malformado: {linha!r}")
+    tipo, tamanho, payload, crc = m.group(1), int(m.group(2)), m.group(3), int(m.group(4), 16)
+    dados = payload.encode()
+    if len(dados) != tamanho:
+        raise ErroQuadro(f"Tamanho {len(dados)} != {tamanho}")
+    if crc16(dados) != crc:
+        raise ErroQuadro(f"CRC inválido em {linha!r}")
+
+    # CRC certo não garante payload legível (firmware com bug, campo truncado na origem)
+    campos = {}
+    try:
+        for parte in payload.split(';') if payload else []:
+            chave, _, valor = parte.partition('=')
+            if chave == 'm':
+                campos['m'] = [
+                    {'numero': int(p), 'passos': int(s), 'definida': True}
+                    for p, s in (item.split(':') for item in valor.split(',') if item)
+                ]
+            else:
+                campos[chave] = int(valor)
+    except ValueError as e:
+        raise ErroQuadro(f"Payload inválido em {linha!r}: {e}") from e
+    return tipo, campos
+
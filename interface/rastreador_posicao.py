@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Rastreador de Posição - TV Alice
+Modelo único e autoritativo da posição no servidor: confirmado por cada
+evento do firmware (STATUS, progresso "[i/N]", fim de movimento) e
+extrapolado entre elas pelo ritmo de passos conhecido (delayUs ou rampa
+do ACEL). Traduz "ir para a página P" em comandos sem esperar um STATUS,
+contando com os movimentos já enfileirados
+"""
+
+import bisect
+import itertools
+import re
+import threading
+import time
+from collections import deque
+
+from conexao_serial import ABRINDO
+from parser_firmware import (estado_inicial, aplicar_evento, FIM_STATUS, PROGRESSO,
+                             MOVIMENTO_CONCLUIDO, PARADO, COMANDO_INVALIDO)
+from perfil_aceleracao import (PerfilAceleracao, SOBRECARGA_PASSO_US, FIRMWARES_COM_ACEL,
+                               comando_com_rampa)
+from geometria_espiral import GeometriaEspiral
+
+# Firmwares com página absoluta (GOTO:P, páginas a partir de 0); os demais
+# andam por deslocamento (PAGE:N, páginas a partir de 1)
+FIRMWARES_COM_GOTO = ('calibracao',)
+
+RE_PASSOS_COMANDO = re.compile(r'^([FB]|R):(-?\d+)$')
+RE_GOTO = re.compile(r'^GOTO:(\d+)$')
+RE_PAGE = re.compile(r'^PAGE:(-?\d+)$')
+RE_SETPOS = re.compile(r'^SETPOS:(\d+),(-?\d+)$')
+
+
+class MovimentoEmCurso:
+    """Movimento escrito na porta e ainda não concluído: base da extrapolação
+
+    sentido: +1/-1 (None = passos desconhecidos, ex.: PAGE sem mapeamento);
+    tempos: instante (s) de cada passo desde o início, pela rampa ou pelo
+    atraso constante.
+    """
+
+    def __init__(self, comando, inicio_passos, sentido, total, pagina_alvo, tempos, agora):
+        self.comando = comando
+        self.inicio_passos = inicio_passos
+        self.sentido = sentido
+        self.total = total
+        self.pagina_alvo = pagina_alvo
+        self.tempos = tempos
+        self.iniciado_em = agora
+        self.ancora_passo = 0       # Último passo confirmado pelo firmware
+        self.ancora_em = agora
+
+    def ancorar(self, passo, agora):
+        self.ancora_passo = passo
+        self.ancora_em = agora
+
+    def passo_em(self, agora):
+        """Passos já dados (estimados) no instante agora"""
+        if self.sentido is None or not self.tempos:
+            return self.ancora_passo
+        base = self.tempos[self.ancora_passo - 1] if self.ancora_passo > 0 else 0.0
+        passo = bisect.bisect_right(self.tempos, base + (agora - self.ancora_em))
+        return max(self.ancora_passo, min(passo, self.total))
+
+    def passos_em(self, agora):
+        if self.sentido is None:
+            return self.inicio_passos
+        return self.inicio_passos + self.sentido * self.passo_em(agora)
+
+
+class RastreadorPosicao:
+    """Posição de página/passos/cm mantida a partir de comandos e linhas da serial"""
+
+    def __init__(self, conexao, difusor=None, aceleracao=None, geometria=None, atraso_padrao_us=5000):
+        self.conexao = conexao
+        self.difusor = difusor
+        self.aceleracao = aceleracao      # AceleracaoFirmware: perfil das trocas de página
+        self.geometria = geometria or GeometriaEspiral()
+        self.atraso_padrao_us = atraso_padrao_us  # delayUs de boot do firmware
+        self.estado = estado_inicial()  # Estado do firmware pelos eventos do parser
+        self.movimento = None
+        self.confirmado_em = None  # Última linha que fixou a posição
+        self._previstas = deque()  # (comando, página) traduzidos e ainda não escritos
+        self._lock = threading.Lock()
+        conexao.adicionar_ouvinte_evento(self._receber_evento)
+        conexao.adicionar_ouvinte_comando(self._comando_enviado)
+        conexao.adicionar_ouvinte_estado(self._conexao_mudou)
+
+    # --- Consulta ---
+
+    @property
+    def primeira_pagina(self):
+        return 0 if self.conexao.firmware in FIRMWARES_COM_GOTO else 1
+
+    @property
+    def ultima_pagina(self):
+        e = self.estado
+        if e['total_paginas']:
+            return e['total_paginas']
+        definidas = [p['numero'] for p in e['mapeamento'] if p['definida']]
+        return max(definidas) if definidas else None
+
+    def posicao(self, agora=None):
+        """Página, passos e cm agora (extrapolados se há um movimento em curso)"""
+        agora = agora or time.time()
+        with self._lock:
+            e = self.estado
+            mov = self.movimento
+            passos = mov.passos_em(agora) if mov else e['passos_atual']
+            return {
+                'pagina': e['pagina_atual'],
+                'passos': passos,
+                'cm': round(self.geometria.passos_x_para_cm(max(0, passos)), 2),
+                'pagina_na_posicao': self._pagina_nos_passos(passos),
+                'pagina_destino': self._pagina_destino(),
+                'movendo': mov is not None,
+                'comando': mov.comando if mov else None,
+                'progresso': (mov.passo_em(agora) / mov.total) if mov and mov.total else None,
+                'extrapolado': mov is not None and mov.sentido is not None,
+                'confirmado_em': self.confirmado_em,
+            }
+
+    def _pagina_nos_passos(self, passos):
+        """Última página marcada que começa antes de 'passos' (None sem mapeamento)"""
+        pagina = None
+        for p in self.estado['mapeamento']:
+            if p['definida'] and p['passos'] <= passos:
+                pagina = p['numero']
+        return pagina
+
+    def _pagina_destino(self):
+        """Página ao fim dos movimentos traduzidos e do movimento em curso"""
+        if self._previstas:
+            return self._previstas[-1][1]
+        if self.movimento is not None and self.movimento.pagina_alvo is not None:
+            return self.movimento.pagina_alvo
+        return self.estado['pagina_atual']
+
+    # --- Tradução ---
+
+    def traduzir_pagina(self, pagina):
+        """Comando que leva à página absoluta (None se já estará nela)
+
+        A base é o destino previsto, não a página atual: cliques seguidos
+        não somam deslocamentos calculados sobre o mesmo estado antigo.
+        """
+        with self._lock:
+            destino = self._pagina_destino()
+            if pagina == destino:
+                return None
+            if self.conexao.firmware in FIRMWARES_COM_GOTO:
+                comando = f'GOTO:{pagina}'
+            else:
+                comando = f'PAGE:{pagina - destino}'
+            self._previstas.append((comando, pagina))
+            return comando
+
+    # --- Ouvintes da conexão ---
+
+    def _comando_enviado(self, texto):
+        """Thread serial: o comando acabou de ser escrito na porta"""
+        cmd = texto.strip().upper()
+        agora = time.time()
+        with self._lock:
+            pagina_prevista = None
+            if self._previstas and self._previstas[0][0] == cmd:
+                pagina_prevista = self._previstas.popleft()[1]
+            e = self.estado
+            self.movimento = None
+            m = RE_SETPOS.match(cmd)
+            if m:
+                e['pagina_atual'], e['passos_atual'] = int(m.group(1)), int(m.group(2))
+                self.confirmado_em = agora
+                return
+            if cmd == 'RESET':
+                e['pagina_atual'], e['passos_atual'] = 0, 0
+                self.confirmado_em = agora
+                return
+            # Um comando novo só é escrito depois do anterior terminar: o que não move
+            # encerra também um movimento sem linha final (ex.: página não marcada)
+            movimento = self._planejar(cmd, pagina_prevista, agora)
+            self.movimento = movimento
+        if movimento is not None:
+            self._publicar()
+
+    def _planejar(self, cmd, pagina_prevista, agora):
+        """MovimentoEmCurso para um comando (None se não move)"""
+        e = self.estado
+        atual = e['passos_atual']
+        m = RE_PASSOS_COMANDO.match(cmd)
+        if m:
+            passos = int(m.group(2))
+            sentido = -1 if m.group(1) == 'B' or passos < 0 else 1
+            total = abs(passos)
+            atraso = e['velocidade_us'] or self.atraso_padrao_us
+            return MovimentoEmCurso(cmd, atual, sentido, total, None,
+                                    self._tempos_constantes(total, atraso), agora)
+
+        pagina = pagina_prevista
+        m = RE_GOTO.match(cmd)
+        m_page = RE_PAGE.match(cmd)
+        if m:
+            pagina = int(m.group(1))
+        elif cmd == 'HOME':
+            pagina = 0
+        elif cmd == 'NEXT':
+            pagina = e['pagina_atual'] + 1
+        elif cmd == 'PREV':
+            pagina = max(0, e['pagina_atual'] - 1)
+        elif m_page:
+            if pagina is None:
+                pagina = e['pagina_atual'] + int(m_page.group(1))
+        else:
+            return None
+
+        alvo = 0 if pagina == 0 and cmd in ('HOME', 'GOTO:0') else self._passos_da_pagina(pagina)
+        if alvo is None or alvo == atual:
+            return MovimentoEmCurso(cmd, atual, None, None, pagina, None, agora)
+        total = abs(alvo - atual)
+        return MovimentoEmCurso(cmd, atual, 1 if alvo > atual else -1, total, pagina,
+                                self._tempos_pagina(cmd, total), agora)
+
+    def _passos_da_pagina(self, pagina):
+        for p in self.estado['mapeamento']:
+            if p['numero'] == pagina and p['definida']:
+                return p['passos']
+        return None
+
+    def _tempos_constantes(self, total, atraso_us):
+        periodo = (atraso_us + SOBRECARGA_PASSO_US) / 1e6
+        return [periodo * (i + 1) for i in range(total)]
+
+    def _tempos_pagina(self, cmd, total):
+        """Trocas de página usam a rampa do ACEL (trapézio, como o firmware executa)"""
+        if (self.aceleracao is None or not comando_com_rampa(cmd)
+                or self.conexao.firmware not in FIRMWARES_COM_ACEL):
+            return self._tempos_constantes(total, self.estado['velocidade_us'] or self.atraso_padrao_us)
+        p = self.aceleracao.perfil
+        trapezio = PerfilAceleracao.de_rampa(p.atraso_inicial_us, p.atraso_cruzeiro_us, max(1, p.passos_rampa))
+        return list(itertools.accumulate((a + SOBRECARGA_PASSO_US) / 1e6 for a in trapezio.atrasos(total)))
+
+    def _receber_evento(self, evento):
+        """Thread serial: confirma a posição a cada evento que a informa"""
+        agora = time.time()
+        publicar = False
+        with self._lock:
+            aplicar_evento(self.estado, evento)
+            mov = self.movimento
+            if evento.tipo == PROGRESSO and mov is not None:
+                if evento.dados['passo'] is not None:
+                    mov.ancorar(evento.dados['passo'], agora)
+                self.confirmado_em = agora
+            elif evento.tipo in (MOVIMENTO_CONCLUIDO, PARADO, COMANDO_INVALIDO) and mov is not None:
+                self.movimento = None
+                self.confirmado_em = agora
+                publicar = True
+            elif evento.tipo == FIM_STATUS:
+                self.confirmado_em = agora
+                publicar = True
+            if evento.tipo == PARADO:
+                self._previstas.clear()  # Comandos enfileirados foram cancelados pelo STOP
+        if publicar:
+            self._publicar()
+
+    def _conexao_mudou(self, estado):
+        if estado == ABRINDO:
+            with self._lock:
+                self.estado = estado_inicial()
+                self.movimento = None
+                self.confirmado_em = None
+                self._previstas.clear()
+
+    def _publicar(self):
+        if self.difusor is not None:
+            self.difusor.publicar(self.posicao(), evento='posicao')
+
+    def diagnostico(self):
+        with self._lock:
+            return {
+                'movimento': self.movimento.comando if self.movimento else None,
+                'previstas': [comando for comando, _ in self._previstas],
+            }
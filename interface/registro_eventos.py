@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Registro de Eventos - TV Alice
+Últimos eventos do sistema (conexão, comandos, IR, trabalhos) num buffer
+circular de capacidade fixa, lidos por cursor: cada evento tem um id
+crescente e o cliente pede só os posteriores ao último que viu
+(/log?after=N). Memória constante em telas que ficam dias ligadas; quem
+ficou para trás recebe o que ainda existe e quantos eventos perdeu
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+
+from parser_firmware import COMANDO_IR, COMANDO_INVALIDO, PARADO
+
+# Consultas periódicas e de negociação: só ruído no registro
+COMANDOS_SILENCIOSOS = ('STATUS', 'PING')
+
+# Tipos de evento
+CONEXAO = 'conexao'
+COMANDO = 'comando'
+FIRMWARE = 'firmware'
+TRABALHO = 'trabalho'
+
+ESTADOS_CONEXAO = {
+    'desconectado': '❌ Desconectado',
+    'abrindo': '🔌 Abrindo a porta',
+    'aguardando_banner': '⏳ Aguardando o Arduino',
+    'negociando': '🤝 Negociando velocidade e protocolo',
+    'pronto': '✅ Conectado ao Arduino',
+}
+
+
+def mensagem_evento_firmware(evento):
+    """Texto do evento do parser, ou None se não vai para o registro"""
+    if evento.tipo == COMANDO_IR:
+        return f"🎮 IR: {evento.dados['tecla']} (0x{evento.dados['codigo']})"
+    if evento.tipo == COMANDO_INVALIDO:
+        return f"⚠️ Comando inválido: {evento.dados['comando']}"
+    if evento.tipo == PARADO:
+        return '🛑 Motor parado'
+    return None
+
+
+class RegistroEventos:
+    """Buffer circular de eventos estruturados com leitura por cursor"""
+
+    def __init__(self, conexao, difusor, capacidade=500):
+        self.difusor = difusor
+        self.capacidade = capacidade
+        self._eventos = deque(maxlen=capacidade)
+        self._ids = itertools.count(1)
+        self.ultimo_id = 0
+        self._lock = threading.Lock()
+        conexao.adicionar_ouvinte_estado(self._conexao_mudou)
+        conexao.adicionar_ouvinte_comando(self._comando_enviado)
+        conexao.adicionar_ouvinte_evento(self._receber_evento)
+
+    def registrar(self, tipo, mensagem, **dados):
+        """Guarda o evento (o mais antigo sai se o buffer estiver cheio) e o publica como SSE 'log'"""
+        with self._lock:
+            entrada = {'id': next(self._ids), 'em': time.time(), 'tipo': tipo,
+                       'mensagem': mensagem, 'dados': dados}
+            self._eventos.append(entrada)
+            self.ultimo_id = entrada['id']
+        self.difusor.publicar(entrada, evento='log')
+        return entrada
+
+    def depois(self, cursor=None, limite=100):
+        """(eventos com id > cursor, em ordem, até 'limite'; quantos já saíram do buffer)
+
+        Sem cursor, os 'limite' mais recentes. Um cursor à frente do último
+        id (servidor reiniciado) recomeça do início do buffer.
+        """
+        with self._lock:
+            if not self._eventos:
+                return [], 0
+            primeiro = self._eventos[0]['id']
+            if cursor is None:
+                inicio = max(len(self._eventos) - limite, 0)
+            elif cursor > self.ultimo_id:
+                inicio = 0
+            else:
+                inicio = max(cursor + 1 - primeiro, 0)
+            # Ids consecutivos: a posição no buffer sai direto do cursor
+            eventos = list(itertools.islice(self._eventos, inicio, inicio + limite))
+        perdidos = primeiro - cursor - 1 if cursor is not None and cursor < primeiro - 1 else 0
+        return eventos, perdidos
+
+    def _conexao_mudou(self, estado):
+        self.registrar(CONEXAO, ESTADOS_CONEXAO.get(estado, estado), estado=estado)
+
+    def _comando_enviado(self, texto):
+        if texto.strip().upper() not in COMANDOS_SILENCIOSOS:
+            self.registrar(COMANDO, f"📤 {texto}", comando=texto)
+
+    def _receber_evento(self, evento):
+        mensagem = mensagem_evento_firmware(evento)
+        if mensagem is not None:
+            self.registrar(FIRMWARE, mensagem, evento=evento.tipo, **evento.dados)
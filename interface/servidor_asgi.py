@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Servidor Asyncio (ASGI) - TV Alice
+Mesmas páginas e rotas do servidor único, com todas as rotas como
+corrotinas (Quart) sobre os mesmos corpos de rota do api_tv_alice.py;
+aqui só muda a espera. Requisições que aguardam o Arduino não prendem uma
+thread: a thread serial, ainda a única dona da porta, conclui cada comando
+com um call_soon_threadsafe no laço. Os fluxos /eventos compartilham uma
+única assinatura do difusor, então centenas de observadores cabem em um
+núcleo.
+Acesse http://localhost:5000 (show) e http://localhost:5000/calibracao
+
+    pip3 install quart
+    python3 servidor_asgi.py            # ou: hypercorn servidor_asgi:app
+"""
+
+import asyncio
+import json
+import queue
+import time
+
+from quart import Quart, render_template_string, request, jsonify, Response
+
+import api_tv_alice
+from api_tv_alice import (conexao, difusor, supervisor, reconexao_automatica, ErroApi, NAO_CONECTADO,
+                          SEM_STATUS, exigir_conexao, porta_da_requisicao, conexao_aberta, diagnostico_geral,
+                          comando_da_requisicao, resposta_do_comando, resposta_da_parada,
+                          lote_da_requisicao, resposta_do_lote, trabalho_da_requisicao, trabalhos_recentes,
+                          trabalho_por_id, posicao_atual, ir_para_pagina, etag_do_estado, dados_do_status,
+                          dados_da_exportacao, mapas_do_dispositivo, mapa_do_perfil, salvar_perfil,
+                          remover_perfil, perfil_para_upload, diferencas_do_upload, resposta_do_upload,
+                          ajuste_do_estado, log_do_registro)
+import interface_tv_alice
+import calibracao
+
+app = Quart(__name__)
+
+# Espera por eventos da thread serial sem callback (prontidão do cache, parada)
+INTERVALO_ESPERA = 0.005
+
+
+class PonteDifusor:
+    """Uma única assinatura do difusor repassada a todos os fluxos SSE do laço
+
+    A thread serial faz uma chamada por publicação (call_soon_threadsafe);
+    o JSON é gerado uma vez e copiado para a fila de cada observador no
+    próprio laço, sem thread por cliente.
+    """
+
+    def __init__(self, difusor):
+        self.difusor = difusor
+        self.laco = None
+        self._filas = set()
+
+    # Interface de fila usada por DifusorEstado.publicar (thread serial)
+    def put_nowait(self, item):
+        self.laco.call_soon_threadsafe(self._distribuir, item)
+
+    def get_nowait(self):
+        raise queue.Empty
+
+    @property
+    def total_observadores(self):
+        return len(self._filas)
+
+    def _distribuir(self, item):
+        evento, dados = item
+        if evento:
+            texto = f"event: {evento}\ndata: {json.dumps(dados)}\n\n"
+        else:
+            texto = f"data: {json.dumps(dados)}\n\n"
+        for fila in self._filas:
+            if fila.full():
+                fila.get_nowait()  # Descarta o mais antigo, como o difusor
+            fila.put_nowait(texto)
+
+    def assinar(self):
+        fila = asyncio.Queue(maxsize=self.difusor.capacidade_fila)
+        if not self._filas:
+            # Só assina com observadores: o STATUS periódico depende disso
+            self.laco = asyncio.get_running_loop()
+            self.difusor.assinar(self)
+        self._filas.add(fila)
+        return fila
+
+    def cancelar(self, fila):
+        self._filas.discard(fila)
+        if not self._filas:
+            self.difusor.cancelar(self)
+
+    async def fluxo_sse(self):
+        """Gerador assíncrono de 'text/event-stream'"""
+        fila = self.assinar()
+        try:
+            yield f"data: {json.dumps(self.difusor.estado)}\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(fila.get(), self.difusor.intervalo_keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self.cancelar(fila)
+
+
+ponte = PonteDifusor(difusor)
+
+
+def _resolver(futuros, cmd):
+    futuro = futuros.get(cmd.id)
+    if futuro is not None and not futuro.done():
+        futuro.set_result(cmd)
+
+async def enviar(textos, timeout=None, lote=False):
+    """Como ConexaoSerial.enviar/enviar_lote, aguardando as respostas sem bloquear o laço"""
+    laco = asyncio.get_running_loop()
+    futuros = {}
+    # Chamado na thread serial; o futuro é resolvido no laço, depois de registrado abaixo
+    ao_concluir = lambda cmd: laco.call_soon_threadsafe(_resolver, futuros, cmd)
+    if lote:
+        cmds = conexao.enfileirar_lote(textos, timeout, ao_concluir=ao_concluir)
+    else:
+        cmds = [conexao.enfileirar(texto, timeout, ao_concluir=ao_concluir) for texto in textos]
+    for cmd in cmds:
+        futuros[cmd.id] = laco.create_future()
+    for cmd in cmds:
+        # O prazo de cada um só começa quando o anterior termina
+        try:
+            await asyncio.wait_for(futuros[cmd.id], cmd.timeout + conexao.espera_inicial)
+        except asyncio.TimeoutError:
+            cmd.erro = 'Tempo esgotado aguardando resposta'
+    return cmds
+
+async def aguardar(condicao, timeout):
+    """Espera condicao() (estado da thread serial) sem prender thread: consulta a cada INTERVALO_ESPERA"""
+    prazo = time.monotonic() + timeout
+    while not condicao():
+        if time.monotonic() >= prazo:
+            return False
+        await asyncio.sleep(INTERVALO_ESPERA)
+    return True
+
+async def aguardar_carregado(timeout=2.5):
+    """Como DifusorEstado.aguardar_carregado, sem bloquear o laço"""
+    if not difusor.carregado:
+        difusor.atualizar()
+    return await aguardar(lambda: difusor.carregado, timeout)
+
+async def aguardar_valido(timeout=2.5):
+    """Como DifusorEstado.aguardar_valido, sem bloquear o laço"""
+    if not difusor.valido:
+        difusor.atualizar()
+    return await aguardar(lambda: difusor.valido, timeout)
+
+@app.before_serving
+async def iniciar_reconexao():
+    if reconexao_automatica:
+        supervisor.ativar(api_tv_alice.port)
+
+@app.errorhandler(ErroApi)
+async def erro_api(e):
+    return jsonify(e.corpo), e.codigo
+
+@app.route('/')
+async def index():
+    return await render_template_string(interface_tv_alice.HTML_TEMPLATE, outra_pagina='/calibracao')
+
+@app.route('/calibracao')
+async def calibration():
+    return await render_template_string(calibracao.HTML_TEMPLATE, outra_pagina='/')
+
+@app.route('/connect', methods=['POST'])
+async def connect_arduino():
+    try:
+        porta, resposta = porta_da_requisicao(await request.get_json())
+        if resposta is None:
+            # Abrir a porta (e fechar a anterior, até 1 s) fica fora do laço
+            await asyncio.get_running_loop().run_in_executor(None, conexao.conectar, porta)
+            resposta = conexao_aberta()
+        return jsonify(resposta)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/disconnect', methods=['POST'])
+async def disconnect_arduino():
+    supervisor.desativar()
+    await asyncio.get_running_loop().run_in_executor(None, conexao.desconectar)
+    return jsonify({'success': True})
+
+@app.route('/eventos')
+async def stream_events():
+    response = Response(ponte.fluxo_sse(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    response.timeout = None  # Fluxo sem fim: sem o RESPONSE_TIMEOUT do Quart
+    return response
+
+@app.route('/diagnostics')
+async def diagnostics():
+    return jsonify(diagnostico_geral(request.args, observadores=ponte.total_observadores))
+
+@app.route('/command', methods=['POST'])
+async def send_command():
+    command = comando_da_requisicao(await request.get_json())
+    cmd, = await enviar([command])
+    return jsonify(resposta_do_comando(cmd))
+
+@app.route('/stop', methods=['POST'])
+async def stop_motor():
+    """Parada de emergência: fura a fila, interrompe o movimento e cancela os trabalhos pendentes"""
+    recebida_em = time.perf_counter()
+    exigir_conexao()
+    # A escrita (1 byte, sob o lock de escrita) acontece aqui; só a confirmação é aguardada
+    parada = conexao.iniciar_parada(recebida_em)
+    if parada.erro is None:
+        await aguardar(parada.concluida.is_set, conexao.timeout_parada + conexao.espera_inicial)
+    return jsonify(resposta_da_parada(parada))
+
+@app.route('/batch', methods=['POST'])
+async def send_batch():
+    """Lista de comandos em uma requisição; resultados e tempos por comando"""
+    data = await request.get_json()
+    commands = lote_da_requisicao(data)
+    inicio = time.time()
+    cmds = await enviar(commands, timeout=data.get('timeout'), lote=True)
+    return jsonify(resposta_do_lote(cmds, inicio))
+
+@app.route('/jobs', methods=['POST'])
+async def submit_job():
+    """Movimento longo: retorna o ID na hora; andamento em /jobs/<id> e em /eventos"""
+    corpo, codigo = trabalho_da_requisicao(await request.get_json())
+    return jsonify(corpo), codigo
+
+@app.route('/jobs')
+async def list_jobs():
+    return jsonify(trabalhos_recentes())
+
+@app.route('/jobs/<int:job_id>')
+async def get_job(job_id):
+    return jsonify(trabalho_por_id(job_id))
+
+@app.route('/position')
+async def get_position():
+    """Posição autoritativa do servidor (extrapolada durante movimentos)"""
+    return jsonify(posicao_atual())
+
+@app.route('/goto', methods=['POST'])
+async def goto_page():
+    """Página absoluta ('first', 'last' ou número) traduzida no servidor, sem STATUS extra"""
+    corpo, codigo = ir_para_pagina(await request.get_json())
+    return jsonify(corpo), codigo
+
+async def status_response(corpo, estado):
+    """Resposta JSON com ETag da versão do cache (304 se o cliente já a tem)"""
+    response = jsonify(corpo)
+    response.set_etag(etag_do_estado(estado))
+    return await response.make_conditional(request)
+
+@app.route('/status')
+async def get_status():
+    exigir_conexao()
+    # Responde da memória; só aguarda a serial antes do primeiro STATUS
+    if not await aguardar_carregado(timeout=2.5):
+        raise ErroApi(SEM_STATUS)
+    estado = difusor.estado
+    return await status_response(dados_do_status(estado), estado)
+
+@app.route('/export')
+async def export_data():
+    if not conexao.conectado:
+        return jsonify({'error': NAO_CONECTADO})
+    if not await aguardar_carregado(timeout=2.5):
+        return jsonify({'error': 'Não foi possível obter dados'})
+    estado = difusor.estado
+    return await status_response(dados_da_exportacao(estado), estado)
+
+# Mapas por perfil de papel: SQLite local (consultas curtas, feitas no próprio laço)
+@app.route('/maps')
+async def list_maps():
+    return jsonify(mapas_do_dispositivo())
+
+@app.route('/maps/<profile>')
+async def get_map(profile):
+    return jsonify(mapa_do_perfil(profile))
+
+@app.route('/maps/<profile>', methods=['POST'])
+async def save_map(profile):
+    """Guarda o mapa enviado ('mapping') ou, sem ele, o mapa atual do Arduino"""
+    data = await request.get_json(silent=True) or {}
+    if 'mapping' in data:
+        return jsonify(salvar_perfil(profile, data['mapping']))
+    exigir_conexao()
+    if not await aguardar_valido(timeout=2.5):
+        raise ErroApi(SEM_STATUS)
+    return jsonify(salvar_perfil(profile, difusor.estado['mapeamento']))
+
+@app.route('/maps/<profile>', methods=['DELETE'])
+async def delete_map(profile):
+    return jsonify(remover_perfil(profile))
+
+@app.route('/maps/<profile>/upload', methods=['POST'])
+async def upload_map(profile):
+    """Leva o perfil ao Arduino enviando só as páginas diferentes (gravadas na EEPROM)"""
+    destino = perfil_para_upload(profile)
+    if not await aguardar_valido(timeout=2.5):
+        raise ErroApi(SEM_STATUS)
+    entradas, commands = diferencas_do_upload(destino)
+    inicio = time.time()
+    cmds = await enviar(commands, lote=True) if commands else []
+    return jsonify(resposta_do_upload(entradas, commands, cmds, inicio))
+
+@app.route('/fit')
+async def fit_geometry():
+    """Núcleo e espessura ajustados às páginas marcadas e passos previstos das demais (sem serial)"""
+    exigir_conexao()
+    if not await aguardar_carregado(timeout=2.5):
+        raise ErroApi(SEM_STATUS)
+    # Microssegundos de aritmética: roda no próprio laço
+    return jsonify(ajuste_do_estado(difusor.estado, request.args))
+
+@app.route('/log')
+async def get_log():
+    """Registro de eventos em memória constante, lido por cursor (?after=id&limit=n)"""
+    return jsonify(log_do_registro(request.args))
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("Servidor Asyncio - TV Alice")
+    print("=" * 50)
+    print(f"Controle de rolos: http://localhost:5000")
+    print(f"Calibração:        http://localhost:5000/calibracao")
+    print("=" * 50)
+    # Um processo, um laço: sem reloader (o filho abriria a serial uma segunda vez)
+    app.run(host='0.0.0.0', port=5000, use_reloader=False)
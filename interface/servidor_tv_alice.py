@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Servidor Único - TV Alice
+Controle de rolos e calibração no mesmo processo, sobre uma única conexão
+serial: trocar de interface não reabre a porta nem reinicia o Arduino
+Acesse http://localhost:5000 (show) e http://localhost:5000/calibracao
+"""
+
+from flask import Flask, render_template_string
+from api_tv_alice import api, iniciar_reconexao
+import interface_tv_alice
+import calibracao
+
+app = Flask(__name__)
+app.register_blueprint(api)
+
+@app.route('/')
+def index():
+    return render_template_string(interface_tv_alice.HTML_TEMPLATE, outra_pagina='/calibracao')
+
+@app.route('/calibracao')
+def calibration():
+    return render_template_string(calibracao.HTML_TEMPLATE, outra_pagina='/')
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("Servidor Único - TV Alice")
+    print("=" * 50)
+    print(f"Controle de rolos: http://localhost:5000")
+    print(f"Calibração:        http://localhost:5000/calibracao")
+    print("=" * 50)
+    iniciar_reconexao()
+    app.run(debug=True, host='0.0.0.0', port=5000)
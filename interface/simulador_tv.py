@@ -5,6 +5,17 @@ Simula movimento dos rolos e mostra como diâmetros mudam
 """
 
 import math
+from array import array
+
+from tabela_passos import TabelaPassos
+
+try:
+    import numpy as np
+except ImportError:  # Opcional: só os métodos *_lote dependem dele
+    np = None
+
+ESPESSURA_PAPEL_MM = 0.1  # Ajustar conforme papel real
+PASSOS_POR_VOLTA = 200    # NEMA 17
 
 class SimuladorTV:
     def __init__(self, diametro_inicial_mm=41, comprimento_total_cm=150):
@@ -16,9 +27,7 @@ class SimuladorTV:
     def calcular_diametro(self, comprimento_enrolado_cm):
         """Calcula diâmetro atual baseado no comprimento enrolado"""
         # Aproximação: considerando espessura do papel
-        # Fator de espessura (ajustar conforme papel real)
-        espessura_papel_mm = 0.1
-        fator = espessura_papel_mm * 2.0
+        fator = ESPESSURA_PAPEL_MM * 2.0
         
         # Diâmetro aumenta proporcionalmente ao comprimento enrolado
         # Fórmula simplificada: diâmetro = inicial + (comprimento × fator / perímetro_inicial)
@@ -39,7 +48,7 @@ class SimuladorTV:
         """Calcula passos necessários para mover comprimento dado"""
         perimetro_cm = self.calcular_perimetro(diametro_mm)
         voltas = comprimento_cm / perimetro_cm
-        passos = voltas * 200  # NEMA 17: 200 passos/volta
+        passos = voltas * PASSOS_POR_VOLTA
         return passos
     
     def calcular_relacao_velocidade(self, comprimento_cm):
@@ -58,6 +67,73 @@ class SimuladorTV:
             'relacao': passos_Y / passos_X if passos_X > 0 else 0
         }
     
+    def exportar_tabela_passos(self, resolucao_mm=0.1):
+        """Tabela de passos acumulados de X e Y a cada resolucao_mm de papel
+
+        Integra calcular_passos_necessarios no ponto médio de cada intervalo;
+        consultas depois são por interpolação (TabelaPassos.passos_entre).
+        """
+        delta_cm = resolucao_mm / 10
+        pontos = int(round(self.comprimento_total_cm / delta_cm)) + 1
+        passos_x, passos_y = array('i', [0]), array('i', [0])
+        acumulado_x = acumulado_y = 0.0
+        for i in range(1, pontos):
+            meio_cm = (i - 0.5) * delta_cm
+            acumulado_x += self.calcular_passos_necessarios(delta_cm, self.calcular_diametro(meio_cm))
+            acumulado_y += self.calcular_passos_necessarios(
+                delta_cm, self.calcular_diametro(self.comprimento_total_cm - meio_cm))
+            passos_x.append(round(acumulado_x))
+            passos_y.append(round(acumulado_y))
+        return TabelaPassos(passos_x, passos_y, resolucao_mm, self.diametro_inicial_mm,
+                            ESPESSURA_PAPEL_MM, self.comprimento_total_cm, PASSOS_POR_VOLTA)
+
+    # --- Versões em lote (NumPy): arrays de entrada, arrays de saída ---
+
+    def calcular_diametro_lote(self, comprimento_enrolado_cm, diametro_inicial_mm=None, espessura_mm=None):
+        """calcular_diametro para um array de comprimentos (e opcionalmente de diâmetros iniciais e espessuras)"""
+        _exigir_numpy()
+        d0 = np.asarray(self.diametro_inicial_mm if diametro_inicial_mm is None else diametro_inicial_mm,
+                        dtype=float)
+        fator = np.asarray(ESPESSURA_PAPEL_MM if espessura_mm is None else espessura_mm, dtype=float) * 2.0
+        diametro = d0 + np.asarray(comprimento_enrolado_cm, dtype=float) * (10.0 * fator / math.pi) / d0
+        return np.maximum(diametro, d0)
+
+    def calcular_passos_necessarios_lote(self, comprimento_cm, diametro_mm):
+        """calcular_passos_necessarios com broadcasting entre comprimentos e diâmetros"""
+        _exigir_numpy()
+        perimetro_cm = np.asarray(diametro_mm, dtype=float) * (math.pi / 10)
+        return np.asarray(comprimento_cm, dtype=float) / perimetro_cm * PASSOS_POR_VOLTA
+
+    def calcular_relacao_velocidade_lote(self, comprimento_cm, comprimento_enrolado_X=None,
+                                         diametro_inicial_mm=None, espessura_mm=None):
+        """calcular_relacao_velocidade para vários movimentos, posições, núcleos e/ou espessuras de uma vez
+
+        Sem comprimento_enrolado_X usa a posição atual do simulador; Y recebe
+        sempre o restante do papel (comprimento_total_cm - X). Sem espessura_mm
+        usa ESPESSURA_PAPEL_MM.
+        """
+        _exigir_numpy()
+        if comprimento_enrolado_X is None:
+            comprimento_enrolado_X = self.comprimento_enrolado_X
+        enrolado_X = np.asarray(comprimento_enrolado_X, dtype=float)
+        diametro_X = self.calcular_diametro_lote(enrolado_X, diametro_inicial_mm, espessura_mm)
+        diametro_Y = self.calcular_diametro_lote(self.comprimento_total_cm - enrolado_X, diametro_inicial_mm,
+                                                 espessura_mm)
+
+        passos_X = self.calcular_passos_necessarios_lote(comprimento_cm, diametro_X)
+        passos_Y = self.calcular_passos_necessarios_lote(comprimento_cm, diametro_Y)
+
+        # passos_Y / passos_X, com 0 onde X não se move (igual à versão escalar)
+        relacao = np.divide(passos_Y, passos_X, out=np.zeros(np.broadcast(passos_X, passos_Y).shape),
+                            where=passos_X > 0)
+        return {
+            'diametro_X': diametro_X,
+            'diametro_Y': diametro_Y,
+            'passos_X': passos_X,
+            'passos_Y': passos_Y,
+            'relacao': relacao
+        }
+
     def mover_papel(self, comprimento_cm, direcao='frente'):
         """Simula movimento do papel"""
         if direcao == 'frente':
@@ -142,6 +218,10 @@ class SimuladorTV:
         
         print("=" * 60)
 
+def _exigir_numpy():
+    if np is None:
+        raise ImportError("NumPy é necessário para os cálculos em lote (pip3 install numpy)")
+
 def main():
     print("Simulador TV Alice - Sistema de Rolos Sincronizados\n")
     
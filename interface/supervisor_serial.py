@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Supervisor Serial - TV Alice
+Mantém a conexão viva sem intervenção: descobre portas candidatas,
+reconhece o firmware pelo banner do boot, reconecta com backoff após
+erros de E/S ou troca de cabo e restaura a última posição conhecida
+"""
+
+import os
+import re
+import threading
+import time
+
+from serial.tools import list_ports
+
+from conexao_serial import DESCONECTADO
+
+# Portas típicas do Arduino (macOS / Linux / Windows)
+RE_PORTA_CANDIDATA = re.compile(r'(usbmodem|usbserial|ttyACM|ttyUSB|COM\d+)', re.IGNORECASE)
+
+# VIDs USB de Arduino oficiais e conversores comuns (CH340, FTDI)
+VIDS_ARDUINO = (0x2341, 0x2A03, 0x1A86, 0x0403)
+
+# Firmwares que entendem SETPOS:P,N
+FIRMWARES_COM_SETPOS = ('calibracao',)
+
+
+def portas_candidatas(preferida=None):
+    """Lista portas que parecem um Arduino, com a preferida primeiro"""
+    portas = []
+    for info in list_ports.comports():
+        if info.vid in VIDS_ARDUINO or RE_PORTA_CANDIDATA.search(info.device):
+            portas.append(info.device)
+    if preferida:
+        portas = [preferida] + [p for p in portas if p != preferida]
+    return portas
+
+
+def porta_presente(port):
+    """A porta ainda existe no sistema (cabo ligado)?
+
+    COMx no Windows não tem arquivo: vale a lista do comports(). Portas que
+    ela não enumera (pty do emulador, links em /dev/serial/by-id) contam se
+    o caminho existir.
+    """
+    if any(info.device == port for info in list_ports.comports()):
+        return True
+    return os.path.exists(port)
+
+
+class SupervisorSerial:
+    """Thread que reconecta a porta serial automaticamente"""
+
+    def __init__(self, conexao, difusor, intervalo=1.0, backoff_inicial=0.5, backoff_maximo=30.0):
+        self.conexao = conexao
+        self.difusor = difusor
+        self.intervalo = intervalo
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.port = None             # Última porta que funcionou (tentada primeiro)
+        self.ativo = False
+        self.reconexoes = 0
+        self.ultima_queda = None
+        self.ultima_reconexao_s = None
+        self._posicao = None         # (pagina, passos) no momento da queda
+        self._firmware = None
+        self._conectando = False
+        self._thread = None
+        conexao.adicionar_ouvinte_estado(self._conexao_mudou)
+
+    def ativar(self, port=None):
+        """Liga a supervisão (chamado em /connect e na inicialização)"""
+        if port:
+            self.port = port
+        self.ativo = True
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, name='supervisor-serial', daemon=True)
+            self._thread.start()
+
+    def desativar(self):
+        """Desconexão pedida pelo operador: não reconectar"""
+        self.ativo = False
+        self._posicao = None
+
+    def diagnostico(self):
+        return {
+            'ativo': self.ativo,
+            'port': self.port,
+            'reconexoes': self.reconexoes,
+            'ultima_queda': self.ultima_queda,
+            'ultima_reconexao_s': self.ultima_reconexao_s,
+        }
+
+    def _conexao_mudou(self, estado):
+        if estado == DESCONECTADO and self.ativo and not self._conectando:
+            # Queda inesperada: guardar a posição para restaurar depois
+            e = self.difusor.estado
+            if e['versao'] and self.difusor.carregado:
+                self._posicao = (e['pagina_atual'], e['passos_atual'])
+            self._firmware = self.conexao.firmware
+            self.ultima_queda = time.time()
+
+    def _executar(self):
+        espera = self.backoff_inicial
+        while True:
+            time.sleep(self.intervalo)
+            if not self.ativo:
+                continue
+
+            if self.conexao.conectado:
+                # Cabo removido sem erro de leitura ainda: forçar a queda
+                if not porta_presente(self.conexao.port):
+                    self.conexao.desconectar()
+                espera = self.backoff_inicial
+                continue
+
+            if self._tentar_conectar():
+                self._restaurar_posicao()
+                espera = self.backoff_inicial
+            else:
+                time.sleep(espera)
+                espera = min(espera * 2, self.backoff_maximo)
+
+    def _tentar_conectar(self):
+        """Tenta cada porta candidata até uma responder com banner de firmware"""
+        self._conectando = True
+        try:
+            for port in portas_candidatas(self.port):
+                if not self.ativo:
+                    return False
+                # Sem banner só aceitamos a porta já conhecida (placa que não reinicia ao abrir);
+                # as demais ficam em silêncio até o banner de um firmware reconhecido
+                conhecida = port == self.port
+                try:
+                    self.conexao.conectar(port, exigir_firmware=not conhecida)
+                    pronto = self._aguardar_pronto(self.conexao.timeout_banner + 3.0)
+                except Exception:
+                    pronto = False
+                if pronto and (self.conexao.banner or conhecida):
+                    self.port = port
+                    self.reconexoes += 1
+                    if self.ultima_queda:
+                        self.ultima_reconexao_s = time.time() - self.ultima_queda
+                    return True
+                self.conexao.desconectar()
+            return False
+        finally:
+            self._conectando = False
+
+    def _aguardar_pronto(self, timeout):
+        """Como ConexaoSerial.aguardar_pronto, mas desiste logo se a porta foi recusada"""
+        prazo = time.time() + timeout
+        while self.conexao.conectado and time.time() < prazo:
+            if self.conexao.aguardar_pronto(0.05):
+                return True
+        return self.conexao.pronto
+
+    def _restaurar_posicao(self):
+        """Se o Arduino reiniciou, devolve a ele a página/passos de antes da queda"""
+        if self._posicao is None or self.conexao.firmware != self._firmware:
+            return
+        if self.conexao.firmware not in FIRMWARES_COM_SETPOS:
+            return
+        if not self.difusor.aguardar_carregado(timeout=3.0):
+            return
+        pagina, passos = self._posicao
+        e = self.difusor.estado
+        if (e['pagina_atual'], e['passos_atual']) != (pagina, passos):
+            self.conexao.enviar(f'SETPOS:{pagina},{passos}', timeout=3.0)
+        self._posicao = None
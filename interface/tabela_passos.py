@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tabela de Passos - TV Alice
+Tabela pré-calculada posição do papel → passos acumulados de cada rolo,
+gerada pelo SimuladorTV. Consulta e "passos entre A e B" em O(1) por
+interpolação; exporta em binário compacto (cabeçalho + int32) e como
+cabeçalho C (PROGMEM) para o firmware
+"""
+
+import argparse
+import struct
+import sys
+from array import array
+
+# Cabeçalho do binário (little-endian):
+# magic, versão, reservado, passos/volta, pontos, resolução (mm),
+# diâmetro inicial (mm), espessura (mm), comprimento total (cm)
+FORMATO_CABECALHO = '<4sBBHIffff'
+MAGIC = b'TVAP'
+VERSAO = 1
+
+
+class TabelaPassos:
+    """Passos acumulados de X (enrolando) e Y (desenrolando) por posição do papel
+
+    O índice i corresponde a i × resolucao_mm de papel enrolado em X
+    (0 = todo o papel em Y).
+    """
+
+    def __init__(self, passos_x, passos_y, resolucao_mm, diametro_inicial_mm,
+                 espessura_mm, comprimento_total_cm, passos_por_volta):
+        self.passos_x = passos_x
+        self.passos_y = passos_y
+        self.resolucao_mm = resolucao_mm
+        self.diametro_inicial_mm = diametro_inicial_mm
+        self.espessura_mm = espessura_mm
+        self.comprimento_total_cm = comprimento_total_cm
+        self.passos_por_volta = passos_por_volta
+
+    def __len__(self):
+        return len(self.passos_x)
+
+    def _indice(self, posicao_cm):
+        """Índice inteiro e fração para interpolar (posição limitada ao papel)"""
+        posicao_cm = max(0.0, min(posicao_cm, self.comprimento_total_cm))
+        indice, fracao = divmod(posicao_cm * 10.0 / self.resolucao_mm, 1.0)
+        indice = int(indice)
+        if indice >= len(self.passos_x) - 1:
+            return len(self.passos_x) - 2, 1.0
+        return indice, fracao
+
+    def passos_em(self, posicao_cm):
+        """Passos acumulados (X, Y) desde o início do papel até a posição"""
+        i, f = self._indice(posicao_cm)
+        x = self.passos_x[i] + (self.passos_x[i + 1] - self.passos_x[i]) * f
+        y = self.passos_y[i] + (self.passos_y[i + 1] - self.passos_y[i]) * f
+        return x, y
+
+    def passos_entre(self, inicio_cm, fim_cm):
+        """Passos (X, Y) para levar o papel de inicio_cm a fim_cm (negativos = para trás)"""
+        x0, y0 = self.passos_em(inicio_cm)
+        x1, y1 = self.passos_em(fim_cm)
+        return round(x1 - x0), round(y1 - y0)
+
+    def reamostrar(self, resolucao_mm):
+        """Tabela mais grossa (múltiplo da resolução atual), ex.: para caber no firmware"""
+        salto = round(resolucao_mm / self.resolucao_mm)
+        if salto < 1 or (len(self.passos_x) - 1) % salto:
+            raise ValueError("A nova resolução deve ser múltiplo da atual e dividir o papel")
+        indices = range(0, len(self.passos_x), salto)
+        return TabelaPassos(array('i', (self.passos_x[i] for i in indices)),
+                            array('i', (self.passos_y[i] for i in indices)),
+                            self.resolucao_mm * salto, self.diametro_inicial_mm, self.espessura_mm,
+                            self.comprimento_total_cm, self.passos_por_volta)
+
+    def para_bytes(self):
+        """Cabeçalho seguido de X e Y como int32 little-endian"""
+        cabecalho = struct.pack(FORMATO_CABECALHO, MAGIC, VERSAO, 0, self.passos_por_volta,
+                                len(self.passos_x), self.resolucao_mm, self.diametro_inicial_mm,
+                                self.espessura_mm, self.comprimento_total_cm)
+        x, y = array('i', self.passos_x), array('i', self.passos_y)
+        if sys.byteorder == 'big':
+            x.byteswap()
+            y.byteswap()
+        return cabecalho + x.tobytes() + y.tobytes()
+
+    @classmethod
+    def de_bytes(cls, dados):
+        tamanho = struct.calcsize(FORMATO_CABECALHO)
+        (magic, versao, _, passos_por_volta, pontos, resolucao_mm, diametro_inicial_mm,
+         espessura_mm, comprimento_total_cm) = struct.unpack_from(FORMATO_CABECALHO, dados)
+        if magic != MAGIC or versao != VERSAO:
+            raise ValueError("Arquivo não é uma tabela de passos TV Alice (v1)")
+        if len(dados) != tamanho + pontos * 8:
+            raise ValueError(f"Tamanho inesperado: {len(dados)} bytes para {pontos} pontos")
+        x, y = array('i'), array('i')
+        x.frombytes(dados[tamanho:tamanho + pontos * 4])
+        y.frombytes(dados[tamanho + pontos * 4:])
+        if sys.byteorder == 'big':
+            x.byteswap()
+            y.byteswap()
+        return cls(x, y, resolucao_mm, diametro_inicial_mm, espessura_mm,
+                   comprimento_total_cm, passos_por_volta)
+
+    def salvar(self, caminho):
+        with open(caminho, 'wb') as f:
+            f.write(self.para_bytes())
+
+    @classmethod
+    def carregar(cls, caminho):
+        with open(caminho, 'rb') as f:
+            return cls.de_bytes(f.read())
+
+    def para_cabecalho_c(self, nome='TABELA_PASSOS'):
+        """Arquivo .h com as tabelas em PROGMEM (ler com pgm_read_dword)"""
+        def valores(passos):
+            linhas = []
+            for i in range(0, len(passos), 10):
+                linhas.append('  ' + ', '.join(f'{p}L' for p in passos[i:i + 10]))
+            return ',\n'.join(linhas)
+
+        return (
+            f"// Gerado por interface/tabela_passos.py - não editar à mão\n"
+            f"// Diâmetro inicial {self.diametro_inicial_mm:.2f} mm, espessura {self.espessura_mm:.3f} mm,\n"
+            f"// papel {self.comprimento_total_cm:.1f} cm, {self.passos_por_volta} passos/volta\n"
+            f"#pragma once\n"
+            f"#include <avr/pgmspace.h>\n\n"
+            f"#define {nome}_PONTOS {len(self)}\n"
+            f"#define {nome}_RESOLUCAO_UM {round(self.resolucao_mm * 1000)}\n\n"
+            f"const long {nome}_X[{nome}_PONTOS] PROGMEM = {{\n{valores(self.passos_x)}\n}};\n\n"
+            f"const long {nome}_Y[{nome}_PONTOS] PROGMEM = {{\n{valores(self.passos_y)}\n}};\n"
+        )
+
+
+def main():
+    from simulador_tv import SimuladorTV
+
+    parser = argparse.ArgumentParser(description='Gera a tabela de passos do SimuladorTV')
+    parser.add_argument('--resolucao-mm', type=float, default=0.1)
+    parser.add_argument('--saida', default='tabela_passos.bin', help='Arquivo binário')
+    parser.add_argument('--cabecalho', help='Gera também um .h para o firmware')
+    parser.add_argument('--resolucao-firmware-mm', type=float, default=5.0,
+                        help='Resolução do .h (a flash do Uno não comporta 0,1 mm)')
+    args = parser.parse_args()
+
+    tabela = SimuladorTV().exportar_tabela_passos(args.resolucao_mm)
+    tabela.salvar(args.saida)
+    print(f"{args.saida}: {len(tabela)} pontos, {len(tabela.para_bytes())} bytes")
+    if args.cabecalho:
+        reduzida = tabela.reamostrar(args.resolucao_firmware_mm)
+        with open(args.cabecalho, 'w') as f:
+            f.write(reduzida.para_cabecalho_c())
+        print(f"{args.cabecalho}: {len(reduzida)} pontos ({len(reduzida) * 8} bytes de flash)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Trabalhos de Movimento - TV Alice
+Movimentos longos (GOTO, PAGE, F:N...) viram trabalhos com ID: a rota HTTP
+retorna na hora, o progresso vem dos eventos do parser ("[i/N]" ou quadros
+$P) e o fim, com sucesso, falha ou cancelamento (STOP), é publicado no
+fluxo /eventos como evento 'trabalho' e fica consultável em /jobs/<id>;
+o resultado vai também para o registro de eventos (/log)
+"""
+
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from conexao_serial import CANCELADO_POR_STOP
+from parser_firmware import PROGRESSO
+from registro_eventos import TRABALHO
+
+# Estados de um trabalho
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+FALHOU = 'falhou'
+CANCELADO = 'cancelado'  # Descartado ou interrompido por uma parada de emergência
+
+# Respostas do firmware que encerram o comando sem executar o movimento
+RE_FALHA = re.compile(r'^>>> (Comando inválido|Movimento interrompido|Página inválida'
+                      r'|Página \d+ ainda não foi marcada|Número de passos inválido)')
+
+
+class Trabalho:
+    """Um comando de movimento acompanhado do envio até a conclusão"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, comando):
+        self.id = next(self._ids)
+        self.comando = comando
+        self.estado = PENDENTE
+        self.passo = None
+        self.total = None
+        self.passos_atual = None
+        self.resposta = None
+        self.erro = None
+        self.criado_em = time.time()
+        self.iniciado_em = None
+        self.concluido_em = None
+        self.concluido = threading.Event()
+
+    @property
+    def progresso(self):
+        """Fração concluída (0 a 1) pelas linhas de progresso, se houver"""
+        if self.estado == CONCLUIDO:
+            return 1.0
+        if self.passo is None or not self.total:
+            return None
+        return self.passo / self.total
+
+    def como_dict(self):
+        return {
+            'id': self.id,
+            'comando': self.comando,
+            'estado': self.estado,
+            'passo': self.passo,
+            'total': self.total,
+            'progresso': self.progresso,
+            'passos_atual': self.passos_atual,
+            'resposta': self.resposta,
+            'erro': self.erro,
+            'criado_em': self.criado_em,
+            'iniciado_em': self.iniciado_em,
+            'concluido_em': self.concluido_em,
+        }
+
+
+class GerenciadorTrabalhos:
+    """Enfileira movimentos sem bloquear e publica o andamento via DifusorEstado"""
+
+    def __init__(self, conexao, difusor, timeout=300.0, capacidade=100, registro=None):
+        self.conexao = conexao
+        self.difusor = difusor
+        self.registro = registro      # RegistroEventos opcional
+        self.timeout = timeout        # Prazo de um movimento (s), contado quando ele começa
+        self.capacidade = capacidade  # Trabalhos antigos guardados para consulta
+        self._trabalhos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submeter(self, comando, timeout=None):
+        """Enfileira o comando e retorna o Trabalho imediatamente"""
+        trabalho = Trabalho(comando)
+        with self._lock:
+            self._trabalhos[trabalho.id] = trabalho
+            while len(self._trabalhos) > self.capacidade:
+                self._trabalhos.popitem(last=False)
+        self._publicar(trabalho)
+        self.conexao.enfileirar(comando, timeout or self.timeout,
+                                ao_receber=lambda linha, eventos: self._receber_linha(trabalho, eventos),
+                                ao_concluir=lambda cmd: self._concluir(trabalho, cmd))
+        return trabalho
+
+    def obter(self, trabalho_id):
+        with self._lock:
+            return self._trabalhos.get(trabalho_id)
+
+    def recentes(self, quantidade=20):
+        with self._lock:
+            return list(self._trabalhos.values())[-quantidade:]
+
+    def _publicar(self, trabalho):
+        self.difusor.publicar(trabalho.como_dict(), evento='trabalho')
+
+    def _receber_linha(self, trabalho, eventos):
+        """Thread serial: primeira linha marca o início, eventos de progresso o atualizam"""
+        mudou = False
+        if trabalho.estado == PENDENTE:
+            trabalho.estado = EXECUTANDO
+            trabalho.iniciado_em = time.time()
+            mudou = True
+        for evento in eventos:
+            if evento.tipo == PROGRESSO:
+                trabalho.passo, trabalho.total = evento.dados['passo'], evento.dados['total']
+                if evento.dados['passos'] is not None:
+                    trabalho.passos_atual = evento.dados['passos']
+                mudou = True
+        if mudou:
+            self._publicar(trabalho)
+
+    def _concluir(self, trabalho, cmd):
+        """Thread serial (ou quem desconectou): estado final definitivo"""
+        trabalho.resposta = cmd.resposta
+        falha = next((linha for linha in cmd.linhas if RE_FALHA.match(linha)), None)
+        if cmd.erro == CANCELADO_POR_STOP:
+            trabalho.estado = CANCELADO
+            trabalho.erro = cmd.erro
+        elif cmd.erro or falha:
+            trabalho.estado = FALHOU
+            trabalho.erro = cmd.erro or falha[4:]
+        else:
+            trabalho.estado = CONCLUIDO
+        if trabalho.iniciado_em is None:
+            trabalho.iniciado_em = cmd.enviado_em
+        trabalho.concluido_em = time.time()
+        trabalho.concluido.set()
+        self._publicar(trabalho)
+        if self.registro is not None:
+            self._registrar(trabalho)
+
+    def _registrar(self, trabalho):
+        if trabalho.estado == CONCLUIDO:
+            linhas = [linha for linha in (trabalho.resposta or '').split('\n') if linha.strip()]
+            mensagem = f"✅ #{trabalho.id} {trabalho.comando}: {' | '.join(linhas[-2:])}"
+        elif trabalho.estado == CANCELADO:
+            mensagem = f"🛑 #{trabalho.id} {trabalho.comando}: {trabalho.erro}"
+        else:
+            mensagem = f"❌ #{trabalho.id} {trabalho.comando}: {trabalho.erro}"
+        self.registro.registrar(TRABALHO, mensagem, id=trabalho.id, comando=trabalho.comando,
+                                estado=trabalho.estado, passos_atual=trabalho.passos_atual)